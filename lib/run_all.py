@@ -2,28 +2,14 @@
 Runs all skyfall examples
 """
 
-import lib.skyfall_tdr_rpd as tdr
-import lib.skyfall_tfr_rpd as tfr
-import lib.skyfall_station_specs as sfp
-import lib.skyfall_ensonify as sfe
-import lib.skyfall_loc_rpd as sfl
-import lib.skyfall_spinning as sfs
-import lib.skyfall_gravity as sfg
+import lib.skyfall_pipeline as sf_pipe
+import lib.skyfall_spans as sf_spans
+from skyfall_config_file import run_all_workers, is_export_spans, SPANS_DIR
 
 
 if __name__ == "__main__":
     print("RedPandas Example: Skyfall")
-    print("\nTime domain representation: skyfall_tdr_rpd.py")
-    tdr.main()
-    print("\nTime frequency representation: skyfall_tfr_rpd.py")
-    tfr.main()
-    print("\nStation details: skyfall_station_specs.py")
-    sfp.main()
-    print("\nSonification: skyfall_ensonify.py")
-    sfe.main()
-    print("\nLocation: skyfall_loc_rpd.py")
-    sfl.main()
-    print("\nAcceleration and gravity: skyfall_gravity.py")
-    sfg.main()
-    print("\nRotation: skyfall_spinning.py")
-    sfs.main()
+    sf_pipe.run_pipeline(sf_pipe.SKYFALL_STAGES, workers=run_all_workers)
+    if is_export_spans:
+        spans_summary_file, spans_trace_file = sf_spans.export_spans(SPANS_DIR)
+        print(f"\nStage timings saved to {spans_summary_file} and {spans_trace_file}")
@@ -0,0 +1,174 @@
+"""
+Time alignment of timestamped tracks, e.g. the phone location and the bounder
+Each track is sorted once and the grid is placed on it with a binary search (numpy searchsorted), so aligning a track
+of N samples on a grid of M times costs O(N log N + M log N) for all of its columns together
+"""
+
+# Python libraries
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# Mean Earth radius in m, for horizontal distances
+EARTH_RADIUS_M = 6371008.8
+
+
+def sorted_track(epoch_s: np.ndarray, values: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Sort a track by time, keeping the first sample of repeated timestamps and dropping samples with NaN
+
+    :param epoch_s: timestamps of the track
+    :param values: 1D arrays of the track, same length as epoch_s
+    :return: sorted unique timestamps and the values at those timestamps
+    """
+    epoch_s = np.asarray(epoch_s, dtype=np.float64)
+    values = {label: np.asarray(value, dtype=np.float64) for label, value in values.items()}
+    is_valid = np.isfinite(epoch_s)
+    for value in values.values():
+        is_valid &= np.isfinite(value)
+    valid_index = np.flatnonzero(is_valid)
+    epoch_s, first_index = np.unique(epoch_s[valid_index], return_index=True)
+    return epoch_s, {label: value[valid_index[first_index]] for label, value in values.items()}
+
+
+def grid_weights(epoch_s: np.ndarray,
+                 grid_epoch_s: np.ndarray,
+                 method: str = "linear",
+                 max_gap_s: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Where each grid time falls in a sorted track
+
+    :param epoch_s: sorted unique timestamps of the track, e.g. from sorted_track
+    :param grid_epoch_s: times to align the track to
+    :param method: 'linear' interpolates between the samples on either side, 'nearest' takes the closest sample.
+        Default 'linear'
+    :param max_gap_s: optional limit. For 'linear', the largest time between the two samples used; for 'nearest',
+        the largest time to the sample used. Default None only requires the grid time to be within the track
+    :return: index of the sample before each grid time, index of the sample after, weight of the sample after,
+        and whether the grid time has a value
+    """
+    grid_epoch_s = np.asarray(grid_epoch_s, dtype=np.float64)
+    if len(epoch_s) < 2:
+        index = np.zeros(len(grid_epoch_s), dtype=np.int64)
+        is_valid = np.isin(grid_epoch_s, epoch_s)
+        return index, index, np.zeros(len(grid_epoch_s)), is_valid
+
+    index_before = np.clip(np.searchsorted(epoch_s, grid_epoch_s, side="right") - 1, 0, len(epoch_s) - 2)
+    index_after = index_before + 1
+    time_before = grid_epoch_s - epoch_s[index_before]
+    time_after = epoch_s[index_after] - grid_epoch_s
+    weight_after = np.clip(time_before / (epoch_s[index_after] - epoch_s[index_before]), 0., 1.)
+
+    if method == "linear":
+        is_valid = (grid_epoch_s >= epoch_s[0]) & (grid_epoch_s <= epoch_s[-1])
+        if max_gap_s is not None:
+            is_valid &= (epoch_s[index_after] - epoch_s[index_before]) <= max_gap_s
+    elif method == "nearest":
+        weight_after = (np.abs(time_after) < np.abs(time_before)).astype(np.float64)
+        if max_gap_s is None:
+            is_valid = (grid_epoch_s >= epoch_s[0]) & (grid_epoch_s <= epoch_s[-1])
+        else:
+            is_valid = np.minimum(np.abs(time_before), np.abs(time_after)) <= max_gap_s
+    else:
+        raise ValueError(f"Unknown alignment method {method}, use 'linear' or 'nearest'")
+    return index_before, index_after, weight_after, is_valid
+
+
+def resample_track(epoch_s: np.ndarray,
+                   values: Dict[str, np.ndarray],
+                   grid_epoch_s: np.ndarray,
+                   method: str = "linear",
+                   max_gap_s: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """
+    Values of a track at the grid times; the grid is placed on the track once for all the values
+
+    :param epoch_s: timestamps of the track, in any order
+    :param values: 1D arrays of the track, same length as epoch_s
+    :param grid_epoch_s: times to align the track to
+    :param method: 'linear' or 'nearest', see grid_weights. Default 'linear'
+    :param max_gap_s: optional largest gap to bridge, see grid_weights. Default None
+    :return: values at the grid times, NaN where the track has no value
+    """
+    epoch_s, values = sorted_track(epoch_s, values)
+    index_before, index_after, weight_after, is_valid = grid_weights(epoch_s, grid_epoch_s, method, max_gap_s)
+    resampled = {}
+    for label, value in values.items():
+        if len(value) == 0:
+            resampled[label] = np.full(len(is_valid), np.nan)
+            continue
+        value_grid = value[index_before] * (1. - weight_after) + value[index_after] * weight_after
+        resampled[label] = np.where(is_valid, value_grid, np.nan)
+    return resampled
+
+
+def common_grid(epoch_a: np.ndarray, epoch_b: np.ndarray, interval_s: float) -> np.ndarray:
+    """
+    Regular grid over the time span shared by two tracks
+
+    :param epoch_a: timestamps of the first track
+    :param epoch_b: timestamps of the second track
+    :param interval_s: grid interval in s
+    :return: grid times in epoch s; empty if the tracks do not overlap
+    """
+    start_epoch_s = max(np.nanmin(epoch_a), np.nanmin(epoch_b))
+    end_epoch_s = min(np.nanmax(epoch_a), np.nanmax(epoch_b))
+    if end_epoch_s < start_epoch_s:
+        return np.array([])
+    return start_epoch_s + interval_s * np.arange(int(np.floor((end_epoch_s - start_epoch_s) / interval_s)) + 1)
+
+
+def horizontal_distance_m(lat_a_deg: np.ndarray,
+                          lon_a_deg: np.ndarray,
+                          lat_b_deg: np.ndarray,
+                          lon_b_deg: np.ndarray) -> np.ndarray:
+    """
+    Great-circle distance between two sets of points
+
+    :param lat_a_deg: latitude of the first points in degrees
+    :param lon_a_deg: longitude of the first points in degrees
+    :param lat_b_deg: latitude of the second points in degrees
+    :param lon_b_deg: longitude of the second points in degrees
+    :return: distance in m
+    """
+    lat_a, lon_a, lat_b, lon_b = (np.radians(np.asarray(angle, dtype=np.float64))
+                                  for angle in (lat_a_deg, lon_a_deg, lat_b_deg, lon_b_deg))
+    haversine = np.sin((lat_b - lat_a) / 2.)**2 + np.cos(lat_a) * np.cos(lat_b) * np.sin((lon_b - lon_a) / 2.)**2
+    return 2. * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(haversine, 0., 1.)))
+
+
+def align_locations(epoch_a: np.ndarray, lat_a_deg: np.ndarray, lon_a_deg: np.ndarray, alt_a_m: np.ndarray,
+                    epoch_b: np.ndarray, lat_b_deg: np.ndarray, lon_b_deg: np.ndarray, alt_b_m: np.ndarray,
+                    grid_epoch_s: Optional[np.ndarray] = None,
+                    method: str = "linear",
+                    max_gap_s: Optional[float] = None) -> pd.DataFrame:
+    """
+    Align two location tracks on a common grid and compare them. To compare several tracks with one reference, call
+    once per track with the same grid
+
+    :param epoch_a: timestamps of the first track, e.g. phone location_epoch_s
+    :param lat_a_deg: latitude of the first track in degrees
+    :param lon_a_deg: longitude of the first track in degrees
+    :param alt_a_m: altitude of the first track in m
+    :param epoch_b: timestamps of the second track, e.g. bounder Epoch_s
+    :param lat_b_deg: latitude of the second track in degrees
+    :param lon_b_deg: longitude of the second track in degrees
+    :param alt_b_m: altitude of the second track in m
+    :param grid_epoch_s: optional grid times, e.g. from common_grid. Default None uses the timestamps of the first
+        track
+    :param method: 'linear' or 'nearest', see grid_weights. Default 'linear'
+    :param max_gap_s: optional largest gap to bridge, see grid_weights. Default None
+    :return: pandas DataFrame with columns: {'Epoch_s', 'Lat_deg_a', 'Lon_deg_a', 'Alt_m_a', 'Lat_deg_b', 'Lon_deg_b',
+        'Alt_m_b', 'Alt_diff_m', 'Horizontal_m'}; differences are the second track minus the first, NaN where either
+        track has no value
+    """
+    if grid_epoch_s is None:
+        grid_epoch_s = np.sort(np.asarray(epoch_a, dtype=np.float64))
+    track_a = resample_track(epoch_a, {"Lat_deg_a": lat_a_deg, "Lon_deg_a": lon_a_deg, "Alt_m_a": alt_a_m},
+                             grid_epoch_s, method, max_gap_s)
+    track_b = resample_track(epoch_b, {"Lat_deg_b": lat_b_deg, "Lon_deg_b": lon_b_deg, "Alt_m_b": alt_b_m},
+                             grid_epoch_s, method, max_gap_s)
+    df_aligned = pd.DataFrame({"Epoch_s": grid_epoch_s, **track_a, **track_b})
+    df_aligned["Alt_diff_m"] = df_aligned["Alt_m_b"] - df_aligned["Alt_m_a"]
+    df_aligned["Horizontal_m"] = horizontal_distance_m(df_aligned["Lat_deg_a"], df_aligned["Lon_deg_a"],
+                                                       df_aligned["Lat_deg_b"], df_aligned["Lon_deg_b"])
+    return df_aligned
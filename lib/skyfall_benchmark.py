@@ -0,0 +1,276 @@
+"""
+Offline benchmark of the Skyfall examples
+Times the hot paths of the examples on a synthetic Skyfall-shaped DataFrame from skyfall_synthetic.py, so the
+downloaded data set is not needed. Results are saved as JSON in BENCHMARK_DIR and compared with the previous run
+"""
+
+# Python libraries
+import os
+import glob
+import json
+import time
+import platform
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+# RedVox RedPandas and related RedVox modules
+import redpandas
+import redpandas.redpd_df as rpd_df
+import redpandas.redpd_preprocess as rpd_prep
+import redpandas.redpd_tfr as rpd_tfr
+import redpandas.redpd_gravity as rpd_grav
+import redpandas.redpd_geospatial as rpd_geo
+import redpandas.redpd_ensonify as rpd_sound
+from libquantum.plot_templates import plot_time_frequency_reps as pnl
+
+# Skyfall examples
+import lib.skyfall_dw as sf_dw
+import lib.skyfall_parquet as sf_pqt
+import lib.skyfall_time_index as sf_time
+import lib.skyfall_tfr_batch as sf_tfr
+import lib.skyfall_gravity_filter as sf_grav
+import lib.skyfall_enu as sf_enu
+import lib.skyfall_spin_rate as sf_spin
+import lib.skyfall_synthetic as sf_synth
+
+# Configuration file
+from skyfall_config_file import tfr_config, benchmark_stations, benchmark_duration_s, \
+    benchmark_audio_sample_rate_hz, BENCHMARK_DIR
+
+
+@contextmanager
+def benchmark_timer(timings_s: Dict[str, float], name: str):
+    """
+    Time the enclosed block and store the wall clock time under name
+
+    :param timings_s: dictionary of timings in s
+    :param name: name of the hot path
+    """
+    print(f"{name}...", end=" ", flush=True)
+    time_start = time.perf_counter()
+    yield
+    timings_s[name] = time.perf_counter() - time_start
+    print(f"{timings_s[name]:.3f} s")
+
+
+def run_benchmarks(number_stations: int = 1,
+                   duration_s: float = 1800.,
+                   audio_sample_rate_hz: float = 800.) -> Dict:
+    """
+    Time the hot paths of the examples on a synthetic DataFrame
+
+    :param number_stations: number of synthetic stations. Default 1
+    :param duration_s: duration of the synthetic records in s. Default 1800
+    :param audio_sample_rate_hz: audio sample rate in Hz. Default 800
+    :return: dictionary with the parameters, environment and timings in s
+    """
+    timings_s = {}
+    plt.switch_backend("Agg")
+
+    with benchmark_timer(timings_s, "synthetic_dataframe"):
+        df = sf_synth.synthetic_skyfall_df(number_stations=number_stations,
+                                           duration_s=duration_s,
+                                           audio_sample_rate_hz=audio_sample_rate_hz)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        # dw_main with DATAWINDOW or PICKLE loads the DataFrame cache once it exists
+        cache_file = os.path.join(work_dir, "benchmark_cache.pkl")
+        with benchmark_timer(timings_s, "dw_main_cache_save"):
+            sf_dw.save_df_cache(df, cache_file, "benchmark")
+        with benchmark_timer(timings_s, "dw_main_datawindow_pickle_cache_load"):
+            sf_dw.load_df_cache(cache_file, "benchmark")
+
+        # dw_main with PARQUET
+        with benchmark_timer(timings_s, "parquet_export"):
+            input_parquet = sf_pqt.export_df_to_parquet(df, work_dir, "benchmark.parquet")
+        with benchmark_timer(timings_s, "dw_main_parquet_load"):
+            sf_pqt.read_parquet(input_parquet)
+
+        # Parquet flattened by redpd_df, restored by unflatten
+        rpd_df.export_df_to_parquet(df.copy(), work_dir, "benchmark_flat.parquet")
+        with benchmark_timer(timings_s, "parquet_flat_load"):
+            df_flat = pd.read_parquet(os.path.join(work_dir, "benchmark_flat.parquet"))
+        with benchmark_timer(timings_s, "unflatten"):
+            rpd_prep.df_unflatten(df_flat)
+        del df_flat
+
+        # Sub-window read of ten seconds of audio
+        audio_index_file = os.path.join(work_dir, "audio.parquet")
+        with benchmark_timer(timings_s, "time_index_audio_export"):
+            sf_time.export_time_index(df, "audio", audio_index_file)
+        with benchmark_timer(timings_s, "time_window_audio_10s"):
+            start_epoch_s = df["audio_epoch_s"][0][0] + duration_s / 2
+            sf_time.read_time_window(audio_index_file, start_epoch_s, start_epoch_s + 10.)
+
+        # Sonification of the audio and highpassed sensors, as in skyfall_ensonify
+        sensor_labels = ["audio", "barometer", "accelerometer", "gyroscope", "magnetometer"]
+        with benchmark_timer(timings_s, "ensonify"):
+            rpd_sound.ensonify_sensors_pandas(df=df,
+                                              sig_id_label="station_id",
+                                              sensor_column_label_list=["audio_wf"] +
+                                              [f"{label}_wf_highpass" for label in sensor_labels[1:]],
+                                              sig_sample_rate_label_list=["audio_sample_rate_nominal_hz"] +
+                                              [f"{label}_sample_rate_hz" for label in sensor_labels[1:]],
+                                              wav_sample_rate_hz=192000.,
+                                              output_wav_directory=work_dir,
+                                              output_wav_filename="benchmark",
+                                              sensor_name_list=['Aud', 'Bar', 'AccX', 'AccY', 'AccZ',
+                                                                'GyrX', 'GyrY', 'GyrZ', 'MagX', 'MagY', 'MagZ'])
+
+    # TFR of the audio as in redpd_tfr, then of every sensor channel with skyfall_tfr_batch
+    df_audio = df[["audio_wf", "audio_sample_rate_nominal_hz"]].copy()
+    with benchmark_timer(timings_s, f"tfr_bits_panda_audio_{tfr_config.tfr_type}"):
+        rpd_tfr.tfr_bits_panda(df=df_audio,
+                               sig_wf_label="audio_wf",
+                               sig_sample_rate_label="audio_sample_rate_nominal_hz",
+                               order_number_input=tfr_config.tfr_order_number_N,
+                               tfr_type=tfr_config.tfr_type)
+    tfr_jobs = [sf_tfr.TFRJob("audio_wf", "audio_sample_rate_nominal_hz", "audio_tfr_bits",
+                              "audio_tfr_time_s", "audio_tfr_frequency_hz")] + \
+               [sf_tfr.TFRJob(f"{label}_wf_highpass", f"{label}_sample_rate_hz", f"{label}_tfr_bits",
+                              f"{label}_tfr_time_s", f"{label}_tfr_frequency_hz") for label in sensor_labels[1:]]
+    for workers in sorted({1, tfr_config.tfr_workers}):
+        with benchmark_timer(timings_s, f"tfr_batch_all_sensors_{workers}_workers"):
+            df_tfr = sf_tfr.tfr_bits_panda_batch(df=df.copy(),
+                                                 tfr_jobs=tfr_jobs,
+                                                 order_number_input=tfr_config.tfr_order_number_N,
+                                                 tfr_type=tfr_config.tfr_type,
+                                                 workers=workers)
+
+    # Spin rate of the gyroscope, against the TFR of its three axes
+    with benchmark_timer(timings_s, "spin_rate_all_stations"):
+        for n in df.index:
+            sf_spin.spin_rate(gyroscope_wf_raw=df["gyroscope_wf_raw"][n],
+                              gyroscope_epoch_s=df["gyroscope_epoch_s"][n],
+                              sample_rate_hz=df["gyroscope_sample_rate_hz"][n])
+
+    # Gravity separation: one axis with redpd_gravity, all axes and stations with skyfall_gravity_filter
+    with benchmark_timer(timings_s, "gravity_redpandas_one_axis"):
+        rpd_grav.get_gravity_and_linear_acceleration(accelerometer=df["accelerometer_wf_raw"][0][0],
+                                                     sensor_sample_rate_hz=df["accelerometer_sample_rate_hz"][0],
+                                                     low_pass_sample_rate_hz=2)
+    with benchmark_timer(timings_s, "gravity_vectorized_all_stations"):
+        sf_grav.gravity_and_linear_acceleration_panda(df=df,
+                                                      accelerometer_wf_label="accelerometer_wf_raw",
+                                                      accelerometer_sample_rate_label="accelerometer_sample_rate_hz",
+                                                      low_pass_sample_rate_hz=2)
+
+    # ENU projection of the phone path, as in skyfall_loc_rpd
+    with benchmark_timer(timings_s, "compute_t_xyz_uvw"):
+        rpd_geo.compute_t_xyz_uvw(unix_s=df["location_epoch_s"][0],
+                                  lat_deg=df["location_latitude"][0],
+                                  lon_deg=df["location_longitude"][0],
+                                  alt_m=df["location_altitude"][0],
+                                  ref_unix_s=df["location_epoch_s"][0][-1],
+                                  ref_lat_deg=df["location_latitude"][0][-1],
+                                  ref_lon_deg=df["location_longitude"][0][-1],
+                                  ref_alt_m=df["location_altitude"][0][-1])
+    with benchmark_timer(timings_s, "enu_projector_all_stations"):
+        projector = sf_enu.EnuProjector(ref_lat_deg=df["location_latitude"][0][-1],
+                                        ref_lon_deg=df["location_longitude"][0][-1],
+                                        ref_alt_m=df["location_altitude"][0][-1],
+                                        ref_unix_s=df["location_epoch_s"][0][-1])
+        projector.t_xyz_uvw_tracks([(df["location_epoch_s"][n], df["location_latitude"][n],
+                                     df["location_longitude"][n], df["location_altitude"][n]) for n in df.index])
+
+    # Rendering of one waveform figure and one TFR figure
+    with benchmark_timer(timings_s, "plot_wf_wf_wf_vert"):
+        figure = pnl.plot_wf_wf_wf_vert(redvox_id=df["station_id"][0],
+                                        wf_panel_2_sig=df["accelerometer_wf_raw"][0][2],
+                                        wf_panel_2_time=df["accelerometer_epoch_s"][0],
+                                        wf_panel_1_sig=df["accelerometer_wf_raw"][0][1],
+                                        wf_panel_1_time=df["accelerometer_epoch_s"][0],
+                                        wf_panel_0_sig=df["accelerometer_wf_raw"][0][0],
+                                        wf_panel_0_time=df["accelerometer_epoch_s"][0],
+                                        start_time_epoch=df["audio_epoch_s"][0][0])
+        figure.canvas.draw()
+    with benchmark_timer(timings_s, "plot_wf_mesh_vert"):
+        figure = pnl.plot_wf_mesh_vert(redvox_id=df["station_id"][0],
+                                       wf_panel_2_sig=df["audio_wf"][0],
+                                       wf_panel_2_time=df["audio_epoch_s"][0],
+                                       mesh_time=df_tfr["audio_tfr_time_s"][0],
+                                       mesh_frequency=df_tfr["audio_tfr_frequency_hz"][0],
+                                       mesh_panel_0_tfr=df_tfr["audio_tfr_bits"][0],
+                                       start_time_epoch=df["audio_epoch_s"][0][0],
+                                       mesh_panel_0_color_range=tfr_config.mc_range['Audio'],
+                                       mesh_panel_0_colormap_scaling=tfr_config.mc_scale['Audio'])
+        figure.canvas.draw()
+    plt.close("all")
+
+    return {"parameters": {"number_stations": number_stations,
+                           "duration_s": duration_s,
+                           "audio_sample_rate_hz": audio_sample_rate_hz,
+                           "tfr_type": tfr_config.tfr_type,
+                           "tfr_order_number_N": tfr_config.tfr_order_number_N},
+            "environment": {"python": platform.python_version(),
+                            "platform": platform.platform(),
+                            "cpu_count": os.cpu_count(),
+                            "numpy": np.__version__,
+                            "pandas": pd.__version__,
+                            "redpandas": redpandas.VERSION},
+            "timings_s": timings_s}
+
+
+def compare_benchmarks(baseline: Dict, benchmark: Dict) -> Dict[str, float]:
+    """
+    Ratio of the timings of two runs; above 1 is slower than the baseline
+
+    :param baseline: results of run_benchmarks for the reference run
+    :param benchmark: results of run_benchmarks for the new run
+    :return: ratio of new to baseline time for the hot paths in both runs
+    """
+    if baseline["parameters"] != benchmark["parameters"]:
+        print("Warning: benchmark parameters differ from the baseline")
+    return {name: benchmark["timings_s"][name] / baseline["timings_s"][name]
+            for name in benchmark["timings_s"] if baseline["timings_s"].get(name)}
+
+
+def save_benchmark(benchmark: Dict, output_dir: str) -> str:
+    """
+    Save the results of run_benchmarks as JSON, named by the time of the run
+
+    :param benchmark: results of run_benchmarks
+    :param output_dir: directory for the JSON files
+    :return: full path of the JSON file
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    benchmark_file = os.path.join(output_dir, f"benchmark_{time.strftime('%Y%m%dT%H%M%S')}.json")
+    with open(benchmark_file, "w") as f:
+        json.dump(benchmark, f, indent=2)
+    return benchmark_file
+
+
+def latest_benchmark(output_dir: str) -> Optional[Dict]:
+    """
+    :param output_dir: directory with JSON files from save_benchmark
+    :return: results of the most recent saved run, None if there is none
+    """
+    benchmark_files = sorted(glob.glob(os.path.join(output_dir, "benchmark_*.json")))
+    if not benchmark_files:
+        return None
+    with open(benchmark_files[-1], "r") as f:
+        return json.load(f)
+
+
+def main():
+    """
+    Run the benchmark with the settings in skyfall_config_file.py and compare with the previous run
+    """
+    baseline = latest_benchmark(BENCHMARK_DIR)
+    benchmark = run_benchmarks(number_stations=benchmark_stations,
+                               duration_s=benchmark_duration_s,
+                               audio_sample_rate_hz=benchmark_audio_sample_rate_hz)
+    print(f"\nSaved benchmark to {save_benchmark(benchmark, BENCHMARK_DIR)}")
+
+    if baseline is not None:
+        print("\nTime relative to the previous run:")
+        for name, ratio in compare_benchmarks(baseline, benchmark).items():
+            print(f"{name:45s} {ratio:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
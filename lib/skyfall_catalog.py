@@ -0,0 +1,285 @@
+"""
+Station catalog of the Skyfall event from packet metadata
+The api900/api1000 tree is indexed from the file names, and only the first and last packet of each station are read
+for the station information, timing and sensor descriptions; no waveform is decoded or corrected. The catalog has one
+row per station and sensor, so the station specs of thousands of stations are written in seconds
+"""
+
+# Python libraries
+import os
+import csv
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from functools import partial
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# RedVox RedPandas and related RedVox modules
+import redvox
+import redvox.common.date_time_utils as dt
+from redvox.common.io import Index, ReadFilter, index_structured
+from redvox.api1000.proto.redvox_api_m_pb2 import RedvoxPacketM
+from redpandas.redpd_config import RedpdConfig
+
+# Skyfall examples
+import lib.skyfall_spans as sf_spans
+import lib.skyfall_prefetch as sf_pf
+
+# Catalog sensor labels and their field in RedvoxPacketM.Sensors
+CATALOG_SENSORS = {"audio": "audio",
+                   "barometer": "pressure",
+                   "accelerometer": "accelerometer",
+                   "gyroscope": "gyroscope",
+                   "magnetometer": "magnetometer",
+                   "location": "location"}
+# Columns of the catalog, one row per station and sensor
+CATALOG_COLUMNS = ["station_id", "make", "model", "os", "os_version", "app_version", "api", "packets",
+                   "station_start_epoch_s", "first_data_epoch_s", "last_data_epoch_s",
+                   "sensor", "sensor_name", "sample_rate_nominal_hz", "sample_rate_hz", "sample_interval_s",
+                   "sample_interval_std_s"]
+
+
+def catalog_read_filter(config: RedpdConfig) -> ReadFilter:
+    """
+    Files of the event, with the same stations, times and buffers as redpd_datawin.dw_from_redpd_config
+
+    :param config: RedpdConfig
+    :return: RedVox ReadFilter
+    """
+    read_filter = ReadFilter() \
+        .with_start_ts(config.event_start_epoch_s * 1E6) \
+        .with_end_ts(config.event_end_epoch_s * 1E6) \
+        .with_start_dt_buf(timedelta(minutes=config.start_buffer_minutes)) \
+        .with_end_dt_buf(timedelta(minutes=config.end_buffer_minutes))
+    if config.station_ids:
+        read_filter = read_filter.with_station_ids(set(config.station_ids))
+    return read_filter
+
+
+def station_indexes(index: Index) -> Dict[str, Index]:
+    """
+    Index of the files of each station, in time order
+
+    :param index: RedVox Index of the event files, e.g. from index_structured or skyfall_file_index
+    :return: {station_id: Index}
+    """
+    index.sort()
+    indexes: Dict[str, Index] = {}
+    for entry in index.entries:
+        indexes.setdefault(entry.station_id, Index()).entries.append(entry)
+    return indexes
+
+
+def sample_interval_s(timing_payload) -> Tuple[float, float]:
+    """
+    Mean and standard deviation of the sample interval of a packet sensor
+
+    :param timing_payload: TimingPayload of a RedvoxPacketM sensor
+    :return: sample interval and its standard deviation in s; NaN when the packet has a single timestamp
+        and no mean sample rate
+    """
+    timestamps_s = np.asarray(timing_payload.timestamps, dtype=np.float64) / 1E6
+    if len(timestamps_s) > 1:
+        intervals_s = np.diff(timestamps_s)
+        return float(np.mean(intervals_s)), float(np.std(intervals_s))
+    if timing_payload.mean_sample_rate > 0:
+        return 1. / timing_payload.mean_sample_rate, np.nan
+    return np.nan, np.nan
+
+
+def audio_data_epoch_s(packet: RedvoxPacketM, is_last: bool = False) -> float:
+    """
+    Time of the first or last audio sample of a packet, or the packet start or end time without audio
+
+    :param packet: RedvoxPacketM
+    :param is_last: if True, the time of the last sample. Default False
+    :return: time in epoch s
+    """
+    audio = packet.sensors.audio
+    if packet.sensors.HasField("audio") and audio.sample_rate > 0:
+        first_sample_us = audio.first_sample_timestamp
+        if not is_last:
+            return first_sample_us / 1E6
+        return first_sample_us / 1E6 + (len(audio.samples.values) - 1) / audio.sample_rate
+    timing = packet.timing_information
+    return (timing.packet_end_mach_timestamp if is_last else timing.packet_start_mach_timestamp) / 1E6
+
+
+def packet_catalog_rows(first_packet: RedvoxPacketM, last_packet: RedvoxPacketM, api: str,
+                        packets: int) -> List[dict]:
+    """
+    Catalog rows of a station from its first and last packets
+
+    :param first_packet: first RedvoxPacketM of the station
+    :param last_packet: last RedvoxPacketM of the station
+    :param api: API version of the files, e.g. 'API_1000'
+    :param packets: number of files of the station
+    :return: one row per sensor in the first packet
+    """
+    station_info = first_packet.station_information
+    station_start_us = first_packet.timing_information.app_start_mach_timestamp
+    station = {"station_id": station_info.id,
+               "make": station_info.make,
+               "model": station_info.model,
+               "os": RedvoxPacketM.StationInformation.OsType.Name(station_info.os),
+               "os_version": station_info.os_version,
+               "app_version": station_info.app_version,
+               "api": api,
+               "packets": packets,
+               "station_start_epoch_s": station_start_us / 1E6 if station_start_us > 0 else np.nan,
+               "first_data_epoch_s": audio_data_epoch_s(first_packet),
+               "last_data_epoch_s": audio_data_epoch_s(last_packet, is_last=True)}
+
+    rows = []
+    for sensor_label, sensor_field in CATALOG_SENSORS.items():
+        if not first_packet.sensors.HasField(sensor_field):
+            continue
+        sensor = getattr(first_packet.sensors, sensor_field)
+        if sensor_label == "audio":
+            # Audio has a fixed sample rate and no timestamps
+            nominal_rate_hz = sensor.sample_rate
+            interval_s, interval_std_s = (1. / nominal_rate_hz, 0.) if nominal_rate_hz > 0 else (np.nan, np.nan)
+        else:
+            nominal_rate_hz = np.nan
+            interval_s, interval_std_s = sample_interval_s(sensor.timestamps)
+        rows.append({**station,
+                     "sensor": sensor_label,
+                     "sensor_name": sensor.sensor_description,
+                     "sample_rate_nominal_hz": nominal_rate_hz,
+                     "sample_rate_hz": 1. / interval_s if interval_s > 0 else np.nan,
+                     "sample_interval_s": interval_s,
+                     "sample_interval_std_s": interval_std_s})
+    return rows
+
+
+def scan_stations(indexes: List[Index], prefetch_depth: int = sf_pf.PREFETCH_DEPTH) -> List[dict]:
+    """
+    Catalog rows of some stations; reads only the first and last files of each, with one prefetching reader for all
+    of them
+
+    :param indexes: Index of the files of each station, in time order, e.g. from station_indexes
+    :param prefetch_depth: files read ahead while others decode; 0 reads them in turn. Default sf_pf.PREFETCH_DEPTH
+    :return: one row per station and sensor
+    """
+    with sf_spans.span("catalog_stations", stations=len(indexes)) as record:
+        station_entries = [[index.entries[0]] if len(index.entries) == 1 else [index.entries[0], index.entries[-1]]
+                           for index in indexes]
+        stats = sf_pf.PrefetchStats()
+        packets = sf_pf.prefetch_packets([entry.full_path for entries in station_entries for entry in entries],
+                                         prefetch_depth, stats)
+        rows = []
+        with closing(packets):
+            for index, entries in zip(indexes, station_entries):
+                station_packets = [next(packets)[2] for _ in entries]
+                first_packet, last_packet = station_packets[0], station_packets[-1]
+                if first_packet is None or last_packet is None:
+                    continue
+                rows.extend(packet_catalog_rows(first_packet, last_packet, entries[0].api_version.name,
+                                                len(index.entries)))
+        record["args"].update(stats.as_dict())
+        return rows
+
+
+def scan_catalog(config: RedpdConfig,
+                 workers: int = 1,
+                 index: Optional[Index] = None,
+                 prefetch_depth: int = sf_pf.PREFETCH_DEPTH) -> pd.DataFrame:
+    """
+    Station catalog of the event
+
+    :param config: RedpdConfig with the input directory, stations and event times
+    :param workers: number of worker processes, one contiguous group of stations each; 1 scans the stations in this
+        process. Default 1
+    :param index: optional RedVox Index of the event files, e.g. from skyfall_file_index.config_file_index.
+        Default None indexes the directory tree with the filter of catalog_read_filter
+    :param prefetch_depth: files each process reads ahead while others decode. Default sf_pf.PREFETCH_DEPTH
+    :return: DataFrame with CATALOG_COLUMNS, one row per station and sensor
+    """
+    if index is None:
+        with sf_spans.span("catalog_index"):
+            index = index_structured(config.input_dir, catalog_read_filter(config))
+    indexes = list(station_indexes(index).values())
+    print(f"Scanning {len(indexes)} stations")
+
+    if workers == 1 or len(indexes) < 2:
+        rows = scan_stations(indexes, prefetch_depth)
+    else:
+        number_groups = min(workers, len(indexes))
+        group_ends = np.linspace(0, len(indexes), number_groups + 1).round().astype(int)
+        station_groups = [indexes[start:end] for start, end in zip(group_ends[:-1], group_ends[1:])]
+        context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+        with ProcessPoolExecutor(max_workers=number_groups, mp_context=context) as executor:
+            group_rows = list(sf_spans.map_with_spans(executor, partial(scan_stations, prefetch_depth=prefetch_depth),
+                                                      station_groups))
+        rows = [row for station_rows in group_rows for row in station_rows]
+    return pd.DataFrame(rows, columns=CATALOG_COLUMNS)
+
+
+def export_catalog(df_catalog: pd.DataFrame, output_file: str) -> str:
+    """
+    Save the station catalog
+
+    :param df_catalog: DataFrame from scan_catalog
+    :param output_file: full path of the parquet file
+    :return: output_file
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    df_catalog.to_parquet(output_file, index=False)
+    return output_file
+
+
+def _epoch_row(description: str, field: str, epoch_s: float, missing: Optional[str] = None) -> list:
+    """
+    CSV row with a time in epoch s and UTC
+    """
+    if np.isnan(epoch_s):
+        return [description, field, "N/A", missing]
+    return [description, field, str(epoch_s), dt.datetime_from_epoch_seconds_utc(epoch_s)]
+
+
+def catalog_specs_to_csv(df_catalog: pd.DataFrame, export_file: str) -> None:
+    """
+    Export station specs to CSV from the catalog, in the layout of skyfall_station_specs.station_specs_to_csv
+
+    :param df_catalog: DataFrame from scan_catalog
+    :param export_file: full path of the CSV file
+    :return: save CSV to output directory provided
+    """
+    with open(export_file, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile, delimiter=',')
+
+        for station_id, df_station in df_catalog.groupby("station_id", sort=False):
+            station = df_station.iloc[0]
+            writer.writerow(["Description", "Field", "Value"])
+            writer.writerow(["Station ID", "station_id", station_id])
+            writer.writerow(["Make", "make", station["make"]])
+            writer.writerow(["Model", "model", station["model"]])
+            writer.writerow(["OS", "os", station["os"]])
+            writer.writerow(["OS Version", "os_version", station["os_version"]])
+            writer.writerow(["App Version", "app_version", station["app_version"]])
+            writer.writerow(["SDK Version", "redvox.VERSION", redvox.VERSION])
+            writer.writerow([])
+
+            writer.writerow(["Station and Event Date"])
+            writer.writerow([])
+            writer.writerow(["Description", "Field", "Epoch s", "Human UTC"])
+            writer.writerow(_epoch_row("Station Start Date", "station_start_epoch_s",
+                                       station["station_start_epoch_s"], "N/A before v2.6.3"))
+            writer.writerow(_epoch_row("Event Start Date", "first_data_epoch_s", station["first_data_epoch_s"]))
+            writer.writerow(_epoch_row("Event End Date", "last_data_epoch_s", station["last_data_epoch_s"]))
+
+            writer.writerow([])
+            writer.writerow(["Station Sensors"])
+            for _, sensor in df_station.iterrows():
+                writer.writerow([])
+                writer.writerow([sensor["sensor"]])
+                writer.writerow(["Description", "Field", "Value"])
+                writer.writerow(["Sensor Name", "sensor_name", sensor["sensor_name"]])
+                if sensor["sensor"] == "audio":
+                    writer.writerow(["Nominal Rate Hz", "sample_rate_nominal_hz", sensor["sample_rate_nominal_hz"]])
+                writer.writerow(["Sample Rate Hz", "sample_rate_hz", sensor["sample_rate_hz"]])
+                writer.writerow(["Sample Interval s", "sample_interval_s", sensor["sample_interval_s"]])
+                writer.writerow(["Interval Dev s", "sample_interval_std_s", sensor["sample_interval_std_s"]])
@@ -0,0 +1,150 @@
+"""
+Min/max envelope decimation of waveforms for plotting
+A figure cannot show more than one vertical line per pixel column, so each waveform is cut into one bin per pixel
+and only the samples with the smallest and largest value of each bin are plotted, at their own timestamps. Peaks,
+gaps at the bin level and time alignment are kept, and the number of points drawn no longer grows with the record
+"""
+
+# Python libraries
+from typing import Callable, Dict, Optional
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+# RedVox RedPandas and related RedVox modules
+import redpandas.redpd_plot.wiggles as rpd_plot
+from redpandas.redpd_plot.parameters import FigureParameters as FigParam
+from libquantum.plot_templates import plot_time_frequency_reps as pnl
+
+
+def figure_width_px(dpi: Optional[float] = None) -> int:
+    """
+    Width in pixels of the RedPandas and libquantum figure templates
+
+    :param dpi: resolution of the figure in dots per inch. Default None uses matplotlib's figure.dpi
+    :return: figure width in pixels
+    """
+    return int(np.ceil(FigParam().figure_size_x * (plt.rcParams["figure.dpi"] if dpi is None else dpi)))
+
+
+def envelope_indices(sig_wf: np.ndarray, number_bins: int) -> np.ndarray:
+    """
+    Indices of the min/max envelope of a waveform
+
+    :param sig_wf: 1D waveform or (channels, samples) array; the envelope of every channel is kept
+    :param number_bins: number of bins, e.g. the pixel width of the plot
+    :return: sorted indices of the first and last samples and of the smallest and largest sample of each bin
+    """
+    number_samples = np.shape(sig_wf)[-1]
+    bin_size = max(1, number_samples // number_bins)
+    number_full = (number_samples // bin_size) * bin_size
+    sig_bins = np.reshape(sig_wf[..., :number_full], np.shape(sig_wf)[:-1] + (-1, bin_size))
+    bin_start = np.arange(0, number_full, bin_size)
+    return np.unique(np.concatenate([[0, number_samples - 1],
+                                     np.ravel(np.argmin(sig_bins, axis=-1) + bin_start),
+                                     np.ravel(np.argmax(sig_bins, axis=-1) + bin_start),
+                                     np.arange(number_full, number_samples)]))
+
+
+def decimate_wf(sig_wf: np.ndarray, sig_time: np.ndarray, number_bins: int):
+    """
+    Min/max envelope of a waveform and its timestamps
+
+    :param sig_wf: 1D waveform or (channels, samples) array
+    :param sig_time: timestamps of the samples
+    :param number_bins: number of bins, e.g. the pixel width of the plot
+    :return: decimated waveform and timestamps; the inputs if they are already short or do not match
+    """
+    sig_wf = np.asarray(sig_wf)
+    sig_time = np.asarray(sig_time)
+    if np.ndim(sig_wf) not in (1, 2) or np.ndim(sig_time) != 1 or np.shape(sig_wf)[-1] != len(sig_time) or \
+            len(sig_time) <= 4 * number_bins:
+        return sig_wf, sig_time
+    envelope = envelope_indices(sig_wf, number_bins)
+    return sig_wf[..., envelope], sig_time[envelope]
+
+
+def decimate_wf_panels(kwargs: Dict, number_bins: int) -> Dict:
+    """
+    Decimate the wf_panel_<n>_sig and wf_panel_<n>_time arguments of the libquantum plot templates
+
+    :param kwargs: keyword arguments of pnl.plot_wf_wf_wf_vert or pnl.plot_wf_mesh_vert
+    :param number_bins: number of bins, e.g. the pixel width of the plot
+    :return: new keyword arguments
+    """
+    kwargs = dict(kwargs)
+    for panel in range(3):
+        sig_label = f"wf_panel_{panel}_sig"
+        time_label = f"wf_panel_{panel}_time"
+        if sig_label in kwargs and time_label in kwargs:
+            kwargs[sig_label], kwargs[time_label] = decimate_wf(kwargs[sig_label], kwargs[time_label], number_bins)
+    return kwargs
+
+
+def decimate_wiggles(kwargs: Dict, number_bins: int) -> Dict:
+    """
+    Decimate the waveform columns plotted by rpd_plot.plot_wiggles_pandas. Each waveform gets its own decimated
+    timestamps column, since the envelopes of two waveforms on the same clock keep different samples
+
+    :param kwargs: keyword arguments of rpd_plot.plot_wiggles_pandas
+    :param number_bins: number of bins, e.g. the pixel width of the plot
+    :return: new keyword arguments, with a DataFrame holding only the plotted columns
+    """
+    kwargs = dict(kwargs)
+    df = kwargs["df"]
+    sig_wf_labels = kwargs.get("sig_wf_label", "audio_wf")
+    sig_timestamps_labels = kwargs.get("sig_timestamps_label", "audio_epoch_s")
+    if type(sig_wf_labels) == str:
+        sig_wf_labels = [sig_wf_labels]
+    if type(sig_timestamps_labels) == str:
+        sig_timestamps_labels = [sig_timestamps_labels]
+    sig_id_label = kwargs.get("sig_id_label", "station_id")
+
+    df_decimated = pd.DataFrame({sig_id_label: df[sig_id_label]}, index=df.index)
+    decimated_timestamps_labels = []
+    for sig_wf_label, sig_timestamps_label in zip(sig_wf_labels, sig_timestamps_labels):
+        if sig_wf_label not in df.columns:
+            # plot_wiggles_pandas reports the missing sensor; its timestamps are still read
+            decimated_timestamps_labels.append(sig_timestamps_label)
+            if sig_timestamps_label in df.columns:
+                df_decimated[sig_timestamps_label] = df[sig_timestamps_label]
+            continue
+        decimated_timestamps_label = f"{sig_wf_label}_decimated_epoch_s"
+        decimated_timestamps_labels.append(decimated_timestamps_label)
+        sig_wf_decimated = []
+        sig_time_decimated = []
+        for n in df.index:
+            if type(df[sig_wf_label][n]) == float or df[sig_timestamps_label][n] is None:
+                sig_wf_decimated.append(df[sig_wf_label][n])
+                sig_time_decimated.append(df[sig_timestamps_label][n])
+                continue
+            sig_wf, sig_time = decimate_wf(df[sig_wf_label][n], df[sig_timestamps_label][n], number_bins)
+            sig_wf_decimated.append(sig_wf)
+            sig_time_decimated.append(sig_time)
+        df_decimated[sig_wf_label] = sig_wf_decimated
+        df_decimated[decimated_timestamps_label] = sig_time_decimated
+
+    kwargs.update({"df": df_decimated, "sig_wf_label": sig_wf_labels,
+                   "sig_timestamps_label": decimated_timestamps_labels})
+    return kwargs
+
+
+# Plot functions with waveform arguments, and how to decimate them
+WF_DECIMATORS: Dict[Callable, Callable[[Dict, int], Dict]] = {
+    pnl.plot_wf_wf_wf_vert: decimate_wf_panels,
+    pnl.plot_wf_mesh_vert: decimate_wf_panels,
+    rpd_plot.plot_wiggles_pandas: decimate_wiggles,
+}
+
+
+def decimate_plot_kwargs(plot_function: Callable, kwargs: Dict, number_bins: int) -> Dict:
+    """
+    Decimate the waveforms in the arguments of a plot function
+
+    :param plot_function: plotting function
+    :param kwargs: keyword arguments of plot_function
+    :param number_bins: number of bins, e.g. the pixel width of the plot
+    :return: keyword arguments with decimated waveforms; kwargs if plot_function has no waveform arguments
+    """
+    decimator = WF_DECIMATORS.get(plot_function)
+    return kwargs if decimator is None else decimator(kwargs, number_bins)
@@ -5,52 +5,485 @@ This is a helper function for other skyfall example files
 
 # Python libraries
 import os.path
+import copy
+import json
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import List, Optional
+import numpy as np
 import pandas as pd
 
 # RedVox RedPandas and related RedVox modules
 from redvox.common.data_window import DataWindow
+from redvox import settings as redvox_settings
+from redvox.common.io import Index, index_structured
 import redpandas.redpd_df as rpd_df
 import redpandas.redpd_datawin as rpd_dw
+import lib.skyfall_parquet as sf_pqt
+import lib.skyfall_time_index as sf_time
+import lib.skyfall_pyramid as sf_pyr
+import lib.skyfall_spans as sf_spans
+import lib.skyfall_catalog as sf_cat
+import lib.skyfall_file_index as sf_fidx
+import lib.skyfall_prefetch as sf_pf
 
 # Configuration files
-from redpandas.redpd_config import DataLoadMethod
-from skyfall_config_file import skyfall_config
+from redpandas.redpd_config import DataLoadMethod, RedpdConfig
+from skyfall_config_file import skyfall_config, is_cache_dataframe, CACHE_DIR, datawindow_workers, \
+    datawindow_prefetch_depth, is_file_index, file_index_workers, file_index_prefetch_depth, FILE_INDEX_FILE
 
 
+LOADED_DW = None
 LOADED_DF = None
 
 
-def dw_main(load_method: DataLoadMethod):
+def dw_cache_key(config: RedpdConfig, load_method: DataLoadMethod, sensor_labels: Optional[List[str]] = None) -> str:
     """
-    :return: skyfall dataframe; exits if dataframe can't be found
+    Hash the configuration fields that determine the contents of the RedPandas DataFrame
+
+    :param config: RedpdConfig used to build the DataFrame
+    :param load_method: DataLoadMethod used to build the DataFrame
+    :param sensor_labels: optional sensors in the DataFrame. Default None uses config.sensor_labels
+    :return: hexadecimal key for the cache file name
     """
-    global LOADED_DF
+    key_fields = {"input_dir": os.path.abspath(config.input_dir),
+                  "station_ids": sorted(config.station_ids) if config.station_ids is not None else None,
+                  "sensor_labels": list(config.sensor_labels if sensor_labels is None else sensor_labels),
+                  "event_start_epoch_s": config.event_start_epoch_s,
+                  "duration_s": config.duration_s,
+                  "start_buffer_minutes": config.start_buffer_minutes,
+                  "end_buffer_minutes": config.end_buffer_minutes,
+                  "load_method": load_method.name}
+    return hashlib.sha256(json.dumps(key_fields, sort_keys=True).encode()).hexdigest()[:16]
 
-    if LOADED_DF is None:
-        # Load data options
-        if load_method == DataLoadMethod.DATAWINDOW or load_method == DataLoadMethod.PICKLE:
-            print("Initiating Conversion from RedVox DataWindow to RedVox RedPandas:")
-            if load_method == DataLoadMethod.DATAWINDOW:  # Option A: Create DataWindow object
-                print("Constructing RedVox DataWindow...", end=" ")
 
-                rdvx_data = rpd_dw.dw_from_redpd_config(config=skyfall_config)
+def dw_input_files(config: RedpdConfig, load_method: DataLoadMethod) -> List[str]:
+    """
+    List the files the DataFrame is built from: the api900/api1000 tree or the DataWindow pickle
+
+    :param config: RedpdConfig used to build the DataFrame
+    :param load_method: DataLoadMethod used to build the DataFrame
+    :return: sorted list of full paths
+    """
+    if load_method == DataLoadMethod.PICKLE:
+        return [os.path.join(config.output_dir, config.output_filename_pkl_pqt)]
+
+    if os.path.basename(os.path.normpath(config.input_dir)) in ("api900", "api1000"):
+        api_dirs = [config.input_dir]
+    else:
+        api_dirs = [os.path.join(config.input_dir, api) for api in ("api900", "api1000")]
+
+    input_files = []
+    for api_dir in api_dirs:
+        for dir_path, _, file_names in os.walk(api_dir):
+            input_files.extend(os.path.join(dir_path, file_name) for file_name in file_names)
+    return sorted(input_files)
+
+
+def dw_input_fingerprint(input_files: List[str]) -> str:
+    """
+    Hash the names, sizes and modification times of the input files
+
+    :param input_files: list of full paths from dw_input_files
+    :return: hexadecimal fingerprint; changes whenever a file is added, removed or modified
+    """
+    fingerprint = hashlib.sha256()
+    for input_file in input_files:
+        if os.path.exists(input_file):
+            file_stat = os.stat(input_file)
+            fingerprint.update(f"{input_file}|{file_stat.st_size}|{file_stat.st_mtime_ns}\n".encode())
+    return fingerprint.hexdigest()
+
+
+def load_df_cache(cache_file: str, fingerprint: str) -> Optional[pd.DataFrame]:
+    """
+    Load the cached DataFrame if it was built from the same input files
+
+    :param cache_file: full path of the cached DataFrame pickle
+    :param fingerprint: fingerprint of the current input files
+    :return: cached DataFrame, or None if missing or stale
+    """
+    manifest_file = os.path.splitext(cache_file)[0] + ".json"
+    if not os.path.exists(cache_file) or not os.path.exists(manifest_file):
+        return None
+
+    with open(manifest_file, "r") as manifest:
+        if json.load(manifest).get("fingerprint") != fingerprint:
+            print("Cached RedPandas DataFrame is stale, input files have changed.")
+            return None
+
+    print("Loading cached RedPandas DataFrame...", end=" ")
+    df = pd.read_pickle(cache_file)
+    print(f"Done. RedVox SDK version: {df['redvox_sdk_version'][0]}")
+    return df
+
+
+def save_df_cache(df: pd.DataFrame, cache_file: str, fingerprint: str) -> None:
+    """
+    Save the DataFrame and the fingerprint of its input files; replaces any stale entry
+
+    :param df: RedPandas DataFrame
+    :param cache_file: full path of the cached DataFrame pickle
+    :param fingerprint: fingerprint of the input files used to build df
+    :return: save pickle and JSON manifest to cache directory
+    """
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    manifest_file = os.path.splitext(cache_file)[0] + ".json"
+
+    # Write to temporary files first so an interrupted run never leaves a half-written entry
+    df.to_pickle(cache_file + ".tmp", protocol=-1)
+    with open(manifest_file + ".tmp", "w") as manifest:
+        json.dump({"fingerprint": fingerprint, "event_name": skyfall_config.event_name}, manifest)
+    os.replace(cache_file + ".tmp", cache_file)
+    os.replace(manifest_file + ".tmp", manifest_file)
+    print(f"Saved RedPandas DataFrame to cache: {cache_file}")
 
-            else:  # Option B: Load pickle with DataWindow object. Assume compressed
+
+def dw_prefetched_datawindow(config: RedpdConfig,
+                             station_indexes: List[Index],
+                             prefetch_depth: int = sf_pf.PREFETCH_DEPTH) -> DataWindow:
+    """
+    DataWindow of config. The planned files of its stations are read into the operating system cache a few files
+    ahead of the file the DataWindow reads and decodes
+
+    :param config: RedpdConfig
+    :param station_indexes: Index of the files of each station of config, e.g. from skyfall_catalog.station_indexes
+    :param prefetch_depth: files read ahead of the file the DataWindow reads; 0 reads nothing ahead.
+        Default sf_pf.PREFETCH_DEPTH
+    :return: RedVox DataWindow
+    """
+    with sf_spans.span("datawindow_stations", stations=len(station_indexes)) as record:
+        paths = [entry.full_path for index in station_indexes for entry in index.entries]
+        with sf_pf.prefetch_files(paths, prefetch_depth) as stats:
+            data_window = rpd_dw.dw_from_redpd_config(config=config)
+        record["args"].update(stats.as_dict())
+        return data_window
+
+
+def dw_station_datawindow(station_indexes: List[Index],
+                          config: RedpdConfig,
+                          prefetch_depth: int = sf_pf.PREFETCH_DEPTH) -> DataWindow:
+    """
+    DataWindow of some of the stations of config, as dw_prefetched_datawindow
+
+    :param station_indexes: Index of the files of each station to build, e.g. from skyfall_catalog.station_indexes
+    :param config: RedpdConfig
+    :param prefetch_depth: files read ahead of the file the DataWindow reads. Default sf_pf.PREFETCH_DEPTH
+    :return: RedVox DataWindow
+    """
+    station_config = copy.copy(config)
+    station_config.station_ids = [index.entries[0].station_id for index in station_indexes]
+    return dw_prefetched_datawindow(station_config, station_indexes, prefetch_depth)
+
+
+def dw_from_redpd_config(config: RedpdConfig,
+                         workers: int = 1,
+                         index: Optional[Index] = None,
+                         prefetch_depth: int = sf_pf.PREFETCH_DEPTH) -> DataWindow:
+    """
+    RedVox DataWindow as redpd_datawin.dw_from_redpd_config, with the files planned from the index read ahead of
+    the DataWindow. With more than one worker, the stations are split in contiguous groups, each group is built on a
+    worker process, and the stations are gathered in the order of the serial build. Stations are read, corrected and
+    windowed independently, so the result is the same
+
+    :param config: RedpdConfig
+    :param workers: number of worker processes; 1 builds the DataWindow in this process. Default 1
+    :param index: optional RedVox Index of the event files the stations are planned from, e.g. from
+        skyfall_file_index.config_file_index. Default None indexes the api900/api1000 tree
+    :param prefetch_depth: files each process reads ahead of its DataWindow; 0 reads nothing ahead.
+        Default sf_pf.PREFETCH_DEPTH
+    :return: RedVox DataWindow
+    """
+    if redvox_settings.is_parallelism_enabled():
+        # The DataWindow reads the stations on its own pool, where the prefetch cannot follow it
+        prefetch_depth = 0
+    if workers == 1 and prefetch_depth < 1:
+        return rpd_dw.dw_from_redpd_config(config=config)
+    # Station order of the serial build
+    if index is None:
+        index = index_structured(config.input_dir, sf_cat.catalog_read_filter(config))
+    station_ids = index.summarize().station_ids()
+    indexes = sf_cat.station_indexes(index)
+    if workers == 1 or len(station_ids) < 2:
+        return dw_prefetched_datawindow(config, list(indexes.values()), prefetch_depth)
+
+    number_groups = min(workers, len(station_ids))
+    group_ends = np.linspace(0, len(station_ids), number_groups + 1).round().astype(int)
+    station_groups = [[indexes[station_id] for station_id in station_ids[start:end]]
+                      for start, end in zip(group_ends[:-1], group_ends[1:])]
+    context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+    with ProcessPoolExecutor(max_workers=number_groups, mp_context=context) as executor:
+        group_windows = list(sf_spans.map_with_spans(executor, partial(dw_station_datawindow, config=config,
+                                                                       prefetch_depth=prefetch_depth),
+                                                     station_groups))
+
+    # Each group orders its own stations; stations restarted in the window share an id and keep their order
+    station_order = {station_id: order for order, station_id in enumerate(station_ids)}
+    stations = sorted((station for group_window in group_windows for station in group_window.stations()),
+                      key=lambda station: station_order.get(station.id(), len(station_order)))
+    data_window = group_windows[0]
+    while data_window.stations():
+        data_window.remove_station()
+    for station in stations:
+        data_window.add_station(station)
+    data_window.config().station_ids = set(config.station_ids) if config.station_ids else None
+    return data_window
+
+
+def dw_datawindow(load_method: DataLoadMethod = DataLoadMethod.DATAWINDOW) -> DataWindow:
+    """
+    Build the RedVox DataWindow once per process; later calls return the same object
+
+    :param load_method: DataLoadMethod.PICKLE loads the saved DataWindow, any other method builds it from the
+        api900/api1000 files
+    :return: RedVox DataWindow
+    """
+    global LOADED_DW
+
+    if LOADED_DW is None:
+        with sf_spans.span("datawindow", load_method=load_method.name):
+            if load_method == DataLoadMethod.PICKLE:  # Load pickle with DataWindow object. Assume compressed
                 print("Unpickling existing compressed RedVox DataWindow with JSON...", end=" ")
-                rdvx_data: DataWindow = DataWindow.load(os.path.join(skyfall_config.output_dir,
-                                                                     skyfall_config.output_filename_pkl_pqt))
-            print(f"Done. RedVox SDK version: {rdvx_data.sdk_version()}")
+                LOADED_DW = DataWindow.load(os.path.join(skyfall_config.output_dir,
+                                                         skyfall_config.output_filename_pkl_pqt))
+            else:  # Create DataWindow object
+                print("Constructing RedVox DataWindow...", end=" ")
+                index = sf_fidx.config_file_index(skyfall_config, FILE_INDEX_FILE, file_index_workers,
+                                                  file_index_prefetch_depth) \
+                    if is_file_index else None
+                LOADED_DW = dw_from_redpd_config(skyfall_config, workers=datawindow_workers, index=index,
+                                                 prefetch_depth=datawindow_prefetch_depth)
+        print(f"Done. RedVox SDK version: {LOADED_DW.sdk_version()}")
+
+    return LOADED_DW
+
+
+def column_sensor_label(column: str, sensor_labels: List[str]) -> Optional[str]:
+    """
+    Sensor a RedPandas DataFrame column comes from, e.g. 'barometer' for 'barometer_wf_raw'
+
+    :param column: column name
+    :param sensor_labels: candidate sensor labels
+    :return: longest sensor label that prefixes the column, None for station columns such as 'station_id'
+    """
+    matches = [label for label in sensor_labels if column.startswith(label + "_")]
+    return max(matches, key=len) if matches else None
+
+
+def df_projection(df: pd.DataFrame, columns: Optional[List[str]], sensor_labels: List[str]) -> pd.DataFrame:
+    """
+    Select columns of a loaded DataFrame; the waveform arrays are shared with df, not copied
+
+    :param df: RedPandas DataFrame
+    :param columns: columns to keep, None keeps the station columns and every column of sensor_labels
+    :param sensor_labels: sensors to keep when columns is None
+    :return: DataFrame with the selected columns
+    """
+    if columns is None:
+        columns = [column for column in df.columns
+                   if column_sensor_label(column, skyfall_config.sensor_labels) in sensor_labels + [None]]
+    return df[columns]
 
-            # For option A or B, begin RedPandas
-            LOADED_DF = rpd_df.redpd_dataframe(rdvx_data, skyfall_config.sensor_labels)
 
-        elif load_method == DataLoadMethod.PARQUET:  # Option C: Open dataframe from parquet file
-            print("Loading existing RedPandas Parquet...", end=" ")
-            LOADED_DF = pd.read_parquet(os.path.join(skyfall_config.output_dir, skyfall_config.pd_pqt_file))
-            print(f"Done. RedVox SDK version: {LOADED_DF['redvox_sdk_version'][0]}")
+def dw_dataframe(load_method: DataLoadMethod, sensor_labels: List[str]) -> pd.DataFrame:
+    """
+    Build the RedPandas DataFrame of sensor_labels from the DataWindow, or load it from the disk cache
+
+    :param load_method: DataLoadMethod.DATAWINDOW or DataLoadMethod.PICKLE
+    :param sensor_labels: sensors to convert
+    :return: RedPandas DataFrame
+    """
+    if is_cache_dataframe:
+        cache_file = os.path.join(CACHE_DIR, f"{skyfall_config.event_name}_"
+                                             f"{dw_cache_key(skyfall_config, load_method, sensor_labels)}.pkl")
+        fingerprint = dw_input_fingerprint(dw_input_files(skyfall_config, load_method))
+        with sf_spans.span("dataframe_cache_load"):
+            df = load_df_cache(cache_file, fingerprint)
+        if df is not None:
+            return df
+
+    print("Initiating Conversion from RedVox DataWindow to RedVox RedPandas:")
+    # Option A: Create DataWindow object, Option B: Load pickle with DataWindow object
+    rdvx_data = dw_datawindow(load_method)
 
-        else:
-            print('\nNo data loading method selected.  Data is required to run program; will now exit.')
-            exit(1)
+    # For option A or B, begin RedPandas
+    with sf_spans.span("redpd_dataframe", sensor_labels=sensor_labels):
+        df = rpd_df.redpd_dataframe(rdvx_data, sensor_labels)
+
+    if is_cache_dataframe:
+        save_df_cache(df, cache_file, fingerprint)
+    return df
+
+
+def dw_main(load_method: DataLoadMethod,
+            columns: Optional[List[str]] = None,
+            sensor_labels: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load the Skyfall DataFrame once per process. A projected load (columns or sensor_labels) returns a slice of the
+    full DataFrame if it is already loaded; otherwise it reads only those parquet columns, or converts only those
+    sensors of the DataWindow, and is not kept for later calls
+
+    :param load_method: DataLoadMethod of the data
+    :param columns: optional list of columns to return. Default None returns all columns of sensor_labels
+    :param sensor_labels: optional list of sensors to load. Default None uses the sensors of columns, or all
+        sensors in skyfall_config.sensor_labels
+    :return: skyfall dataframe; exits if dataframe can't be found
+    """
+    global LOADED_DF
+
+    if sensor_labels is None:
+        sensor_labels = list(skyfall_config.sensor_labels) if columns is None else \
+            [label for label in skyfall_config.sensor_labels
+             if any(column_sensor_label(column, skyfall_config.sensor_labels) == label for column in columns)]
+    is_projected = columns is not None or set(sensor_labels) != set(skyfall_config.sensor_labels)
+
+    if LOADED_DF is not None:
+        return df_projection(LOADED_DF, columns, sensor_labels) if is_projected else LOADED_DF
+
+    # Load data options
+    if load_method == DataLoadMethod.DATAWINDOW or load_method == DataLoadMethod.PICKLE:
+        if is_projected:
+            return df_projection(dw_dataframe(load_method, sensor_labels), columns, sensor_labels)
+        LOADED_DF = dw_dataframe(load_method, sensor_labels)
+
+    elif load_method == DataLoadMethod.PARQUET:  # Option C: Open dataframe from parquet file
+        print("Loading existing RedPandas Parquet...", end=" ")
+        input_parquet = os.path.join(skyfall_config.output_dir, skyfall_config.pd_pqt_file)
+        if is_projected:
+            # Only the selected columns, and the shapes of flattened ones, are read from disk
+            pqt_columns = sf_pqt.read_parquet_columns(input_parquet)
+            df_columns = columns if columns is not None else \
+                [column for column in pqt_columns if not column.endswith("_ndim") and
+                 column_sensor_label(column, skyfall_config.sensor_labels) in sensor_labels + [None]]
+            with sf_spans.span("parquet_read", columns=len(df_columns)):
+                df = sf_pqt.read_parquet(input_parquet,
+                                         columns=df_columns + [column + "_ndim" for column in df_columns
+                                                               if column + "_ndim" in pqt_columns])
+            print("Done.")
+            return df[df_columns]
+        # Waveforms come back in their original shape, as views of the parquet buffers
+        with sf_spans.span("parquet_read"):
+            LOADED_DF = sf_pqt.read_parquet(input_parquet)
+        print(f"Done. RedVox SDK version: {LOADED_DF['redvox_sdk_version'][0]}")
+
+    else:
+        print('\nNo data loading method selected.  Data is required to run program; will now exit.')
+        exit(1)
 
     return LOADED_DF
+
+
+def dw_index_stem(load_method: DataLoadMethod) -> str:
+    """
+    Start of the directory names of the per-sensor products: the exported parquet for PARQUET, the cache otherwise
+
+    :param load_method: DataLoadMethod of the data
+    :return: full path without extension
+    """
+    if load_method == DataLoadMethod.PARQUET:
+        return os.path.splitext(os.path.join(skyfall_config.output_dir, skyfall_config.pd_pqt_file))[0]
+    return os.path.join(CACHE_DIR, f"{skyfall_config.event_name}_{dw_cache_key(skyfall_config, load_method)}")
+
+
+def dw_time_index_file(load_method: DataLoadMethod, sensor_label: str) -> str:
+    """
+    Time-indexed parquet of a sensor: next to the exported parquet for PARQUET, in the cache directory otherwise
+
+    :param load_method: DataLoadMethod of the data
+    :param sensor_label: sensor name, e.g. 'audio'
+    :return: full path of the parquet file
+    """
+    return os.path.join(dw_index_stem(load_method) + "_time_index", f"{sensor_label}.parquet")
+
+
+def dw_pyramid_file(load_method: DataLoadMethod, sensor_label: str) -> str:
+    """
+    Waveform pyramid of a sensor, next to its time-indexed parquet
+
+    :param load_method: DataLoadMethod of the data
+    :param sensor_label: sensor name, e.g. 'audio'
+    :return: full path of the parquet file
+    """
+    return os.path.join(dw_index_stem(load_method) + "_pyramid", f"{sensor_label}.parquet")
+
+
+def dw_time_fingerprint(load_method: DataLoadMethod) -> str:
+    """
+    :param load_method: DataLoadMethod of the data
+    :return: fingerprint of the files the time index is built from
+    """
+    if load_method == DataLoadMethod.PARQUET:
+        return dw_input_fingerprint([os.path.join(skyfall_config.output_dir, skyfall_config.pd_pqt_file)])
+    return dw_input_fingerprint(dw_input_files(skyfall_config, load_method))
+
+
+def dw_time_window(load_method: DataLoadMethod,
+                   sensor_label: str,
+                   start_epoch_s: float,
+                   end_epoch_s: float,
+                   station_ids: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load the samples of one sensor in [start_epoch_s, end_epoch_s]. Reads only the parts of the sensor's time-indexed
+    parquet that overlap the window; the index is built from dw_main the first time, and again if the data changes
+
+    :param load_method: DataLoadMethod of the data
+    :param sensor_label: sensor name, e.g. 'audio'
+    :param start_epoch_s: window start in epoch s
+    :param end_epoch_s: window end in epoch s
+    :param station_ids: optional list of stations. Default None loads all stations
+    :return: DataFrame with station_id, {sensor_label}_epoch_s and the sensor's waveform columns
+    """
+    time_index_file = dw_time_index_file(load_method, sensor_label)
+    fingerprint = dw_time_fingerprint(load_method)
+    if sf_time.time_index_fingerprint(time_index_file) != fingerprint:
+        print(f"Building time index of {sensor_label} data: {time_index_file}")
+        sf_time.export_time_index(dw_main(load_method, sensor_labels=[sensor_label]), sensor_label,
+                                  time_index_file, fingerprint)
+    return sf_time.read_time_window(time_index_file, start_epoch_s, end_epoch_s, station_ids)
+
+
+def dw_pyramid_window(load_method: DataLoadMethod,
+                      sensor_label: str,
+                      start_epoch_s: float,
+                      end_epoch_s: float,
+                      number_points: int,
+                      station_ids: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load one sensor in [start_epoch_s, end_epoch_s] at the coarsest resolution with at least number_points points,
+    e.g. the pixel width of a zoomed plot. Reads one level of the sensor's waveform pyramid, or the samples from the
+    time index when the span is too short for any level; both are built from dw_main the first time, and again if
+    the data changes
+
+    :param load_method: DataLoadMethod of the data
+    :param sensor_label: sensor name, e.g. 'audio'
+    :param start_epoch_s: span start in epoch s
+    :param end_epoch_s: span end in epoch s
+    :param number_points: requested number of points in the span
+    :param station_ids: optional list of stations. Default None loads all stations
+    :return: DataFrame with one row per station: station_id, level (0 for samples), start_epoch_s and end_epoch_s of
+        the bins, and <column>_min, <column>_max, <column>_mean of each waveform column. Plot with sf_pyr.envelope_wf
+    """
+    pyramid_file = dw_pyramid_file(load_method, sensor_label)
+    fingerprint = dw_time_fingerprint(load_method)
+    if sf_time.time_index_fingerprint(pyramid_file) != fingerprint:
+        print(f"Building waveform pyramid of {sensor_label} data: {pyramid_file}")
+        sf_pyr.export_pyramid(dw_main(load_method, sensor_labels=[sensor_label]), sensor_label,
+                              pyramid_file, fingerprint)
+    df_pyramid, station_levels = sf_pyr.read_pyramid_window(pyramid_file, start_epoch_s, end_epoch_s, number_points,
+                                                            station_ids)
+
+    sample_station_ids = [station_id for station_id, level in station_levels.items() if level == 0]
+    if not sample_station_ids:
+        return df_pyramid
+    # Bins of one sample: min, max and mean are the sample itself
+    df_samples = dw_time_window(load_method, sensor_label, start_epoch_s, end_epoch_s, sample_station_ids)
+    epoch_label = f"{sensor_label}_epoch_s"
+    df_samples_pyramid = pd.DataFrame({"station_id": df_samples["station_id"], "level": 0,
+                                       "start_epoch_s": df_samples[epoch_label],
+                                       "end_epoch_s": df_samples[epoch_label]})
+    for column in df_samples.columns.drop(["station_id", epoch_label]):
+        for stat in sf_pyr.PYRAMID_STATS:
+            df_samples_pyramid[f"{column}_{stat}"] = df_samples[column]
+    return pd.concat([df_pyramid, df_samples_pyramid], ignore_index=True)
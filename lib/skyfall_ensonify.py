@@ -1,10 +1,12 @@
 # RedVox RedPandas and related RedVox modules
-import redpandas.redpd_ensonify as rpd_sound
 import redpandas.redpd_plot.wiggles as rpd_plot
 
 # Configuration files
 import lib.skyfall_dw as sf_dw
-from skyfall_config_file import skyfall_config
+import lib.skyfall_figures as sf_figs
+import lib.skyfall_stations as sf_stations
+import lib.skyfall_wav as sf_wav
+from skyfall_config_file import skyfall_config, wav_workers, wav_block_samples
 
 
 def main():
@@ -60,27 +62,36 @@ def main():
                             'GyrX', 'GyrY', 'GyrZ',
                             'MagX', 'MagY', 'MagZ']
 
-    rpd_sound.ensonify_sensors_pandas(df=df_skyfall_data,
-                                      sig_id_label='station_id',
-                                      sig_sample_rate_label_list=sensor_fs_label_list,
-                                      sensor_column_label_list=sensor_column_label_list,
-                                      wav_sample_rate_hz=192000.,
-                                      output_wav_directory=skyfall_config.input_dir,
-                                      output_wav_filename='skyfall',
-                                      sensor_name_list=sensor_name_key_list)
+    # Same files as rpd_sound.ensonify_sensors_pandas, written in blocks, one channel per worker
+    sf_wav.ensonify_sensors_pandas(df=df_skyfall_data,
+                                   sig_id_label='station_id',
+                                   sig_sample_rate_label_list=sensor_fs_label_list,
+                                   sensor_column_label_list=sensor_column_label_list,
+                                   wav_sample_rate_hz=192000.,
+                                   output_wav_directory=skyfall_config.input_dir,
+                                   output_wav_filename='skyfall',
+                                   sensor_name_list=sensor_name_key_list,
+                                   workers=wav_workers,
+                                   block_samples=wav_block_samples)
 
     # Plot sensor wiggles, need epoch time
     sensor_epoch_column_label_list = [audio_epoch_s_label, barometer_epoch_s_label,
                                       accelerometer_epoch_s_label, gyroscope_epoch_s_label,
                                       magnetometer_epoch_s_label]
 
-    rpd_plot.plot_wiggles_pandas(df=df_skyfall_data,
-                                 station_id_str='1637610021',
-                                 sig_wf_label=sensor_column_label_list,
-                                 sig_timestamps_label=sensor_epoch_column_label_list,
-                                 sig_id_label='station_id',
-                                 fig_title_show=True,
-                                 fig_title='sensor waveforms')
+    # Stations in skyfall_config.station_ids, every station if there are none
+    for station in sf_stations.station_rows(df_skyfall_data, skyfall_config.station_ids):
+        station_id_str = df_skyfall_data['station_id'][station]
+        sf_figs.plot_figure(f"ensonify_{station_id_str}_wiggles", rpd_plot.plot_wiggles_pandas,
+                            df=df_skyfall_data,
+                            station_id_str=station_id_str,
+                            sig_wf_label=sensor_column_label_list,
+                            sig_timestamps_label=sensor_epoch_column_label_list,
+                            sig_id_label='station_id',
+                            fig_title_show=True,
+                            fig_title='sensor waveforms')
+
+    sf_figs.show_figures("ensonify")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,164 @@
+"""
+East-North-Up projection of location tracks about a fixed reference, e.g. the Skyfall landing point
+The reference position and rotation are computed once per reference, and any number of tracks are projected in one
+NumPy pass. Results are dictionaries of row views into one array, indexed like the DataFrames of
+redpd_geospatial.compute_t_xyz_uvw and compute_t_r_z_speed
+"""
+
+# Python libraries
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, Tuple
+import numpy as np
+
+# RedVox RedPandas and related RedVox modules
+from redpandas.redpd_scales import EPSILON
+
+# WGS-84 ellipsoid, as in pymap3d
+WGS84_SEMIMAJOR_AXIS_M = 6378137.
+WGS84_FLATTENING = 1. / 298.257223563
+WGS84_ECCENTRICITY_SQUARED = WGS84_FLATTENING * (2. - WGS84_FLATTENING)
+
+# Rows of the t_xyz_uvw result
+T_XYZ_UVW_LABELS = ("T_s", "X_m", "Y_m", "Z_m", "U_mps", "V_mps", "W_mps", "Speed_mps")
+
+
+def geodetic_to_ecef(lat_deg: Any, lon_deg: Any, alt_m: Any) -> np.ndarray:
+    """
+    Earth-centered, Earth-fixed coordinates of geodetic positions on the WGS-84 ellipsoid
+
+    :param lat_deg: geodetic latitude in degrees
+    :param lon_deg: longitude in degrees
+    :param alt_m: altitude above the ellipsoid in m
+    :return: (3, N) array of ECEF x, y, z in m
+    """
+    lat_rad = np.radians(np.asarray(lat_deg, dtype=np.float64))
+    lon_rad = np.radians(np.asarray(lon_deg, dtype=np.float64))
+    alt_m = np.asarray(alt_m, dtype=np.float64)
+    sin_lat = np.sin(lat_rad)
+    cos_lat = np.cos(lat_rad)
+    prime_vertical_m = WGS84_SEMIMAJOR_AXIS_M / np.sqrt(1. - WGS84_ECCENTRICITY_SQUARED * sin_lat**2)
+    return np.stack([(prime_vertical_m + alt_m) * cos_lat * np.cos(lon_rad),
+                     (prime_vertical_m + alt_m) * cos_lat * np.sin(lon_rad),
+                     (prime_vertical_m * (1. - WGS84_ECCENTRICITY_SQUARED) + alt_m) * sin_lat])
+
+
+class EnuProjector:
+    """
+    ENU projection about one reference position and time
+
+    ref_ecef_m: (3, 1) ECEF position of the reference in m
+    rotation: (3, 3) rotation from ECEF offsets to east, north, up
+    ref_unix_s: reference time in epoch s
+    dtype: dtype of the results. Positions are always computed in float64, since float32 cannot resolve meters at
+        the Earth's radius; float32 only halves the memory of the results
+    """
+    def __init__(self,
+                 ref_lat_deg: float,
+                 ref_lon_deg: float,
+                 ref_alt_m: float,
+                 ref_unix_s: float = 0.,
+                 dtype: Any = np.float64):
+        """
+        :param ref_lat_deg: reference geodetic latitude in degrees
+        :param ref_lon_deg: reference longitude in degrees
+        :param ref_alt_m: reference altitude above the ellipsoid in m
+        :param ref_unix_s: reference time in epoch s. Default 0
+        :param dtype: np.float64 or np.float32. Default np.float64
+        """
+        self.ref_ecef_m = geodetic_to_ecef(ref_lat_deg, ref_lon_deg, ref_alt_m).reshape(3, 1)
+        ref_lat_rad = np.radians(ref_lat_deg)
+        ref_lon_rad = np.radians(ref_lon_deg)
+        self.rotation = np.array([
+            [-np.sin(ref_lon_rad), np.cos(ref_lon_rad), 0.],
+            [-np.sin(ref_lat_rad) * np.cos(ref_lon_rad), -np.sin(ref_lat_rad) * np.sin(ref_lon_rad),
+             np.cos(ref_lat_rad)],
+            [np.cos(ref_lat_rad) * np.cos(ref_lon_rad), np.cos(ref_lat_rad) * np.sin(ref_lon_rad),
+             np.sin(ref_lat_rad)]])
+        self.ref_unix_s = ref_unix_s
+        self.dtype = np.dtype(dtype)
+
+    def enu(self, lat_deg: Any, lon_deg: Any, alt_m: Any) -> np.ndarray:
+        """
+        :param lat_deg: geodetic latitude in degrees
+        :param lon_deg: longitude in degrees
+        :param alt_m: altitude above the ellipsoid in m
+        :return: (3, N) array of east, north, up in m
+        """
+        return (self.rotation @ (geodetic_to_ecef(lat_deg, lon_deg, alt_m) - self.ref_ecef_m)).astype(self.dtype)
+
+    def t_xyz_uvw_tracks(self, tracks: Sequence[Tuple[Any, Any, Any, Any]]) -> List[Dict[str, np.ndarray]]:
+        """
+        Time and ENU position relative to the reference, and velocity and speed, of several tracks at once
+
+        :param tracks: (unix_s, lat_deg, lon_deg, alt_m) of each track
+        :return: one dictionary per track with keys {'T_s', 'X_m', 'Y_m', 'Z_m', 'U_mps', 'V_mps', 'W_mps',
+            'Speed_mps'}; the values are row views into one (8, N) array per track
+        """
+        track_lengths = [len(track[0]) for track in tracks]
+        track_ends = np.cumsum(track_lengths)
+        # One pass over the concatenated tracks
+        xyz_m = self.enu(*(np.concatenate([np.asarray(track[axis], dtype=np.float64) for track in tracks])
+                           for axis in (1, 2, 3)))
+
+        results = []
+        for track, track_end, track_length in zip(tracks, track_ends, track_lengths):
+            t_xyz_uvw = np.empty((len(T_XYZ_UVW_LABELS), track_length), dtype=self.dtype)
+            t_xyz_uvw[0] = np.asarray(track[0], dtype=np.float64) - self.ref_unix_s
+            t_xyz_uvw[1:4] = xyz_m[:, track_end - track_length:track_end]
+            if track_length > 1:
+                # Speed in mps. Compute diff, add EPSILON to avoid divide by zero on repeat values
+                t_xyz_uvw[4:7] = np.gradient(t_xyz_uvw[1:4], axis=1) / (np.gradient(t_xyz_uvw[0]) + EPSILON)
+            else:
+                t_xyz_uvw[4:7] = 0.
+            t_xyz_uvw[7] = np.sqrt(np.sum(np.square(t_xyz_uvw[4:7], dtype=np.float64), axis=0))
+            results.append(dict(zip(T_XYZ_UVW_LABELS, t_xyz_uvw)))
+        return results
+
+    def t_xyz_uvw(self, unix_s: Any, lat_deg: Any, lon_deg: Any, alt_m: Any) -> Dict[str, np.ndarray]:
+        """
+        Time and ENU position relative to the reference, and velocity and speed, as in
+        redpd_geospatial.compute_t_xyz_uvw
+
+        :param unix_s: timestamps in epoch s
+        :param lat_deg: geodetic latitude in degrees
+        :param lon_deg: longitude in degrees
+        :param alt_m: altitude above the ellipsoid in m
+        :return: dictionary with keys {'T_s', 'X_m', 'Y_m', 'Z_m', 'U_mps', 'V_mps', 'W_mps', 'Speed_mps'}
+        """
+        return self.t_xyz_uvw_tracks([(unix_s, lat_deg, lon_deg, alt_m)])[0]
+
+    def t_r_z_speed(self, unix_s: Any, lat_deg: Any, lon_deg: Any, alt_m: Any) -> Dict[str, np.ndarray]:
+        """
+        Elapsed time, horizontal range and height relative to the reference, and speed, as in
+        redpd_geospatial.compute_t_r_z_speed
+
+        :param unix_s: timestamps in epoch s
+        :param lat_deg: geodetic latitude in degrees
+        :param lon_deg: longitude in degrees
+        :param alt_m: altitude above the ellipsoid in m
+        :return: dictionary with keys {'Elapsed_s', 'Range_m', 'Z_m', 'LatLon_speed_mps'}
+        """
+        t_xyz_uvw = self.t_xyz_uvw(unix_s, lat_deg, lon_deg, alt_m)
+        return {"Elapsed_s": t_xyz_uvw["T_s"],
+                "Range_m": np.hypot(t_xyz_uvw["X_m"], t_xyz_uvw["Y_m"]),
+                "Z_m": t_xyz_uvw["Z_m"],
+                "LatLon_speed_mps": t_xyz_uvw["Speed_mps"]}
+
+
+@lru_cache(maxsize=None)
+def enu_projector(ref_lat_deg: float,
+                  ref_lon_deg: float,
+                  ref_alt_m: float,
+                  ref_unix_s: float = 0.,
+                  dtype: str = "float64") -> EnuProjector:
+    """
+    Projector for a reference, made once per process and shared by the stages that use the same reference
+
+    :param ref_lat_deg: reference geodetic latitude in degrees
+    :param ref_lon_deg: reference longitude in degrees
+    :param ref_alt_m: reference altitude above the ellipsoid in m
+    :param ref_unix_s: reference time in epoch s. Default 0
+    :param dtype: "float64" or "float32". Default "float64"
+    :return: EnuProjector
+    """
+    return EnuProjector(ref_lat_deg, ref_lon_deg, ref_alt_m, ref_unix_s, dtype)
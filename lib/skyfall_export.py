@@ -2,7 +2,10 @@
 Exporting RedPandas example: Skyfall
 """
 import lib.skyfall_dw as sdw
-import redpandas.redpd_df as rpd_df
+import lib.skyfall_parquet as sf_pqt
+import lib.skyfall_time_index as sf_time
+import lib.skyfall_pyramid as sf_pyr
+from redpandas.redpd_config import DataLoadMethod
 from skyfall_config_file import skyfall_config
 
 
@@ -10,9 +13,20 @@ def main():
     # load dataframe
     df_skyfall = sdw.dw_main(skyfall_config.tdr_load_method)
     # export dataframe to parquet
-    path_export = rpd_df.export_df_to_parquet(df=df_skyfall,
+    path_export = sf_pqt.export_df_to_parquet(df=df_skyfall,
                                               output_dir_pqt=skyfall_config.output_dir,
                                               output_filename_pqt=skyfall_config.pd_pqt_file)
+    # time index and waveform pyramid of each sensor for sub-window reads with dw_time_window and dw_pyramid_window
+    for sensor_label in skyfall_config.sensor_labels:
+        if f"{sensor_label}_epoch_s" in df_skyfall.columns:
+            sf_time.export_time_index(df=df_skyfall,
+                                      sensor_label=sensor_label,
+                                      output_file=sdw.dw_time_index_file(DataLoadMethod.PARQUET, sensor_label),
+                                      fingerprint=sdw.dw_time_fingerprint(DataLoadMethod.PARQUET))
+            sf_pyr.export_pyramid(df=df_skyfall,
+                                  sensor_label=sensor_label,
+                                  output_file=sdw.dw_pyramid_file(DataLoadMethod.PARQUET, sensor_label),
+                                  fingerprint=sdw.dw_time_fingerprint(DataLoadMethod.PARQUET))
 
 
 if __name__ == "__main__":
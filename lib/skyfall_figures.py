@@ -0,0 +1,274 @@
+"""
+Headless figure rendering for the Skyfall examples
+With is_headless_figures, plots are queued instead of drawn and show_figures renders them with the Agg backend on a
+pool of worker processes, writing image files to FIGURES_DIR. A figure is skipped when its inputs and style hash
+match the previous run and its files exist. Without is_headless_figures, plots are drawn and shown as usual
+"""
+
+# Python libraries
+import os
+import json
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+import numpy as np
+import pandas as pd
+import matplotlib
+
+# Skyfall examples
+import lib.skyfall_spans as sf_spans
+import lib.skyfall_decimate as sf_dec
+
+# Configuration file
+from skyfall_config_file import is_headless_figures, is_decimate_waveforms, \
+    figure_workers, figure_formats, figure_dpi, FIGURES_DIR
+
+if is_headless_figures:
+    # Batch hosts have no display; pick the non-interactive backend before any figure is made
+    matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+
+# Figures queued by plot_figure in headless mode, rendered by show_figures
+FIGURE_JOBS: List["FigureJob"] = []
+# Jobs rendered by the pool workers, set by the pool initializer
+_POOL_JOBS: Optional[List["FigureJob"]] = None
+
+
+class FigureJob(NamedTuple):
+    """
+    One figure to render
+
+    name: str, file name of the figure without extension; unique in FIGURES_DIR
+    plot_function: plotting function that makes the figure, e.g. pnl.plot_wf_mesh_vert; must be importable to run
+        on the process pool
+    kwargs: keyword arguments of plot_function
+    """
+    name: str
+    plot_function: Callable
+    kwargs: Dict
+
+
+def set_headless_figures() -> None:
+    """
+    Switch this process to headless mode, e.g. in a pool worker that cannot show windows: figures are drawn with
+    the Agg backend and saved to FIGURES_DIR by show_figures
+    """
+    global is_headless_figures
+    is_headless_figures = True
+    plt.switch_backend("Agg")
+
+
+def plot_figure(name: str, plot_function: Callable, **kwargs) -> Optional[Figure]:
+    """
+    Plot a figure now, or queue it for show_figures in headless mode. With is_decimate_waveforms, waveforms are
+    reduced to their min/max envelope at the figure's pixel width first
+
+    :param name: file name of the figure without extension; unique in FIGURES_DIR
+    :param plot_function: plotting function that makes the figure
+    :param kwargs: keyword arguments of plot_function
+    :return: the result of plot_function, None in headless mode
+    """
+    if is_decimate_waveforms:
+        kwargs = sf_dec.decimate_plot_kwargs(plot_function, kwargs,
+                                             sf_dec.figure_width_px(figure_dpi if is_headless_figures else None))
+    if is_headless_figures:
+        FIGURE_JOBS.append(FigureJob(name=name, plot_function=plot_function, kwargs=kwargs))
+        return None
+    return plot_function(**kwargs)
+
+
+def _update_hash(digest, value) -> None:
+    """
+    Add a plot argument to a hashlib digest: arrays by their bytes, DataFrames by column, containers by item
+    """
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        digest.update(f"ndarray {value.dtype} {value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).data)
+    elif isinstance(value, (np.ndarray, list, tuple)):
+        digest.update(f"{type(value).__name__} {len(value)}".encode())
+        for item in value:
+            _update_hash(digest, item)
+    elif isinstance(value, dict):
+        for key in sorted(value, key=str):
+            digest.update(f"key {key}".encode())
+            _update_hash(digest, value[key])
+    elif isinstance(value, pd.DataFrame):
+        _update_hash(digest, list(value.index))
+        for column in value.columns:
+            digest.update(f"column {column}".encode())
+            _update_hash(digest, value[column].to_numpy())
+    elif isinstance(value, pd.Series):
+        _update_hash(digest, list(value.index))
+        _update_hash(digest, value.to_numpy())
+    else:
+        digest.update(f"{type(value).__name__} {value!r}".encode())
+
+
+def figure_style_hash(formats: Sequence[str], dpi: float) -> str:
+    """
+    Hash of everything besides the plot arguments that changes the image files
+
+    :param formats: file formats
+    :param dpi: resolution in dots per inch
+    :return: hexadecimal hash of the matplotlib version, rcParams, formats and dpi
+    """
+    style = {"matplotlib": matplotlib.__version__,
+             "rcParams": {key: repr(value) for key, value in sorted(matplotlib.rcParams.items())},
+             "formats": list(formats),
+             "dpi": dpi}
+    return hashlib.sha256(json.dumps(style, sort_keys=True).encode()).hexdigest()
+
+
+def figure_hash(job: FigureJob, style_hash: str) -> str:
+    """
+    :param job: figure to render
+    :param style_hash: hash from figure_style_hash
+    :return: hexadecimal hash of the plot function, its arguments and the style
+    """
+    digest = hashlib.sha256(style_hash.encode())
+    digest.update(f"{job.plot_function.__module__}.{job.plot_function.__qualname__}".encode())
+    _update_hash(digest, job.kwargs)
+    return digest.hexdigest()
+
+
+def figure_manifest_file(output_dir: str, name: str) -> str:
+    """
+    :return: full path of the JSON file with the hash and image files of a figure
+    """
+    return os.path.join(output_dir, f"{name}.figure.json")
+
+
+def is_figure_current(output_dir: str, name: str, job_hash: str) -> bool:
+    """
+    :param output_dir: directory with the figures
+    :param name: file name of the figure without extension
+    :param job_hash: hash from figure_hash
+    :return: True if the figure was rendered from the same inputs and style and its files still exist
+    """
+    try:
+        with open(figure_manifest_file(output_dir, name), "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return manifest.get("hash") == job_hash and \
+        all(os.path.exists(os.path.join(output_dir, image_file)) for image_file in manifest.get("files", []))
+
+
+def save_figure(figure: Figure, output_dir: str, name: str,
+                formats: Sequence[str], dpi: float) -> List[str]:
+    """
+    Save a figure in each format and close it
+
+    :param figure: matplotlib figure
+    :param output_dir: directory for the image files
+    :param name: file name without extension
+    :param formats: file formats, e.g. ("png", "pdf")
+    :param dpi: resolution in dots per inch
+    :return: file names written, without the directory
+    """
+    image_files = [f"{name}.{image_format}" for image_format in formats]
+    for image_file in image_files:
+        figure.savefig(os.path.join(output_dir, image_file), dpi=dpi)
+    plt.close(figure)
+    return image_files
+
+
+def render_figure(job: FigureJob, output_dir: str, formats: Sequence[str], dpi: float) -> List[str]:
+    """
+    Make the figures of a job and save them; a plot function that makes several figures gets numbered files
+
+    :param job: figure to render
+    :param output_dir: directory for the image files
+    :param formats: file formats
+    :param dpi: resolution in dots per inch
+    :return: file names written, without the directory
+    """
+    with sf_spans.span("figure", figure=job.name):
+        figures_before = set(plt.get_fignums())
+        job.plot_function(**job.kwargs)
+        new_figures = [number for number in plt.get_fignums() if number not in figures_before]
+        image_files = []
+        for figure_count, number in enumerate(new_figures):
+            image_files += save_figure(plt.figure(number), output_dir,
+                                       job.name if len(new_figures) == 1 else f"{job.name}_{figure_count}",
+                                       formats, dpi)
+    return image_files
+
+
+def _init_figure_worker(jobs: List[FigureJob]) -> None:
+    """
+    Keep the jobs in the worker and draw with the non-interactive backend
+    """
+    global _POOL_JOBS
+    _POOL_JOBS = jobs
+    plt.switch_backend("Agg")
+
+
+def _render_pool_job(job_number: int, output_dir: str, formats: Sequence[str], dpi: float) -> List[str]:
+    """
+    Render one of the jobs kept by _init_figure_worker
+    """
+    return render_figure(_POOL_JOBS[job_number], output_dir, formats, dpi)
+
+
+def render_figures(jobs: List[FigureJob],
+                   output_dir: str,
+                   formats: Sequence[str] = ("png",),
+                   dpi: float = 150.,
+                   workers: int = 1) -> List[str]:
+    """
+    Render figures to image files, skipping those whose inputs and style have not changed since the last run
+
+    :param jobs: figures to render
+    :param output_dir: directory for the image files
+    :param formats: file formats. Default ("png",)
+    :param dpi: resolution in dots per inch. Default 150
+    :param workers: number of worker processes; 1 renders the figures in this process. Default 1
+    :return: names of the figures rendered
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    style_hash = figure_style_hash(formats, dpi)
+    job_hashes = [figure_hash(job, style_hash) for job in jobs]
+    stale_jobs = [job_number for job_number, job in enumerate(jobs)
+                  if not is_figure_current(output_dir, job.name, job_hashes[job_number])]
+    if len(stale_jobs) < len(jobs):
+        print(f"{len(jobs) - len(stale_jobs)} unchanged figures skipped")
+
+    if workers == 1 or len(stale_jobs) < 2:
+        job_files = [render_figure(jobs[job_number], output_dir, formats, dpi) for job_number in stale_jobs]
+    else:
+        render_job = partial(_render_pool_job, output_dir=output_dir, formats=formats, dpi=dpi)
+        context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+        with ProcessPoolExecutor(max_workers=min(workers, len(stale_jobs)), mp_context=context,
+                                 initializer=_init_figure_worker, initargs=(jobs,)) as executor:
+            job_files = list(sf_spans.map_with_spans(executor, render_job, stale_jobs))
+
+    # The manifest is written last, so an interrupted run renders the figure again
+    for job_number, image_files in zip(stale_jobs, job_files):
+        with open(figure_manifest_file(output_dir, jobs[job_number].name), "w") as f:
+            json.dump({"hash": job_hashes[job_number], "files": image_files}, f)
+    return [jobs[job_number].name for job_number in stale_jobs]
+
+
+def show_figures(stage_name: str) -> None:
+    """
+    End of a stage: show the figures, or in headless mode render the queued figures to FIGURES_DIR. Figures drawn
+    directly with pyplot are saved as <stage_name>_figure_<number>
+
+    :param stage_name: name of the stage, used for the figures drawn directly with pyplot
+    """
+    if not is_headless_figures:
+        sf_spans.draw_figures()
+        plt.show()
+        return
+
+    jobs = list(FIGURE_JOBS)
+    FIGURE_JOBS.clear()
+    with sf_spans.span("figures", stage=stage_name, figures=len(jobs)):
+        render_figures(jobs, FIGURES_DIR, formats=figure_formats, dpi=figure_dpi, workers=figure_workers)
+        for number in plt.get_fignums():
+            save_figure(plt.figure(number), FIGURES_DIR, f"{stage_name}_figure_{number}", figure_formats, figure_dpi)
+    print(f"Saved {stage_name} figures to {FIGURES_DIR}")
@@ -0,0 +1,349 @@
+"""
+Persistent index of the api900/api1000 packet files under SKYFALL_DIR
+One SQLite row per file holds the station id, file name time, sensor set, packet start and end time, path and size.
+Updates stat only the data directories of the event window, list only those whose modification time changed since
+the last update and decode only the files that are new or changed, so planning the files of a station and time
+window is one indexed query instead of a crawl
+"""
+
+# Python libraries
+import os
+import sqlite3
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import pandas as pd
+
+# RedVox RedPandas and related RedVox modules
+import redvox.common.date_time_utils as dt
+from redvox.common.io import ApiVersion, Index, IndexEntry
+from redvox.common.versioning import check_version_buf
+from redpandas.redpd_config import RedpdConfig
+
+# Skyfall examples
+import lib.skyfall_spans as sf_spans
+import lib.skyfall_prefetch as sf_pf
+from lib.skyfall_catalog import CATALOG_SENSORS
+
+# Extensions of the packet files
+FILE_INDEX_EXTENSIONS = (".rdvxm", ".rdvxz")
+# Depth of the data directories below api900 (yyyy/mm/dd) and api1000 (yyyy/mm/dd/hh)
+STRUCTURED_DATA_DEPTHS = {"api900": 3, "api1000": 4}
+# Files decoded per worker call
+FILE_INDEX_CHUNK_FILES = 256
+# Sensor labels of the RedvoxPacketM.Sensors fields; other sensors keep their field name
+FILE_INDEX_SENSOR_LABELS = {sensor_field: sensor_label for sensor_label, sensor_field in CATALOG_SENSORS.items()}
+FILE_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS packets (
+    path TEXT PRIMARY KEY,
+    directory TEXT NOT NULL,
+    station_id TEXT NOT NULL,
+    api TEXT NOT NULL,
+    extension TEXT NOT NULL,
+    file_epoch_us INTEGER NOT NULL,
+    start_epoch_us INTEGER,
+    end_epoch_us INTEGER,
+    sensors TEXT,
+    size_bytes INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS packets_station_time ON packets (station_id, start_epoch_us);
+CREATE INDEX IF NOT EXISTS packets_time ON packets (start_epoch_us);
+CREATE INDEX IF NOT EXISTS packets_station_file_time ON packets (station_id, file_epoch_us);
+CREATE INDEX IF NOT EXISTS packets_directory ON packets (directory);
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+# Columns of the packets table, in order
+FILE_INDEX_COLUMNS = ["path", "directory", "station_id", "api", "extension", "file_epoch_us", "start_epoch_us",
+                      "end_epoch_us", "sensors", "size_bytes", "mtime_ns"]
+
+
+def connect_file_index(index_file: str) -> sqlite3.Connection:
+    """
+    Open the index, creating it if needed
+
+    :param index_file: full path of the SQLite file
+    :return: sqlite3 Connection
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(index_file)), exist_ok=True)
+    connection = sqlite3.connect(index_file)
+    connection.executescript(FILE_INDEX_SCHEMA)
+    return connection
+
+
+def directory_span_s(time_parts: List[int]) -> Tuple[float, float]:
+    """
+    Time span of a directory of the structured layout, e.g. [2020, 10, 27, 13] for api1000/2020/10/27/13
+
+    :param time_parts: year, then optionally month, day and hour, from the directory names
+    :return: start and end in epoch s, end excluded; raises ValueError if the names are not a valid date
+    """
+    start = datetime(*time_parts, *[1, 1, 0][len(time_parts) - 1:], tzinfo=timezone.utc)
+    if len(time_parts) == 1:
+        end = start.replace(year=start.year + 1)
+    elif len(time_parts) == 2:
+        end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    else:
+        end = start + (timedelta(days=1) if len(time_parts) == 3 else timedelta(hours=1))
+    return start.timestamp(), end.timestamp()
+
+
+def structured_directories(input_dir: str,
+                           start_epoch_s: Optional[float] = None,
+                           end_epoch_s: Optional[float] = None) -> List[Tuple[str, int]]:
+    """
+    Data directories of the structured layout, api900/yyyy/mm/dd and api1000/yyyy/mm/dd/hh, that overlap a time
+    window. Only the directories above them are listed; the data directories themselves are not opened
+
+    :param input_dir: directory with api900 and/or api1000, or one of them
+    :param start_epoch_s: optional window start in epoch s. Default None
+    :param end_epoch_s: optional window end in epoch s. Default None
+    :return: data directories with their modification time in ns
+    """
+    input_dir = os.path.abspath(input_dir)
+    if os.path.basename(input_dir) in STRUCTURED_DATA_DEPTHS:
+        api_dirs = [input_dir]
+    else:
+        api_dirs = [os.path.join(input_dir, api_dir) for api_dir in STRUCTURED_DATA_DEPTHS]
+
+    data_directories = []
+    for api_dir in api_dirs:
+        data_depth = STRUCTURED_DATA_DEPTHS[os.path.basename(api_dir)]
+        stack = [(api_dir, [])]
+        while stack:
+            directory, time_parts = stack.pop()
+            try:
+                with os.scandir(directory) as directory_entries:
+                    entries = [entry for entry in directory_entries
+                               if entry.name.isdigit() and entry.is_dir(follow_symlinks=False)]
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                entry_parts = time_parts + [int(entry.name)]
+                try:
+                    span_start_s, span_end_s = directory_span_s(entry_parts)
+                except ValueError:
+                    continue
+                if (start_epoch_s is not None and span_end_s <= start_epoch_s) or \
+                        (end_epoch_s is not None and span_start_s > end_epoch_s):
+                    continue
+                if len(entry_parts) == data_depth:
+                    data_directories.append((entry.path, entry.stat(follow_symlinks=False).st_mtime_ns))
+                else:
+                    stack.append((entry.path, entry_parts))
+    return data_directories
+
+
+def changed_directories(input_dir: str,
+                        known_mtimes: Dict[str, int],
+                        start_epoch_s: Optional[float] = None,
+                        end_epoch_s: Optional[float] = None) -> Tuple[List[Tuple[str, int]], List[str]]:
+    """
+    Data directories of the packet tree in a time window whose file list may have changed since the last update
+
+    :param input_dir: directory with api900 and/or api1000 in the structured layout
+    :param known_mtimes: {directory: modification time in ns} from the last update
+    :param start_epoch_s: optional window start in epoch s. Default None
+    :param end_epoch_s: optional window end in epoch s. Default None
+    :return: changed directories with their modification time, and all the directories found in the window
+    """
+    data_directories = structured_directories(input_dir, start_epoch_s, end_epoch_s)
+    changed = [(directory, mtime_ns) for directory, mtime_ns in data_directories
+               if known_mtimes.get(directory) != mtime_ns]
+    return changed, [directory for directory, _ in data_directories]
+
+
+def file_name_fields(path: str) -> Optional[Tuple[str, int, str]]:
+    """
+    Station id, time and extension from a RedVox file name, <station id>_<time>.<extension>
+
+    :param path: full path of the file
+    :return: station id, time in the unit of the API version (us for API 1000, ms for API 900) and extension; None
+        if the name is not a RedVox file name
+    """
+    name, extension = os.path.splitext(os.path.basename(path))
+    name_parts = name.split("_")
+    if len(name_parts) != 2 or not name_parts[0].isdigit() or not name_parts[1].isdigit():
+        return None
+    return name_parts[0], int(name_parts[1]), extension
+
+
+def read_file_rows(paths: List[Tuple[str, int, int]], prefetch_depth: int = sf_pf.PREFETCH_DEPTH) -> List[tuple]:
+    """
+    Index rows of packet files; each file is decoded for its packet times and sensors
+
+    :param paths: path, size in bytes and modification time in ns of each file
+    :param prefetch_depth: files read ahead while the current one decodes. Default sf_pf.PREFETCH_DEPTH
+    :return: rows in the order of FILE_INDEX_COLUMNS; files that are not RedVox packets are skipped
+    """
+    file_stats = {path: (size_bytes, mtime_ns) for path, size_bytes, mtime_ns in paths
+                  if file_name_fields(path) is not None}
+    rows = []
+    prefetch_stats = sf_pf.PrefetchStats()
+    with sf_spans.span("file_index_read", files=len(file_stats)) as read_span:
+        for path, data, packet in sf_pf.prefetch_packets(file_stats, prefetch_depth, prefetch_stats):
+            if packet is None:
+                continue
+            station_id, file_time, extension = file_name_fields(path)
+            api_version = check_version_buf(data)
+            size_bytes, mtime_ns = file_stats[path]
+            sensors = sorted(FILE_INDEX_SENSOR_LABELS.get(field.name, field.name)
+                             for field, _ in packet.sensors.ListFields())
+            rows.append((path, os.path.dirname(path), station_id, api_version.name, extension,
+                         file_time if api_version == ApiVersion.API_1000 else file_time * 1000,
+                         int(packet.timing_information.packet_start_mach_timestamp),
+                         int(packet.timing_information.packet_end_mach_timestamp),
+                         ",".join(sensors), size_bytes, mtime_ns))
+        read_span["args"].update(prefetch_stats.as_dict())
+    return rows
+
+
+def update_file_index(input_dir: str,
+                      index_file: str,
+                      workers: int = 1,
+                      prefetch_depth: int = sf_pf.PREFETCH_DEPTH,
+                      start_epoch_s: Optional[float] = None,
+                      end_epoch_s: Optional[float] = None) -> int:
+    """
+    Bring the index up to date with the packet tree: add new files, re-read changed ones and drop removed ones.
+    With a time window, only the data directories that overlap it are checked, so the first update decodes the
+    files of the window rather than the whole tree
+
+    :param input_dir: directory with api900 and/or api1000 in the structured layout
+    :param index_file: full path of the SQLite file
+    :param workers: number of worker processes decoding new files; 1 decodes them in this process. Default 1
+    :param prefetch_depth: files each process reads ahead while it decodes. Default sf_pf.PREFETCH_DEPTH
+    :param start_epoch_s: optional window start in epoch s. Default None updates the whole tree
+    :param end_epoch_s: optional window end in epoch s. Default None
+    :return: number of files added or re-read
+    """
+    with sf_spans.span("file_index_update"), connect_file_index(index_file) as connection:
+        known_mtimes = dict(connection.execute("SELECT path, mtime_ns FROM directories"))
+        changed, found = changed_directories(input_dir, known_mtimes, start_epoch_s, end_epoch_s)
+
+        new_files = []
+        removed_files = []
+        for directory, _ in changed:
+            known_files = dict(connection.execute("SELECT path, mtime_ns FROM packets WHERE directory = ?",
+                                                  (directory,)))
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.is_file() or not entry.name.endswith(FILE_INDEX_EXTENSIONS):
+                        continue
+                    stat = entry.stat()
+                    if known_files.pop(entry.path, None) != stat.st_mtime_ns:
+                        new_files.append((entry.path, stat.st_size, stat.st_mtime_ns))
+            removed_files.extend(known_files)
+
+        chunks = [new_files[start:start + FILE_INDEX_CHUNK_FILES]
+                  for start in range(0, len(new_files), FILE_INDEX_CHUNK_FILES)]
+        read_rows = partial(read_file_rows, prefetch_depth=prefetch_depth)
+        if workers == 1 or len(chunks) < 2:
+            chunk_rows = [read_rows(chunk) for chunk in chunks]
+        else:
+            context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() \
+                else None
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=context) as executor:
+                chunk_rows = list(sf_spans.map_with_spans(executor, read_rows, chunks))
+
+        # Directories that are gone take their files with them; those outside the window are kept
+        found = set(found)
+        removed_directories = [directory for directory in known_mtimes
+                               if directory not in found and not os.path.isdir(directory)]
+        connection.executemany("DELETE FROM packets WHERE directory = ?", ((d,) for d in removed_directories))
+        connection.executemany("DELETE FROM directories WHERE path = ?", ((d,) for d in removed_directories))
+        connection.executemany("DELETE FROM packets WHERE path = ?", ((path,) for path in removed_files))
+        connection.executemany(f"INSERT OR REPLACE INTO packets VALUES ({', '.join('?' * len(FILE_INDEX_COLUMNS))})",
+                               (row for rows in chunk_rows for row in rows))
+        connection.executemany("INSERT OR REPLACE INTO directories VALUES (?, ?)", changed)
+    connection.close()
+    return len(new_files)
+
+
+def query_file_index(index_file: str,
+                     start_epoch_s: Optional[float] = None,
+                     end_epoch_s: Optional[float] = None,
+                     station_ids: Optional[Iterable[str]] = None,
+                     sensor_label: Optional[str] = None,
+                     is_file_time: bool = False) -> pd.DataFrame:
+    """
+    Packet files of the stations that overlap a time window
+
+    :param index_file: full path of the SQLite file
+    :param start_epoch_s: optional window start in epoch s. Default None
+    :param end_epoch_s: optional window end in epoch s. Default None
+    :param station_ids: optional stations. Default None returns all stations
+    :param sensor_label: optional sensor the files must have, e.g. 'barometer'. Default None
+    :param is_file_time: if True, select the files whose file name time is in the window, as the redvox ReadFilter
+        does; if False, the files whose packet overlaps the window. Default False
+    :return: DataFrame with FILE_INDEX_COLUMNS, one row per file, by station and time
+    """
+    conditions = []
+    parameters = []
+    if start_epoch_s is not None:
+        conditions.append("file_epoch_us >= ?" if is_file_time else "end_epoch_us >= ?")
+        parameters.append(int(start_epoch_s * 1E6))
+    if end_epoch_s is not None:
+        conditions.append("file_epoch_us <= ?" if is_file_time else "start_epoch_us <= ?")
+        parameters.append(int(end_epoch_s * 1E6))
+    if station_ids is not None:
+        station_ids = list(station_ids)
+        conditions.append(f"station_id IN ({', '.join('?' * len(station_ids))})")
+        parameters.extend(station_ids)
+    if sensor_label is not None:
+        conditions.append("(',' || sensors || ',') LIKE ?")
+        parameters.append(f"%,{sensor_label},%")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with connect_file_index(index_file) as connection:
+        df_files = pd.read_sql_query(f"SELECT * FROM packets {where} ORDER BY station_id, start_epoch_us",
+                                     connection, params=parameters)
+    connection.close()
+    return df_files
+
+
+def files_to_index(df_files: pd.DataFrame) -> Index:
+    """
+    RedVox Index of the files of a query, without touching the files
+
+    :param df_files: DataFrame from query_file_index
+    :return: RedVox Index
+    """
+    return Index([IndexEntry(full_path=row.path,
+                             station_id=row.station_id,
+                             date_time=dt.datetime_from_epoch_microseconds_utc(row.file_epoch_us),
+                             extension=row.extension,
+                             api_version=ApiVersion[row.api],
+                             # Decompressed size estimate, as IndexEntry.from_path
+                             file_size_bytes=row.size_bytes * 8)
+                  for row in df_files.itertuples(index=False)])
+
+
+def config_file_index(config: RedpdConfig,
+                      index_file: str,
+                      workers: int = 1,
+                      prefetch_depth: int = sf_pf.PREFETCH_DEPTH) -> Index:
+    """
+    Update the index and plan the files of the event, with the stations, times and buffers of
+    redpd_datawin.dw_from_redpd_config
+
+    :param config: RedpdConfig
+    :param index_file: full path of the SQLite file
+    :param workers: number of worker processes decoding new files. Default 1
+    :param prefetch_depth: files each process reads ahead while it decodes. Default sf_pf.PREFETCH_DEPTH
+    :return: RedVox Index of the event files
+    """
+    start_epoch_s = config.event_start_epoch_s - timedelta(minutes=config.start_buffer_minutes).total_seconds()
+    end_epoch_s = config.event_end_epoch_s + timedelta(minutes=config.end_buffer_minutes).total_seconds()
+    update_file_index(config.input_dir, index_file, workers, prefetch_depth, start_epoch_s, end_epoch_s)
+    with sf_spans.span("file_index_query"):
+        df_files = query_file_index(index_file,
+                                    start_epoch_s=start_epoch_s,
+                                    end_epoch_s=end_epoch_s,
+                                    station_ids=config.station_ids or None,
+                                    is_file_time=True)
+        return files_to_index(df_files)
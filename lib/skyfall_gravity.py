@@ -1,17 +1,36 @@
 # todo: address possible invalid values in building plots section
 # Python libraries
-import matplotlib.pyplot as plt
-import numpy as np
+import pandas as pd
 from libquantum.plot_templates import plot_time_frequency_reps as pnl
 
 # RedVox RedPandas and related RedVox modules
 import lib.skyfall_dw as sf_dw
-import redpandas.redpd_gravity as rpd_grav
-import redpandas.redpd_preprocess as rpd_prep
+import lib.skyfall_gravity_filter as sf_grav
+import lib.skyfall_stations as sf_stations
+import lib.skyfall_figures as sf_figs
 
 # Configuration files
-from skyfall_config_file import skyfall_config
-from redpandas.redpd_config import DataLoadMethod
+from skyfall_config_file import skyfall_config, station_workers
+
+
+def gravity_panda(df: pd.DataFrame,
+                  accelerometer_data_raw_label: str = "accelerometer_wf_raw",
+                  accelerometer_fs_label: str = "accelerometer_sample_rate_hz") -> pd.DataFrame:
+    """
+    Gravity and linear acceleration of the stations in df, filtered in one pass. Station analysis for
+    skyfall_stations.run_stations
+
+    :param df: input pandas DataFrame
+    :param accelerometer_data_raw_label: column with the raw accelerometer waveforms
+    :param accelerometer_fs_label: column with the accelerometer sample rate in Hz
+    :return: DataFrame with accelerometer_gravity and accelerometer_linear columns, same index as df
+    """
+    gravity_3c, linear_3c = sf_grav.gravity_and_linear_acceleration_panda(
+        df=df,
+        accelerometer_wf_label=accelerometer_data_raw_label,
+        accelerometer_sample_rate_label=accelerometer_fs_label,
+        low_pass_sample_rate_hz=2)
+    return pd.DataFrame({"accelerometer_gravity": gravity_3c, "accelerometer_linear": linear_3c}, index=df.index)
 
 
 def main():
@@ -36,6 +55,12 @@ def main():
     # Load data options
     df_skyfall_data = sf_dw.dw_main(skyfall_config.tdr_load_method)
 
+    # Get gravity and linear acceleration of every station, sharded across station_workers processes
+    if accelerometer_data_raw_label and accelerometer_fs_label in df_skyfall_data.columns:
+        df_gravity = sf_stations.run_stations(df=df_skyfall_data,
+                                              shard_analysis=gravity_panda,
+                                              workers=station_workers)
+
     # Start of building plots
     print("\nInitiating time-domain representation of Skyfall:")
     for station in df_skyfall_data.index:
@@ -51,91 +76,69 @@ def main():
         # Repeat here
         if accelerometer_data_raw_label and accelerometer_fs_label and accelerometer_data_highpass_label \
                 in df_skyfall_data.columns:
-            if skyfall_config.tdr_load_method == DataLoadMethod.PARQUET:
-                # Reshape wf columns
-                rpd_prep.df_column_unflatten(df=df_skyfall_data,
-                                             col_wf_label=accelerometer_data_raw_label,
-                                             col_ndim_label=accelerometer_data_raw_label + "_ndim")
-                rpd_prep.df_column_unflatten(df=df_skyfall_data,
-                                             col_wf_label=accelerometer_data_highpass_label,
-                                             col_ndim_label=accelerometer_data_highpass_label + "_ndim")
-
             print('accelerometer_sample_rate_hz:', df_skyfall_data[accelerometer_fs_label][station])
             print('accelerometer_epoch_s_0:', df_skyfall_data[accelerometer_epoch_s_label][station][0],
                   df_skyfall_data[accelerometer_epoch_s_label][station][-1])
 
             # Plot 3c acceleration raw waveforms
-            pnl.plot_wf_wf_wf_vert(redvox_id=station_id_str,
-                                   wf_panel_2_sig=df_skyfall_data[accelerometer_data_raw_label][station][2],
-                                   wf_panel_2_time=df_skyfall_data[accelerometer_epoch_s_label][station],
-                                   wf_panel_1_sig=df_skyfall_data[accelerometer_data_raw_label][station][1],
-                                   wf_panel_1_time=df_skyfall_data[accelerometer_epoch_s_label][station],
-                                   wf_panel_0_sig=df_skyfall_data[accelerometer_data_raw_label][station][0],
-                                   wf_panel_0_time=df_skyfall_data[accelerometer_epoch_s_label][station],
-                                   start_time_epoch=event_reference_time_epoch_s,
-                                   wf_panel_2_units="Acc Z, m/$s^2$",
-                                   wf_panel_1_units="Acc Y, m/$s^2$",
-                                   wf_panel_0_units="Acc X, m/$s^2$",
-                                   figure_title=skyfall_config.event_name + ": Accelerometer raw",
-                                   figure_title_show=False,  # for press
-                                   label_panel_show=True,  # for press
-                                   labels_fontweight='bold')
-
-            # get time and sample rate
-            accelerometer_time_s = df_skyfall_data[accelerometer_epoch_s_label][station]
-            accelerometer_sample_rate = 1 / np.mean(np.diff(accelerometer_time_s))
-
-            # get gravity and linear acceleration
-            gravity_x, linear_x = rpd_grav.get_gravity_and_linear_acceleration(
-                accelerometer=df_skyfall_data[accelerometer_data_raw_label][station][0],
-                sensor_sample_rate_hz=accelerometer_sample_rate,
-                low_pass_sample_rate_hz=2)
-
-            gravity_y, linear_y = rpd_grav.get_gravity_and_linear_acceleration(
-                accelerometer=df_skyfall_data[accelerometer_data_raw_label][station][1],
-                sensor_sample_rate_hz=accelerometer_sample_rate,
-                low_pass_sample_rate_hz=2)
-
-            gravity_z, linear_z = rpd_grav.get_gravity_and_linear_acceleration(
-                accelerometer=df_skyfall_data[accelerometer_data_raw_label][station][2],
-                sensor_sample_rate_hz=accelerometer_sample_rate,
-                low_pass_sample_rate_hz=2)
+            sf_figs.plot_figure(f"gravity_{station_id_str}_accelerometer_raw", pnl.plot_wf_wf_wf_vert,
+                                redvox_id=station_id_str,
+                                wf_panel_2_sig=df_skyfall_data[accelerometer_data_raw_label][station][2],
+                                wf_panel_2_time=df_skyfall_data[accelerometer_epoch_s_label][station],
+                                wf_panel_1_sig=df_skyfall_data[accelerometer_data_raw_label][station][1],
+                                wf_panel_1_time=df_skyfall_data[accelerometer_epoch_s_label][station],
+                                wf_panel_0_sig=df_skyfall_data[accelerometer_data_raw_label][station][0],
+                                wf_panel_0_time=df_skyfall_data[accelerometer_epoch_s_label][station],
+                                start_time_epoch=event_reference_time_epoch_s,
+                                wf_panel_2_units="Acc Z, m/$s^2$",
+                                wf_panel_1_units="Acc Y, m/$s^2$",
+                                wf_panel_0_units="Acc X, m/$s^2$",
+                                figure_title=skyfall_config.event_name + ": Accelerometer raw",
+                                figure_title_show=False,  # for press
+                                label_panel_show=True,  # for press
+                                labels_fontweight='bold')
+
+            # gravity and linear acceleration, all axes at once
+            gravity_x, gravity_y, gravity_z = df_gravity["accelerometer_gravity"][station]
+            linear_x, linear_y, linear_z = df_gravity["accelerometer_linear"][station]
 
             # Plot 3c acceleration gravity waveforms
-            pnl.plot_wf_wf_wf_vert(redvox_id=station_id_str,
-                                   wf_panel_2_sig=gravity_z,
-                                   wf_panel_2_time=df_skyfall_data[accelerometer_epoch_s_label][station],
-                                   wf_panel_1_sig=gravity_y,
-                                   wf_panel_1_time=df_skyfall_data[accelerometer_epoch_s_label][station],
-                                   wf_panel_0_sig=gravity_x,
-                                   wf_panel_0_time=df_skyfall_data[accelerometer_epoch_s_label][station],
-                                   start_time_epoch=event_reference_time_epoch_s,
-                                   wf_panel_2_units="LP Acc Z, m/$s^2$",
-                                   wf_panel_1_units="LP Acc Y, m/$s^2$",
-                                   wf_panel_0_units="LP Acc X, m/$s^2$",
-                                   figure_title=skyfall_config.event_name + ": Gravity",
-                                   figure_title_show=False,  # for press
-                                   label_panel_show=True,  # for press
-                                   labels_fontweight='bold')
+            sf_figs.plot_figure(f"gravity_{station_id_str}_gravity", pnl.plot_wf_wf_wf_vert,
+                                redvox_id=station_id_str,
+                                wf_panel_2_sig=gravity_z,
+                                wf_panel_2_time=df_skyfall_data[accelerometer_epoch_s_label][station],
+                                wf_panel_1_sig=gravity_y,
+                                wf_panel_1_time=df_skyfall_data[accelerometer_epoch_s_label][station],
+                                wf_panel_0_sig=gravity_x,
+                                wf_panel_0_time=df_skyfall_data[accelerometer_epoch_s_label][station],
+                                start_time_epoch=event_reference_time_epoch_s,
+                                wf_panel_2_units="LP Acc Z, m/$s^2$",
+                                wf_panel_1_units="LP Acc Y, m/$s^2$",
+                                wf_panel_0_units="LP Acc X, m/$s^2$",
+                                figure_title=skyfall_config.event_name + ": Gravity",
+                                figure_title_show=False,  # for press
+                                label_panel_show=True,  # for press
+                                labels_fontweight='bold')
 
             # Plot 3c acceleration linear waveforms
-            pnl.plot_wf_wf_wf_vert(redvox_id=station_id_str,
-                                   wf_panel_2_sig=linear_z,
-                                   wf_panel_2_time=df_skyfall_data[accelerometer_epoch_s_label][station],
-                                   wf_panel_1_sig=linear_y,
-                                   wf_panel_1_time=df_skyfall_data[accelerometer_epoch_s_label][station],
-                                   wf_panel_0_sig=linear_x,
-                                   wf_panel_0_time=df_skyfall_data[accelerometer_epoch_s_label][station],
-                                   start_time_epoch=event_reference_time_epoch_s,
-                                   wf_panel_2_units="Linear Acc Z, m/$s^2$",
-                                   wf_panel_1_units="Linear Acc Y, m/$s^2$",
-                                   wf_panel_0_units="Linear Acc X, m/$s^2$",
-                                   figure_title=skyfall_config.event_name + ": Linear Acceleration",
-                                   figure_title_show=False,  # for press
-                                   label_panel_show=True,  # for press
-                                   labels_fontweight='bold')
-
-        plt.show()
+            sf_figs.plot_figure(f"gravity_{station_id_str}_linear", pnl.plot_wf_wf_wf_vert,
+                                redvox_id=station_id_str,
+                                wf_panel_2_sig=linear_z,
+                                wf_panel_2_time=df_skyfall_data[accelerometer_epoch_s_label][station],
+                                wf_panel_1_sig=linear_y,
+                                wf_panel_1_time=df_skyfall_data[accelerometer_epoch_s_label][station],
+                                wf_panel_0_sig=linear_x,
+                                wf_panel_0_time=df_skyfall_data[accelerometer_epoch_s_label][station],
+                                start_time_epoch=event_reference_time_epoch_s,
+                                wf_panel_2_units="Linear Acc Z, m/$s^2$",
+                                wf_panel_1_units="Linear Acc Y, m/$s^2$",
+                                wf_panel_0_units="Linear Acc X, m/$s^2$",
+                                figure_title=skyfall_config.event_name + ": Linear Acceleration",
+                                figure_title_show=False,  # for press
+                                label_panel_show=True,  # for press
+                                labels_fontweight='bold')
+
+        sf_figs.show_figures("gravity")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,98 @@
+"""
+Vectorized gravity and linear acceleration
+Same exponential smoothing as redpd_gravity.get_gravity, written as a first order IIR filter so every axis of every
+station is filtered in a single scipy.signal.lfilter call
+"""
+
+# Python libraries
+from functools import lru_cache
+from typing import List, Tuple
+import numpy as np
+import pandas as pd
+from scipy import signal
+
+# RedVox RedPandas and related RedVox modules
+import redpandas.redpd_gravity as rpd_grav
+
+
+@lru_cache(maxsize=None)
+def gravity_filter_coefficients(sensor_sample_rate_hz: float,
+                                low_pass_sample_rate_hz: float = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    IIR coefficients of gravity[i+1] = (1 - alpha)*gravity[i] + alpha*accelerometer[i+1]; cached per sample rate
+
+    :param sensor_sample_rate_hz: sample rate of accelerometer in Hz
+    :param low_pass_sample_rate_hz: sample rate of low pass filter in Hz
+    :return: numerator and denominator coefficients for scipy.signal.lfilter
+    """
+    alpha = rpd_grav.get_smoothing_factor(sensor_sample_rate_hz=sensor_sample_rate_hz,
+                                          low_pass_sample_rate_hz=low_pass_sample_rate_hz)
+    return np.array([alpha]), np.array([1., alpha - 1.])
+
+
+def get_gravity_and_linear_acceleration(accelerometer: np.ndarray,
+                                        sensor_sample_rate_hz: float,
+                                        low_pass_sample_rate_hz: float = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Obtain gravity and linear acceleration of every axis at once. Same result as
+    redpd_gravity.get_gravity_and_linear_acceleration applied to each row
+
+    :param accelerometer: accelerometer signal waveform, 1D or (axes, samples)
+    :param sensor_sample_rate_hz: sample rate of accelerometer in Hz
+    :param low_pass_sample_rate_hz: sample rate of low pass filter in Hz
+    :return: numpy array with gravity and numpy array with linear acceleration, same shape as accelerometer
+    """
+    numerator, denominator = gravity_filter_coefficients(float(sensor_sample_rate_hz), float(low_pass_sample_rate_hz))
+    # redpd_gravity starts gravity at zero, as if the first sample were zero
+    accelerometer_filter = np.array(accelerometer, dtype=np.float64)
+    accelerometer_filter[..., 0] = 0.
+    gravity = signal.lfilter(numerator, denominator, accelerometer_filter, axis=-1)
+
+    # subtract gravity from acceleration
+    linear_acceleration = accelerometer - gravity
+
+    return gravity, linear_acceleration
+
+
+def gravity_and_linear_acceleration_panda(df: pd.DataFrame,
+                                          accelerometer_wf_label: str,
+                                          accelerometer_sample_rate_label: str,
+                                          low_pass_sample_rate_hz: float = 1) -> Tuple[List, List]:
+    """
+    Gravity and linear acceleration of all stations. Stations with the same sample rate are padded to a common
+    length and filtered together; the filter is causal, so padding at the end does not change the result
+
+    :param df: input pandas DataFrame
+    :param accelerometer_wf_label: column with (3, samples) accelerometer waveforms
+    :param accelerometer_sample_rate_label: column with the accelerometer sample rate in Hz
+    :param low_pass_sample_rate_hz: sample rate of low pass filter in Hz
+    :return: lists of gravity and linear acceleration per row of df, NaN for stations without accelerometer data
+    """
+    gravity = [float("NaN")] * len(df.index)
+    linear_acceleration = [float("NaN")] * len(df.index)
+
+    rows_by_sample_rate = {}
+    for row, n in enumerate(df.index):
+        if type(df[accelerometer_wf_label][n]) != float:
+            rows_by_sample_rate.setdefault(float(df[accelerometer_sample_rate_label][n]), []).append(row)
+
+    for sensor_sample_rate_hz, rows in rows_by_sample_rate.items():
+        accelerometers = [np.asarray(df[accelerometer_wf_label].iloc[row]) for row in rows]
+        number_samples = max(np.shape(accelerometer)[-1] for accelerometer in accelerometers)
+        accelerometer_stack = np.zeros((sum(len(accelerometer) for accelerometer in accelerometers), number_samples))
+        first_axis = 0
+        for accelerometer in accelerometers:
+            accelerometer_stack[first_axis:first_axis + len(accelerometer), :np.shape(accelerometer)[-1]] = \
+                accelerometer
+            first_axis += len(accelerometer)
+
+        gravity_stack, _ = get_gravity_and_linear_acceleration(accelerometer=accelerometer_stack,
+                                                               sensor_sample_rate_hz=sensor_sample_rate_hz,
+                                                               low_pass_sample_rate_hz=low_pass_sample_rate_hz)
+        first_axis = 0
+        for row, accelerometer in zip(rows, accelerometers):
+            gravity[row] = gravity_stack[first_axis:first_axis + len(accelerometer), :np.shape(accelerometer)[-1]]
+            linear_acceleration[row] = accelerometer - gravity[row]
+            first_axis += len(accelerometer)
+
+    return gravity, linear_acceleration
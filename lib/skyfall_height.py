@@ -0,0 +1,178 @@
+"""
+Pressure-to-height model of the Skyfall event
+The polynomial in -log(pressure/sea level pressure) of redpd_geospatial.bounder_model_height_from_pressure is fitted
+once to the bounder pressure and altitude and saved with the event. Heights are evaluated with Horner's scheme in
+place over fixed-size chunks, so the extra memory does not grow with the length of the barometer record
+"""
+
+# Python libraries
+import os
+import json
+import hashlib
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional
+import numpy as np
+import pandas as pd
+
+# RedVox RedPandas and related RedVox modules
+from redpandas.redpd_scales import PRESSURE_SEA_LEVEL_KPA
+
+# Configuration files
+from skyfall_config_file import BOUNDER_PATH, BOUNDER_PQT_FILE, PRESSURE_HEIGHT_MODEL_FILE
+
+# Samples per chunk when evaluating heights
+HEIGHT_CHUNK_SAMPLES = 1 << 16
+# Coefficients of redpd_geospatial.bounder_model_height_from_pressure, lowest order first
+REDPANDAS_HEIGHT_COEFFICIENTS = (1.52981286e+02, 7.39552295e+03, 2.44663285e+03, -3.57402081e+03, 2.02653051e+03,
+                                 -6.26581722e+02, 1.11758211e+02, -1.08674469e+01, 4.46784010e-01)
+
+
+class PressureHeightModel:
+    """
+    Height in m as a polynomial of the scaled pressure -log(pressure_kPa/pressure_ref_kPa)
+
+    coefficients: polynomial coefficients, lowest order first
+    pressure_ref_kPa: reference pressure in kPa
+    fingerprint: fingerprint of the data the model was fitted to, None for the RedPandas model
+    """
+    def __init__(self,
+                 coefficients: Iterable[float],
+                 pressure_ref_kPa: float = PRESSURE_SEA_LEVEL_KPA,
+                 fingerprint: Optional[str] = None):
+        """
+        :param coefficients: polynomial coefficients, lowest order first
+        :param pressure_ref_kPa: reference pressure in kPa. Default sea level pressure
+        :param fingerprint: optional fingerprint of the fitted data. Default None
+        """
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+        self.pressure_ref_kPa = pressure_ref_kPa
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def fit(cls,
+            pressure_kPa: np.ndarray,
+            height_m: np.ndarray,
+            degree: int = 8,
+            pressure_ref_kPa: float = PRESSURE_SEA_LEVEL_KPA,
+            fingerprint: Optional[str] = None) -> "PressureHeightModel":
+        """
+        Least-squares fit of the model
+
+        :param pressure_kPa: pressure in kPa
+        :param height_m: height in m at each pressure
+        :param degree: polynomial degree. Default 8, as the RedPandas model
+        :param pressure_ref_kPa: reference pressure in kPa. Default sea level pressure
+        :param fingerprint: optional fingerprint of the data. Default None
+        :return: fitted PressureHeightModel
+        """
+        scaled_pressure = -np.log(np.asarray(pressure_kPa, dtype=np.float64) / pressure_ref_kPa)
+        coefficients = np.polynomial.polynomial.polyfit(scaled_pressure, np.asarray(height_m, dtype=np.float64),
+                                                        degree)
+        return cls(coefficients, pressure_ref_kPa, fingerprint)
+
+    def height_m(self,
+                 pressure_kPa: np.ndarray,
+                 out: Optional[np.ndarray] = None,
+                 chunk_samples: int = HEIGHT_CHUNK_SAMPLES) -> np.ndarray:
+        """
+        Height at each pressure. Each chunk is scaled into one scratch buffer and evaluated with Horner's scheme
+        directly in the output
+
+        :param pressure_kPa: pressure in kPa, any length
+        :param out: optional float64 output array, same length as pressure_kPa. Default None allocates it
+        :param chunk_samples: samples per chunk. Default HEIGHT_CHUNK_SAMPLES
+        :return: height in m
+        """
+        pressure_kPa = np.asarray(pressure_kPa, dtype=np.float64)
+        if out is None:
+            out = np.empty(np.shape(pressure_kPa), dtype=np.float64)
+        scaled_pressure = np.empty(min(chunk_samples, pressure_kPa.size), dtype=np.float64)
+        pressure_flat = pressure_kPa.reshape(-1)
+        out_flat = out.reshape(-1)
+        for chunk_start in range(0, pressure_flat.size, chunk_samples):
+            pressure_chunk = pressure_flat[chunk_start:chunk_start + chunk_samples]
+            scaled_chunk = scaled_pressure[:pressure_chunk.size]
+            out_chunk = out_flat[chunk_start:chunk_start + chunk_samples]
+            np.divide(pressure_chunk, self.pressure_ref_kPa, out=scaled_chunk)
+            np.log(scaled_chunk, out=scaled_chunk)
+            np.negative(scaled_chunk, out=scaled_chunk)
+            out_chunk.fill(self.coefficients[-1])
+            for coefficient in self.coefficients[-2::-1]:
+                out_chunk *= scaled_chunk
+                out_chunk += coefficient
+        return out
+
+    def height_m_stream(self, pressure_chunks: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        """
+        Heights of a barometer stream, one chunk at a time, e.g. from packets as they are read
+
+        :param pressure_chunks: pressure in kPa, in chunks
+        :return: height in m of each chunk
+        """
+        for pressure_chunk in pressure_chunks:
+            yield self.height_m(pressure_chunk)
+
+    def to_dict(self) -> dict:
+        """
+        :return: JSON-serializable dictionary of the model
+        """
+        return {"coefficients": self.coefficients.tolist(),
+                "pressure_ref_kPa": self.pressure_ref_kPa,
+                "fingerprint": self.fingerprint}
+
+    @classmethod
+    def from_dict(cls, model: dict) -> "PressureHeightModel":
+        """
+        :param model: dictionary from to_dict
+        :return: PressureHeightModel
+        """
+        return cls(model["coefficients"], model["pressure_ref_kPa"], model.get("fingerprint"))
+
+
+def bounder_height_model(bounder_parquet: str, model_file: str, degree: int = 8) -> PressureHeightModel:
+    """
+    Pressure-to-height model fitted to the bounder data. The fit is saved in model_file and reused while the bounder
+    pressure and altitude do not change
+
+    :param bounder_parquet: full path of the bounder parquet from skyfall_loc_rpd.bounder_data
+    :param model_file: full path of the JSON file with the fitted model
+    :param degree: polynomial degree. Default 8
+    :return: PressureHeightModel
+    """
+    bounder_loc = pd.read_parquet(bounder_parquet, columns=['Epoch_s', 'Pres_kPa', 'Alt_m'])
+    bounder_loc = bounder_loc[~bounder_loc['Epoch_s'].duplicated(keep='first')].dropna()
+    pressure_kPa = bounder_loc['Pres_kPa'].to_numpy(dtype=np.float64)
+    height_m = bounder_loc['Alt_m'].to_numpy(dtype=np.float64)
+
+    digest = hashlib.sha256(f"degree {degree}".encode())
+    digest.update(pressure_kPa.tobytes())
+    digest.update(height_m.tobytes())
+    fingerprint = digest.hexdigest()
+    try:
+        with open(model_file, "r") as f:
+            model = PressureHeightModel.from_dict(json.load(f))
+        if model.fingerprint == fingerprint:
+            return model
+    except (OSError, ValueError, KeyError):
+        pass
+
+    model = PressureHeightModel.fit(pressure_kPa, height_m, degree, fingerprint=fingerprint)
+    with open(model_file, "w") as f:
+        json.dump(model.to_dict(), f, indent=2)
+    print('Saved pressure-to-height model:', model_file)
+    return model
+
+
+@lru_cache(maxsize=None)
+def event_height_model() -> PressureHeightModel:
+    """
+    Pressure-to-height model of the event: fitted to the bounder data if its parquet exists, the RedPandas empirical
+    model otherwise
+
+    :return: PressureHeightModel
+    """
+    bounder_parquet = os.path.join(BOUNDER_PATH, BOUNDER_PQT_FILE)
+    if not os.path.exists(bounder_parquet):
+        print('Bounder parquet not found, using the RedPandas pressure-to-height model:', bounder_parquet)
+        return PressureHeightModel(REDPANDAS_HEIGHT_COEFFICIENTS)
+    return bounder_height_model(bounder_parquet, os.path.join(BOUNDER_PATH, PRESSURE_HEIGHT_MODEL_FILE))
@@ -1,21 +1,32 @@
 import os
+import hashlib
+from typing import Optional
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import matplotlib.pyplot as plt
 import csv
 import numpy as np
 
 import redvox.common.date_time_utils as dt
 from libquantum.plot_templates import plot_geo_scatter_2d_3d as geo_scatter
-import redpandas.redpd_geospatial as rpd_geo
 
 # Import constants
 from redpandas.redpd_scales import METERS_TO_KM, SECONDS_TO_MINUTES
 
 import lib.skyfall_dw as sf_dw
-from skyfall_config_file import skyfall_config, \
+import lib.skyfall_align as sf_align
+import lib.skyfall_enu as sf_enu
+import lib.skyfall_height as sf_height
+import lib.skyfall_spans as sf_spans
+import lib.skyfall_figures as sf_figs
+import lib.skyfall_stations as sf_stations
+from skyfall_config_file import skyfall_config, is_rerun_bounder, \
     BOUNDER_PATH, BOUNDER_FILE, BOUNDER_PQT_FILE, \
     ref_latitude_deg, ref_longitude_deg, ref_altitude_m, ref_epoch_s
-skyfall_config.is_rerun_bounder = True
+
+# Parquet schema metadata key with the fingerprint of the bounder csv rows
+BOUNDER_FINGERPRINT_KEY = b"skyfall_bounder_fingerprint"
 
 
 def bounder_specs_to_csv(df, csv_export_file):
@@ -36,39 +47,98 @@ def bounder_specs_to_csv(df, csv_export_file):
         writer.writerow(['Stop Altitude m  (WGS-84)', df['Alt_m'].iloc[-1]])
 
 
-def bounder_data(path_bounder_csv: str, file_bounder_csv: str, file_bounder_parquet: str) -> None:
+def bounder_fingerprint(input_path: str, first_row: int, number_rows: int, yyyymmdd: str) -> str:
+    """
+    Fingerprint of a bounder parquet: checksum of the csv, read in blocks, and the rows and date taken from it
+
+    :param input_path: full path of the bounder csv file
+    :param first_row: first csv line read, counting from 0
+    :param number_rows: number of csv lines read
+    :param yyyymmdd: date of the first row, e.g. "2020-10-27"
+    :return: hexadecimal fingerprint
+    """
+    digest = hashlib.sha256(f"{first_row} {number_rows} {yyyymmdd}".encode())
+    with open(input_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def bounder_parquet_fingerprint(output_path: str) -> Optional[str]:
+    """
+    :param output_path: full path of the bounder parquet file
+    :return: fingerprint saved by bounder_data, None if the file does not exist or has none
+    """
+    try:
+        metadata = pq.read_schema(output_path).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    fingerprint = metadata.get(BOUNDER_FINGERPRINT_KEY)
+    return None if fingerprint is None else fingerprint.decode()
+
+
+def bounder_datetime(time_hhmmss: pd.Series, yyyymmdd: str) -> pd.Series:
+    """
+    Datetimes of the bounder hh:mm:ss times, parsed as one array. A time earlier than the one before it by more than
+    12 hours starts a new day, so logs that run past midnight keep increasing
+
+    :param time_hhmmss: bounder times of day, e.g. "13:45:00"
+    :param yyyymmdd: date of the first row, e.g. "2020-10-27"
+    :return: datetimes
+    """
+    time_of_day = pd.to_timedelta(time_hhmmss)
+    day_rollover = (time_of_day.diff() < -pd.Timedelta(hours=12)).cumsum()
+    return pd.Timestamp(yyyymmdd) + time_of_day + pd.to_timedelta(day_rollover, unit="D")
+
+
+def bounder_data(path_bounder_csv: str, file_bounder_csv: str, file_bounder_parquet: str,
+                 is_rerun: bool = False) -> None:
     """
-    Load data from balloon-based Bounder platform
+    Load data from balloon-based Bounder platform. Only the event rows of the csv are parsed, and the parquet is
+    rebuilt only if the csv or the rows changed since it was saved
 
     :param path_bounder_csv: path/to/bounder csv and parquet files
     :param file_bounder_csv: name bounder csv file
     :param file_bounder_parquet: name bounder parquet file
+    :param is_rerun: if True, rebuild the parquet even if it is up to date. Default False
     :return: save as parquet
     """
 
     # Event-specific start date and curated file
     # Bounder Skyfall starts at 13:45:00, end at 14:16:00
-    yyyymmdd = "2020-10-27 "
-    rows = np.arange(5320, 7174)
+    yyyymmdd = "2020-10-27"
+    first_row = 5320
+    number_rows = 1854
 
     input_path = os.path.join(path_bounder_csv, file_bounder_csv)
     print('Input', input_path)
     output_path = os.path.join(path_bounder_csv, file_bounder_parquet)
 
-    df = pd.read_csv(input_path, usecols=[5, 6, 7, 8, 9, 10, 11], skiprows=lambda x: x not in rows,
-                     names=['Pres_kPa', 'Temp_C', 'Batt_V', 'Lon_deg', 'Lat_deg', 'Alt_m', 'Time_hhmmss'])
-    dtime = pd.to_datetime(yyyymmdd + df['Time_hhmmss'], origin='unix')
+    fingerprint = bounder_fingerprint(input_path, first_row, number_rows, yyyymmdd)
+    if not is_rerun and bounder_parquet_fingerprint(output_path) == fingerprint:
+        print('Bounder parquet is up to date:', output_path)
+        return
+
+    with sf_spans.span("bounder_csv", file=file_bounder_csv):
+        # Skip the lines before the event without parsing them and stop after the last one
+        df = pd.read_csv(input_path, usecols=[5, 6, 7, 8, 9, 10, 11], header=None, skiprows=first_row,
+                         nrows=number_rows, skip_blank_lines=False,
+                         names=['Pres_kPa', 'Temp_C', 'Batt_V', 'Lon_deg', 'Lat_deg', 'Alt_m', 'Time_hhmmss'])
+    dtime = bounder_datetime(df['Time_hhmmss'], yyyymmdd)
 
-    # Convert datetime to unix nanoseconds, then to seconds
-    dtime_unix_s = dtime.view('int64')*rpd_geo.NANOS_TO_S  # Python 3.9
+    # Convert datetime to unix seconds
+    dtime_unix_s = (dtime - pd.Timestamp(0)).dt.total_seconds()
 
     skyfall_bounder_loc = df.filter(['Lat_deg', 'Lon_deg', 'Alt_m', 'Pres_kPa', 'Temp_C', 'Batt_V'])
     skyfall_bounder_loc.insert(0, 'Epoch_s', dtime_unix_s)
     skyfall_bounder_loc.insert(1, 'Datetime', dtime)
 
     print(skyfall_bounder_loc['Epoch_s'])
-    # Save to parquet
-    skyfall_bounder_loc.to_parquet(output_path)
+    # Save to parquet with the fingerprint of its inputs
+    table = pa.Table.from_pandas(skyfall_bounder_loc)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           BOUNDER_FINGERPRINT_KEY: fingerprint.encode()})
+    pq.write_table(table, output_path)
 
 
 def main():
@@ -77,9 +147,6 @@ def main():
     """
     is_export_bounder_csv: bool = False  # If true, save only episode start to end as csv
 
-    # Concentrate on single station
-    phone_id = "1637610021"
-
     # Load for all stations
     loc_fields = ['station_id',
                   'location_epoch_s',
@@ -90,20 +157,12 @@ def main():
                   'location_horizontal_accuracy',
                   'barometer_epoch_s',
                   'barometer_wf_raw']
-    df_loc = sf_dw.dw_main(skyfall_config.tdr_load_method)[loc_fields]
+    df_loc = sf_dw.dw_main(skyfall_config.tdr_load_method, columns=loc_fields)
     print(f'Dimensions (# of rows, # of columns): {df_loc.shape}')
 
-    # Pick only the balloon station
-    m_list = df_loc.index[df_loc['station_id'] == phone_id]
-    m = m_list[0]
-    phone_loc = df_loc.iloc[m]
-
-    # Verify
-    if phone_loc.size != df_loc.shape[1]:
-        print(f"Error: Station selected does not match # of bounder columns; "
-              f"station({phone_loc.size}) != bounder({df_loc.shape[1]})")
-        raise ValueError("Station # columns does not match bounder # columns")
-    # print(f'Verify that balloon station selected matches # of columns: {phone_loc.shape}')
+    # Stations in skyfall_config.station_ids, every station if there are none; only those with locations
+    phone_rows = [m for m in sf_stations.station_rows(df_loc, skyfall_config.station_ids)
+                  if not isinstance(df_loc['location_epoch_s'][m], float)]
 
     # Bounder data is a standard rectangular matrix
     if not os.path.exists(BOUNDER_PATH):
@@ -111,9 +170,7 @@ def main():
         print(BOUNDER_PATH)
         exit()
 
-    if skyfall_config.is_rerun_bounder:
-        bounder_data(BOUNDER_PATH, BOUNDER_FILE, BOUNDER_PQT_FILE)
-        print('Constructing bounder.parquet file')
+    bounder_data(BOUNDER_PATH, BOUNDER_FILE, BOUNDER_PQT_FILE, is_rerun=is_rerun_bounder)
 
     # Load parquet with bounder data fields
     print('Load Bounder parquet:')
@@ -155,14 +212,8 @@ def main():
                                                   + '_bounder_start_end.csv')
         bounder_specs_to_csv(df=bounder_loc, csv_export_file=file_bounder_start_end_csv)
 
-    # Compare to phone
-    phone_datetime_start = dt.datetime_from_epoch_seconds_utc(phone_loc['location_epoch_s'][0])
-    phone_datetime_end = dt.datetime_from_epoch_seconds_utc(phone_loc['location_epoch_s'][-1])
-    print('Phone loc start:', phone_datetime_start)
-    print('Phone loc end:', phone_datetime_end)
-
     # Use atmospheric pressure to construct an elevation model
-    elevation_model = rpd_geo.bounder_model_height_from_pressure(pressure_kPa=bounder_loc['Pres_kPa'])
+    elevation_model = sf_height.event_height_model().height_m(pressure_kPa=bounder_loc['Pres_kPa'])
 
     plt.figure()
     plt.semilogx(bounder_loc['Pres_kPa'], bounder_loc['Alt_m']*METERS_TO_KM, label='data')
@@ -172,25 +223,17 @@ def main():
     plt.xlabel('Pressure, kPa')
     # plt.title('Bounder Pressure vs Height')
 
-    # Compute ENU projections
-    txyzuvw_phone = \
-        rpd_geo.compute_t_xyz_uvw(unix_s=phone_loc['location_epoch_s'],
-                                  lat_deg=phone_loc['location_latitude'],
-                                  lon_deg=phone_loc['location_longitude'],
-                                  alt_m=phone_loc['location_altitude'],
-                                  ref_unix_s=ref_epoch_s,
-                                  ref_lat_deg=ref_latitude_deg,
-                                  ref_lon_deg=ref_longitude_deg,
-                                  ref_alt_m=ref_altitude_m)
-    txyzuvw_bounder = \
-        rpd_geo.compute_t_xyz_uvw(unix_s=bounder_loc['Epoch_s'],
-                                  lat_deg=bounder_loc['Lat_deg'],
-                                  lon_deg=bounder_loc['Lon_deg'],
-                                  alt_m=bounder_loc['Alt_m'],
-                                  ref_unix_s=ref_epoch_s,
-                                  ref_lat_deg=ref_latitude_deg,
-                                  ref_lon_deg=ref_longitude_deg,
-                                  ref_alt_m=ref_altitude_m)
+    # Compute ENU projections of the bounder and every phone in one pass
+    projector = sf_enu.enu_projector(ref_lat_deg=ref_latitude_deg,
+                                     ref_lon_deg=ref_longitude_deg,
+                                     ref_alt_m=ref_altitude_m,
+                                     ref_unix_s=ref_epoch_s)
+    txyzuvw_bounder, *txyzuvw_phones = \
+        projector.t_xyz_uvw_tracks([(bounder_loc['Epoch_s'], bounder_loc['Lat_deg'],
+                                     bounder_loc['Lon_deg'], bounder_loc['Alt_m'])] +
+                                   [(df_loc['location_epoch_s'][m], df_loc['location_latitude'][m],
+                                     df_loc['location_longitude'][m], df_loc['location_altitude'][m])
+                                    for m in phone_rows])
 
     # Internal Bounder temperature is coarse, 1C steps
     plt.figure()
@@ -203,11 +246,90 @@ def main():
     scatter_dot_size = 24
     scatter_colormap = 'inferno'
 
-    # Phone plots
-    # 3D scatter plot, LAT LON
-    # title_str = "Skyfall Path, Phone"
+    # Bounder plots
+    # XYZ-T
+    # title_str = "Skyfall, Bounder"
+    title_str = ""
+    sf_figs.plot_figure("loc_bounder_xyz_time", geo_scatter.location_3d,
+                        x=txyzuvw_bounder['X_m']*METERS_TO_KM,
+                        y=txyzuvw_bounder['Y_m']*METERS_TO_KM,
+                        z=txyzuvw_bounder['Z_m']*METERS_TO_KM,
+                        color_guide=txyzuvw_bounder['T_s']*SECONDS_TO_MINUTES,
+                        fig_title=title_str,
+                        x_label='X, km', y_label='Y, km', z_label='Z, km',
+                        color_label='Elapsed time, minutes',
+                        dot_size=scatter_dot_size, color_map=scatter_colormap,
+                        azimuth_degrees=-80, elevation_degrees=25)
+    #
+    # XYZ-P
+    # title_str = "Skyfall, Bounder"
     title_str = ""
-    geo_scatter.location_3d(x=phone_loc['location_longitude'],
+    sf_figs.plot_figure("loc_bounder_xyz_pressure", geo_scatter.location_3d,
+                        x=txyzuvw_bounder['X_m']*METERS_TO_KM,
+                        y=txyzuvw_bounder['Y_m']*METERS_TO_KM,
+                        z=txyzuvw_bounder['Z_m']*METERS_TO_KM,
+                        color_guide=bounder_loc['Pres_kPa'],
+                        fig_title=title_str,
+                        x_label='X, km', y_label='Y, km', z_label='Z, km',
+                        color_label='Pressure, kPa',
+                        dot_size=scatter_dot_size, color_map=scatter_colormap,
+                        azimuth_degrees=-80, elevation_degrees=25)
+
+    # XYZ-Speed
+    sf_figs.plot_figure("loc_bounder_xyz_speed", geo_scatter.location_3d,
+                        x=txyzuvw_bounder['X_m']*METERS_TO_KM,
+                        y=txyzuvw_bounder['Y_m']*METERS_TO_KM,
+                        z=txyzuvw_bounder['Z_m']*METERS_TO_KM,
+                        color_guide=txyzuvw_bounder['Speed_mps'],
+                        fig_title=title_str,
+                        x_label='X, km', y_label='Y, km', z_label='Z, km',
+                        color_label='Speed, m/s',
+                        dot_size=scatter_dot_size, color_map=scatter_colormap,
+                        azimuth_degrees=-80, elevation_degrees=25)
+
+    # Compare each phone to the bounder
+    for m, txyzuvw_phone in zip(phone_rows, txyzuvw_phones):
+        phone_loc = df_loc.loc[m]
+        phone_id = phone_loc['station_id']
+        print('\nPhone:', phone_id)
+
+        # Compare to phone
+        phone_datetime_start = dt.datetime_from_epoch_seconds_utc(phone_loc['location_epoch_s'][0])
+        phone_datetime_end = dt.datetime_from_epoch_seconds_utc(phone_loc['location_epoch_s'][-1])
+        print('Phone loc start:', phone_datetime_start)
+        print('Phone loc end:', phone_datetime_end)
+
+        # Phone and bounder on a common grid at the bounder sample interval; differences are phone minus bounder
+        df_phone_bounder = \
+            sf_align.align_locations(epoch_a=bounder_loc['Epoch_s'],
+                                     lat_a_deg=bounder_loc['Lat_deg'],
+                                     lon_a_deg=bounder_loc['Lon_deg'],
+                                     alt_a_m=bounder_loc['Alt_m'],
+                                     epoch_b=phone_loc['location_epoch_s'],
+                                     lat_b_deg=phone_loc['location_latitude'],
+                                     lon_b_deg=phone_loc['location_longitude'],
+                                     alt_b_m=phone_loc['location_altitude'],
+                                     grid_epoch_s=sf_align.common_grid(bounder_loc['Epoch_s'],
+                                                                       phone_loc['location_epoch_s'],
+                                                                       interval_s=bounder_sample_interval_s))
+        print('Phone - Bounder median altitude difference, m:', np.nanmedian(df_phone_bounder['Alt_diff_m']))
+        print('Phone - Bounder median horizontal distance, m:', np.nanmedian(df_phone_bounder['Horizontal_m']))
+
+        # Phone and bounder residuals on the common grid
+        fig, ax = plt.subplots(2, 1, sharex=True)
+        ax[0].plot((df_phone_bounder['Epoch_s'] - ref_epoch_s)*SECONDS_TO_MINUTES, df_phone_bounder['Alt_diff_m'])
+        ax[0].set_ylabel('Alt diff, m')
+        ax[0].set_title(f"Skyfall Phone {phone_id} - Bounder, Residuals vs Elapsed Time")
+        ax[1].plot((df_phone_bounder['Epoch_s'] - ref_epoch_s)*SECONDS_TO_MINUTES, df_phone_bounder['Horizontal_m'])
+        ax[1].set_ylabel('Horizontal, m')
+        ax[1].set_xlabel('Elapsed Time, minutes')
+
+        # Phone plots
+        # 3D scatter plot, LAT LON
+        # title_str = "Skyfall Path, Phone"
+        title_str = ""
+        sf_figs.plot_figure(f"loc_{phone_id}_phone_location", geo_scatter.location_3d,
+                            x=phone_loc['location_longitude'],
                             y=phone_loc['location_latitude'],
                             z=phone_loc['location_altitude']*METERS_TO_KM,
                             color_guide=txyzuvw_phone['T_s']*SECONDS_TO_MINUTES,
@@ -217,78 +339,45 @@ def main():
                             dot_size=scatter_dot_size, color_map=scatter_colormap,
                             azimuth_degrees=-134, elevation_degrees=30)
 
-    # 3D speed quiver plot, velocity
-    geo_scatter.loc_quiver_3d(x=txyzuvw_phone['X_m']*METERS_TO_KM,
-                              y=txyzuvw_phone['Y_m']*METERS_TO_KM,
-                              z=txyzuvw_phone['Z_m']*METERS_TO_KM,
-                              u=txyzuvw_phone['U_mps'],
-                              v=txyzuvw_phone['V_mps'],
-                              w=txyzuvw_phone['W_mps'],
-                              color_guide=txyzuvw_phone['T_s']*SECONDS_TO_MINUTES,
-                              fig_title=title_str,
-                              x_label='X, km', y_label='Y, km', z_label='Z, km',
-                              color_label='Elapsed time, minutes',
-                              dot_size=scatter_dot_size, color_map=scatter_colormap,
-                              azimuth_degrees=-134, elevation_degrees=30,
-                              arrow_length=0.05)
-
-    # XYZ-T
-    geo_scatter.location_3d(x=txyzuvw_bounder['X_m']*METERS_TO_KM,
-                            y=txyzuvw_bounder['Y_m']*METERS_TO_KM,
-                            z=txyzuvw_bounder['Z_m']*METERS_TO_KM,
-                            color_guide=txyzuvw_bounder['T_s']*SECONDS_TO_MINUTES,
+        # 3D speed quiver plot, velocity
+        sf_figs.plot_figure(f"loc_{phone_id}_phone_velocity", geo_scatter.loc_quiver_3d,
+                            x=txyzuvw_phone['X_m']*METERS_TO_KM,
+                            y=txyzuvw_phone['Y_m']*METERS_TO_KM,
+                            z=txyzuvw_phone['Z_m']*METERS_TO_KM,
+                            u=txyzuvw_phone['U_mps'],
+                            v=txyzuvw_phone['V_mps'],
+                            w=txyzuvw_phone['W_mps'],
+                            color_guide=txyzuvw_phone['T_s']*SECONDS_TO_MINUTES,
                             fig_title=title_str,
                             x_label='X, km', y_label='Y, km', z_label='Z, km',
                             color_label='Elapsed time, minutes',
                             dot_size=scatter_dot_size, color_map=scatter_colormap,
-                            azimuth_degrees=-80, elevation_degrees=25)
-    #
-    # XYZ-P
-    # title_str = "Skyfall, Bounder"
-    title_str = ""
-    geo_scatter.location_3d(x=txyzuvw_bounder['X_m']*METERS_TO_KM,
-                            y=txyzuvw_bounder['Y_m']*METERS_TO_KM,
-                            z=txyzuvw_bounder['Z_m']*METERS_TO_KM,
-                            color_guide=bounder_loc['Pres_kPa'],
-                            fig_title=title_str,
-                            x_label='X, km', y_label='Y, km', z_label='Z, km',
-                            color_label='Pressure, kPa',
-                            dot_size=scatter_dot_size, color_map=scatter_colormap,
-                            azimuth_degrees=-80, elevation_degrees=25)
-
-    # XYZ-Speed
-    geo_scatter.location_3d(x=txyzuvw_bounder['X_m']*METERS_TO_KM,
-                            y=txyzuvw_bounder['Y_m']*METERS_TO_KM,
-                            z=txyzuvw_bounder['Z_m']*METERS_TO_KM,
-                            color_guide=txyzuvw_bounder['Speed_mps'],
+                            azimuth_degrees=-134, elevation_degrees=30,
+                            arrow_length=0.05)
+
+        # Overlay
+        # title_str = "Skyfall Path, Phone and Bounder"
+        title_str = ""
+        sf_figs.plot_figure(f"loc_{phone_id}_phone_bounder_overlay", geo_scatter.loc_overlay_3d,
+                            x1=bounder_loc['Lon_deg'],
+                            y1=bounder_loc['Lat_deg'],
+                            z1=bounder_loc['Alt_m']*METERS_TO_KM,
+                            dot_size1=9,
+                            color1='grey',
+                            legend1='Bounder',
+                            alpha1=1,
+                            x2=phone_loc['location_longitude'],
+                            y2=phone_loc['location_latitude'],
+                            z2=phone_loc['location_altitude']*METERS_TO_KM,
+                            dot_size2=6,
+                            color2='b',
+                            legend2='Phone',
+                            alpha2=0.6,
                             fig_title=title_str,
-                            x_label='X, km', y_label='Y, km', z_label='Z, km',
-                            color_label='Speed, m/s',
-                            dot_size=scatter_dot_size, color_map=scatter_colormap,
-                            azimuth_degrees=-80, elevation_degrees=25)
+                            x_label='Lat', y_label='Lon', z_label='Z, km',
+                            azimuth_degrees=-134, elevation_degrees=30)
 
-    # Overlay
-    # title_str = "Skyfall Path, Phone and Bounder"
-    title_str = ""
-    geo_scatter.loc_overlay_3d(x1=bounder_loc['Lon_deg'],
-                               y1=bounder_loc['Lat_deg'],
-                               z1=bounder_loc['Alt_m']*METERS_TO_KM,
-                               dot_size1=9,
-                               color1='grey',
-                               legend1='Bounder',
-                               alpha1=1,
-                               x2=phone_loc['location_longitude'],
-                               y2=phone_loc['location_latitude'],
-                               z2=phone_loc['location_altitude']*METERS_TO_KM,
-                               dot_size2=6,
-                               color2='b',
-                               legend2='Phone',
-                               alpha2=0.6,
-                               fig_title=title_str,
-                               x_label='Lat', y_label='Lon', z_label='Z, km',
-                               azimuth_degrees=-134, elevation_degrees=30)
-
-    plt.show()
+    sf_figs.show_figures("loc")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,182 @@
+"""
+Parquet layout for RedPandas DataFrames with multichannel waveforms
+2D waveform columns (barometer, accelerometer, gyroscope, magnetometer) are stored as Arrow
+fixed_size_list<list<float>, channels>, so the shape is part of the schema and each station loads back as a
+(channels, samples) view of the Arrow buffer without copying or unflattening
+"""
+
+# Python libraries
+import os
+import json
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# RedVox RedPandas and related RedVox modules
+import redpandas.redpd_preprocess as rpd_prep
+
+# Schema metadata key with the DataFrame column order
+PQT_COLUMNS_KEY = b"skyfall_columns"
+
+
+def wf_channels(df: pd.DataFrame, column: str) -> Optional[int]:
+    """
+    Number of channels of a 2D waveform column
+
+    :param df: input pandas DataFrame
+    :param column: column name
+    :return: number of channels if every row is a 2D array with the same number of channels and at least one sample,
+        or NaN, else None
+    """
+    number_channels = None
+    for row in df.index:
+        value = df[column][row]
+        if type(value) == float:
+            continue
+        if np.ndim(value) != 2 or np.shape(value)[0] == 0 or \
+                (number_channels is not None and np.shape(value)[0] != number_channels):
+            return None
+        number_channels = np.shape(value)[0]
+    return number_channels
+
+
+def wf_to_arrow(values: pd.Series, number_channels: int) -> pa.FixedSizeListArray:
+    """
+    Convert a column of (channels, samples) arrays to fixed_size_list<list<float>, channels>
+
+    :param values: column of 2D arrays, NaN for stations without the sensor
+    :param number_channels: number of channels in every array
+    :return: Arrow array with one entry per row; rows without data are null
+    """
+    is_null = np.array([type(value) == float for value in values])
+    arrays = [np.asarray(value) for value, null in zip(values, is_null) if not null]
+    dtype = arrays[0].dtype if arrays else np.float64
+
+    # One inner list per channel; a null row keeps number_channels empty lists so the offsets stay aligned
+    samples_per_row = np.zeros(len(values), dtype=np.int64)
+    samples_per_row[~is_null] = [np.shape(array)[1] for array in arrays]
+    offsets = np.zeros(len(values)*number_channels + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.repeat(samples_per_row, number_channels))
+    samples = np.concatenate([np.ravel(array) for array in arrays]) if arrays else np.zeros(0, dtype=dtype)
+
+    channels = pa.LargeListArray.from_arrays(pa.array(offsets), pa.array(samples.astype(dtype, copy=False)))
+    return pa.FixedSizeListArray.from_arrays(channels, number_channels, mask=pa.array(is_null))
+
+
+def wf_from_arrow(column: pa.ChunkedArray) -> np.ndarray:
+    """
+    Convert a fixed_size_list<list<float>, channels> column to (channels, samples) arrays without copying
+
+    :param column: Arrow column written by wf_to_arrow
+    :return: object array with one read-only array per row, NaN for null rows
+    """
+    number_channels = column.type.list_size
+    wf_rows = np.empty(len(column), dtype=object)
+    row = 0
+    for chunk in column.chunks:
+        # The child arrays ignore the slice offset of the chunk, so index them from the start of their buffers
+        channels = chunk.values
+        offsets = channels.offsets.to_numpy()
+        samples = channels.values.to_numpy(zero_copy_only=True)
+        is_null = chunk.is_null().to_numpy(zero_copy_only=False)
+        for chunk_row in range(len(chunk)):
+            if is_null[chunk_row]:
+                wf_rows[row] = float("NaN")
+            else:
+                first_channel = (chunk.offset + chunk_row)*number_channels - channels.offset
+                start = offsets[first_channel]
+                stop = offsets[first_channel + number_channels]
+                wf_rows[row] = samples[start:stop].reshape(number_channels, -1)
+            row += 1
+    return wf_rows
+
+
+def export_df_to_parquet(df: pd.DataFrame,
+                         output_dir_pqt: str,
+                         output_filename_pqt: Optional[str] = None,
+                         event_name: Optional[str] = "Redvox") -> str:
+    """
+    Export RedPandas DataFrame to parquet. Same arguments as redpd_df.export_df_to_parquet, but 2D waveform columns
+    keep their shape in the Arrow schema and df is not modified. Other multidimensional columns (e.g. TFRs) are
+    flattened with a _ndim column as in redpd_df
+
+    :param df: input pandas DataFrame. REQUIRED
+    :param output_dir_pqt: string, output directory for parquet. REQUIRED
+    :param output_filename_pqt: optional string for parquet filename. Default is None
+    :param event_name: optional string with name of event. Default is "Redvox"
+    :return: string with full path (output directory and filename) of parquet
+    """
+    df_flat = df.copy(deep=False)
+    wf_columns = {}
+    for column in df.columns:
+        if not any(np.ndim(df[column][row]) >= 2 for row in df.index):
+            continue
+        number_channels = wf_channels(df, column)
+        if number_channels is not None:
+            wf_columns[column] = wf_to_arrow(df[column], number_channels)
+            df_flat = df_flat.drop(columns=column)
+        else:
+            df_flat[f'{column}_ndim'] = [np.asarray(np.shape(value)) for value in df[column]]
+            df_flat[column] = [np.ravel(value) for value in df[column]]
+
+    table = pa.Table.from_pandas(df_flat, preserve_index=True)
+    for column, wf_array in wf_columns.items():
+        table = table.append_column(column, wf_array)
+    column_order = [column for column in df.columns] + \
+                   [column for column in df_flat.columns if column.endswith('_ndim') and column not in df.columns]
+    table = table.replace_schema_metadata({**table.schema.metadata,
+                                           PQT_COLUMNS_KEY: json.dumps(column_order).encode()})
+
+    # Make filename if non given
+    if output_filename_pqt is None:
+        output_filename_pqt: str = event_name + "_df.parquet"
+
+    if output_filename_pqt.find(".parquet") == -1 and output_filename_pqt.find(".pqt") == -1:
+        full_output_dir_path_parquet = os.path.join(output_dir_pqt, output_filename_pqt + ".parquet")
+    else:
+        full_output_dir_path_parquet = os.path.join(output_dir_pqt, output_filename_pqt)
+
+    pq.write_table(table, full_output_dir_path_parquet)
+    print(f"\nExported Parquet RedPandas DataFrame to {full_output_dir_path_parquet}")
+
+    return full_output_dir_path_parquet
+
+
+def read_parquet_columns(input_parquet: str) -> List[str]:
+    """
+    DataFrame column names of a parquet file, read from its footer
+
+    :param input_parquet: full path of the parquet file
+    :return: list of column names, without the stored index
+    """
+    schema = pq.read_schema(input_parquet)
+    index_columns = (schema.pandas_metadata or {}).get("index_columns", [])
+    return [name for name in schema.names if name not in index_columns]
+
+
+def read_parquet(input_parquet: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load a RedPandas parquet with waveforms in their original shape. Reads files from export_df_to_parquet and
+    files flattened by redpd_df.export_df_to_parquet
+
+    :param input_parquet: full path of the parquet file
+    :param columns: optional list of columns to read; include the _ndim column of flattened columns to restore
+        their shape. Default None reads all columns
+    :return: pandas DataFrame; 2D waveforms are read-only views of the Arrow buffers
+    """
+    # read_pandas adds the index columns to the selection
+    table = pq.read_pandas(input_parquet, columns=columns)
+    wf_columns = [field.name for field in table.schema if pa.types.is_fixed_size_list(field.type)]
+
+    df = table.select([name for name in table.column_names if name not in wf_columns]).to_pandas()
+    for column in wf_columns:
+        df[column] = pd.Series(wf_from_arrow(table.column(column)), index=df.index)
+
+    metadata = table.schema.metadata or {}
+    if PQT_COLUMNS_KEY in metadata:
+        df = df[[column for column in json.loads(metadata[PQT_COLUMNS_KEY]) if column in df.columns]]
+    # Columns flattened by redpd_df.export_df_to_parquet or by the TFR fallback above
+    rpd_prep.df_unflatten(df)
+    return df
@@ -0,0 +1,170 @@
+"""
+Stage graph for the Skyfall examples
+Each stage declares the shared products it needs and makes; the DataWindow and DataFrame are built once
+and independent stages run concurrently on a process pool
+"""
+
+# Python libraries
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+# Skyfall examples
+import lib.skyfall_dw as sf_dw
+import lib.skyfall_tdr_rpd as tdr
+import lib.skyfall_tfr_rpd as tfr
+import lib.skyfall_station_specs as sfp
+import lib.skyfall_ensonify as sfe
+import lib.skyfall_loc_rpd as sfl
+import lib.skyfall_spinning as sfs
+import lib.skyfall_gravity as sfg
+import lib.skyfall_spans as sf_spans
+import lib.skyfall_figures as sf_figs
+
+# Configuration file
+from skyfall_config_file import skyfall_config
+
+
+class Stage(NamedTuple):
+    """
+    One step of the Skyfall pipeline
+
+    name: str, unique stage name
+    title: str, progress message printed when the stage starts
+    main: callable with no arguments that runs the stage; must be importable to run on the process pool
+    inputs: names of the products the stage needs
+    outputs: names of the products the stage makes
+    in_process: bool, if True the stage runs in the main process so its products are shared with later stages
+    """
+    name: str
+    title: str
+    main: Callable[[], None]
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    in_process: bool = False
+
+
+def load_datawindow() -> None:
+    """
+    Build the RedVox DataWindow shared by the stages
+    """
+    sf_dw.dw_datawindow(skyfall_config.tdr_load_method)
+
+
+def load_dataframe() -> None:
+    """
+    Build the RedPandas DataFrame shared by the stages
+    """
+    sf_dw.dw_main(skyfall_config.tdr_load_method)
+
+
+def skyfall_stages() -> List[Stage]:
+    """
+    Stages of run_all.py. The DataWindow is only built when the station specs need it, that is when they are not
+    written from the station catalog of skyfall_catalog.py
+
+    :return: list of Stage
+    """
+    if sfp.is_catalog_specs():
+        datawindow_stages = []
+        station_specs_inputs = ()
+    else:
+        datawindow_stages = [Stage("datawindow", "Load RedVox DataWindow: skyfall_dw.py", load_datawindow,
+                                   outputs=("datawindow",), in_process=True)]
+        station_specs_inputs = ("datawindow",)
+    return [Stage("dataframe", "Load RedPandas DataFrame: skyfall_dw.py", load_dataframe,
+                  outputs=("dataframe",), in_process=True),
+            Stage("tdr", "Time domain representation: skyfall_tdr_rpd.py", tdr.main, inputs=("dataframe",)),
+            Stage("tfr", "Time frequency representation: skyfall_tfr_rpd.py", tfr.main, inputs=("dataframe",))] + \
+        datawindow_stages + \
+        [Stage("station_specs", "Station details: skyfall_station_specs.py", sfp.main, inputs=station_specs_inputs),
+         Stage("ensonify", "Sonification: skyfall_ensonify.py", sfe.main, inputs=("dataframe",)),
+         Stage("loc", "Location: skyfall_loc_rpd.py", sfl.main, inputs=("dataframe",)),
+         Stage("gravity", "Acceleration and gravity: skyfall_gravity.py", sfg.main, inputs=("dataframe",)),
+         Stage("spinning", "Rotation: skyfall_spinning.py", sfs.main, inputs=("dataframe",))]
+
+
+SKYFALL_STAGES: List[Stage] = skyfall_stages()
+
+
+def _init_worker() -> None:
+    """
+    Pool workers cannot open windows; save their figures to FIGURES_DIR instead of showing them
+    """
+    sf_figs.set_headless_figures()
+
+
+def _run_stage(stage: Stage) -> None:
+    """
+    Print the stage title and run it in a span
+
+    :param stage: Stage to run
+    """
+    print(f"\n{stage.title}")
+    with sf_spans.span(stage.name, category="stage"):
+        stage.main()
+
+
+def run_pipeline(stages: List[Stage], workers: int = 1) -> None:
+    """
+    Run the stages in dependency order. Stages run as soon as their inputs exist; with more than one worker,
+    stages that are not in_process run concurrently on a process pool, once no in_process stage is ready.
+    Pool workers save their figures to FIGURES_DIR, as with is_headless_figures.
+    On platforms that fork, pool workers inherit the DataWindow and DataFrame loaded before the pool starts, and an
+    in_process stage that makes inputs of pool stages after that sends the later pool stages to a new pool;
+    elsewhere they reload the DataFrame from the skyfall_dw disk cache. Spans of the stages, including those run
+    on the pool, are collected in skyfall_spans.SPANS.
+
+    :param stages: list of Stage; stages whose inputs are ready start in list order
+    :param workers: number of pool processes. 1 runs every stage in order in this process. Default 1
+    :return: raises ValueError if a stage needs a product that no stage makes
+    """
+    made_by_stages = {product for stage in stages for product in stage.outputs}
+    for stage in stages:
+        missing = set(stage.inputs) - made_by_stages
+        if missing:
+            raise ValueError(f"Stage {stage.name} needs {sorted(missing)}, which no stage makes")
+
+    available = set()
+    pending = list(stages)
+    running: Dict[Future, Stage] = {}
+    executor = None
+    retired_executors: List[ProcessPoolExecutor] = []
+    try:
+        while pending or running:
+            ready = [stage for stage in pending if set(stage.inputs) <= available]
+            # Run the in-process stages first, so the pool is forked only after the products they load
+            in_process_ready = [stage for stage in ready if stage.in_process or workers == 1]
+            if in_process_ready:
+                stage = in_process_ready[0]
+                pending.remove(stage)
+                _run_stage(stage)
+                available.update(stage.outputs)
+                # Workers forked before this stage do not have its products; later pool stages get a new pool
+                pool_inputs = {product for pending_stage in pending for product in pending_stage.inputs}
+                if executor is not None and set(stage.outputs) & pool_inputs:
+                    executor.shutdown(wait=False)
+                    retired_executors.append(executor)
+                    executor = None
+                continue
+            for stage in ready:
+                if executor is None:
+                    context = multiprocessing.get_context("fork") \
+                        if "fork" in multiprocessing.get_all_start_methods() else None
+                    executor = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                                   initializer=_init_worker)
+                pending.remove(stage)
+                running[executor.submit(sf_spans.run_with_spans, _run_stage, stage)] = stage
+            if not running:
+                # Inputs were validated above, so this only happens when a stage needs its own outputs
+                raise ValueError(f"Stages {[stage.name for stage in pending]} have inputs that are never made")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                _, stage_spans = future.result()  # Raise the stage's exception here
+                sf_spans.add_spans(stage_spans)
+                available.update(stage.outputs)
+    finally:
+        for pool in retired_executors + ([executor] if executor is not None else []):
+            pool.shutdown(wait=True)
@@ -0,0 +1,270 @@
+"""
+Prefetching reader of RedVox packet files
+A bounded pool of background threads reads the bytes of the next files while the current ones are decompressed and
+decoded, so disk and network file system latency overlaps the decoding instead of adding to it. The reader keeps
+the time the threads spent reading and the time the decoder waited for them, which shows how much I/O was hidden.
+For readers that open the files themselves, such as the RedVox DataWindow, the files are read ahead into the
+operating system cache instead, following the files the reader opens
+"""
+
+# Python libraries
+import os
+import sys
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import lz4.frame
+
+# RedVox RedPandas and related RedVox modules
+from redvox.common import api_conversions as ac
+from redvox.api900.reader import read_buffer
+from redvox.api1000.proto.redvox_api_m_pb2 import RedvoxPacketM
+from redvox.common.versioning import ApiVersion, check_version_buf
+
+# Files read ahead of the decoder
+PREFETCH_DEPTH = 8
+# Called with the path of every file opened in this process while prefetch_files follows a reader
+_OPEN_WATCHERS: List[Callable[[str], None]] = []
+# is_prefetch is set in the threads of prefetch_files, so their own opens are not taken for the reader's
+_PREFETCH_THREAD = threading.local()
+_IS_AUDIT_HOOK = False
+
+
+class PrefetchStats:
+    """
+    I/O of a prefetching read
+
+    files: number of files read
+    read_bytes: bytes read
+    read_s: time spent reading, summed over the reader threads
+    wait_s: time the decoder waited for bytes that were not read yet
+    missed_files: files the decoder read in sequence itself because they were not read ahead
+    """
+    def __init__(self):
+        self.files = 0
+        self.read_bytes = 0
+        self.read_s = 0.
+        self.wait_s = 0.
+        self.missed_files = 0
+
+    def hidden_s(self) -> float:
+        """
+        :return: reading time that overlapped decoding
+        """
+        return max(self.read_s - self.wait_s, 0.)
+
+    def as_dict(self) -> dict:
+        """
+        :return: counters and the fraction of the reading time that was hidden
+        """
+        return {"files": self.files,
+                "read_bytes": self.read_bytes,
+                "read_s": self.read_s,
+                "wait_s": self.wait_s,
+                "missed_files": self.missed_files,
+                "hidden_s": self.hidden_s(),
+                "hidden_fraction": self.hidden_s() / self.read_s if self.read_s > 0 else 0.}
+
+
+def read_file_bytes(path: str) -> Tuple[Optional[bytes], float]:
+    """
+    :param path: full path of the file
+    :return: file contents, None if the file cannot be read, and the reading time in s
+    """
+    start_s = time.perf_counter()
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        print(f"Skipping unreadable packet file {path}: {e}")
+        data = None
+    return data, time.perf_counter() - start_s
+
+
+def decode_packet(data: bytes) -> RedvoxPacketM:
+    """
+    Decompress and deserialize the bytes of a packet file, as redvox Index.read_contents does; the API version is
+    told from the bytes, as redvox does from the file
+
+    :param data: file contents
+    :return: RedvoxPacketM, converted from API 900 if necessary
+    """
+    if check_version_buf(data) == ApiVersion.API_1000:
+        packet = RedvoxPacketM()
+        packet.ParseFromString(lz4.frame.decompress(data))
+        return packet
+    return ac.convert_api_900_to_1000_raw(read_buffer(data))
+
+
+def prefetch_bytes(paths: Iterable[str],
+                   depth: int = PREFETCH_DEPTH,
+                   stats: Optional[PrefetchStats] = None) -> Iterator[Tuple[str, Optional[bytes]]]:
+    """
+    Contents of packet files in order, with up to depth files read in background threads ahead of the caller
+
+    :param paths: full path of each file, in the order to decode them
+    :param depth: number of files read ahead; 0 reads each file when it is needed. Default PREFETCH_DEPTH
+    :param stats: optional PrefetchStats to update. Default None
+    :return: each path with the file contents, None if the file cannot be read
+    """
+    stats = PrefetchStats() if stats is None else stats
+    if depth < 1:
+        for path in paths:
+            data, read_s = read_file_bytes(path)
+            stats.files += 1
+            stats.read_bytes += len(data) if data is not None else 0
+            stats.read_s += read_s
+            # Nothing overlaps the read
+            stats.wait_s += read_s
+            yield path, data
+        return
+
+    with ThreadPoolExecutor(max_workers=depth + 1, thread_name_prefix="prefetch") as executor:
+        pending = deque()
+        for path in paths:
+            pending.append((path, executor.submit(read_file_bytes, path)))
+            # depth reads stay in flight while the caller decodes the oldest
+            if len(pending) <= depth:
+                continue
+            yield _next_read(pending, stats)
+        while pending:
+            yield _next_read(pending, stats)
+
+
+def _next_read(pending: deque, stats: PrefetchStats) -> Tuple[str, Optional[bytes]]:
+    """
+    Wait for the oldest read and count it in stats
+    """
+    path, future = pending.popleft()
+    wait_start_s = time.perf_counter()
+    data, read_s = future.result()
+    stats.wait_s += time.perf_counter() - wait_start_s
+    stats.files += 1
+    stats.read_bytes += len(data) if data is not None else 0
+    stats.read_s += read_s
+    return path, data
+
+
+def prefetch_packets(paths: Iterable[str],
+                     depth: int = PREFETCH_DEPTH,
+                     stats: Optional[PrefetchStats] = None) \
+        -> Iterator[Tuple[str, Optional[bytes], Optional[RedvoxPacketM]]]:
+    """
+    Decoded packets in order, with up to depth files read ahead while the current one decodes
+
+    :param paths: full path of each file, in the order to decode them
+    :param depth: number of files read ahead; 0 reads each file when it is needed. Default PREFETCH_DEPTH
+    :param stats: optional PrefetchStats to update. Default None
+    :return: each path with the file contents and its RedvoxPacketM; None if the file cannot be read or decoded
+    """
+    for path, data in prefetch_bytes(paths, depth, stats):
+        if data is None:
+            yield path, None, None
+            continue
+        try:
+            packet = decode_packet(data)
+        except Exception as e:
+            print(f"Skipping unreadable packet file {path}: {e}")
+            packet = None
+        yield path, data, packet
+
+
+def _audit_open(event: str, args: tuple) -> None:
+    """
+    Audit hook of this process: pass the path of every opened file to _OPEN_WATCHERS
+    """
+    if event == "open" and _OPEN_WATCHERS and isinstance(args[0], (str, os.PathLike)):
+        for watcher in list(_OPEN_WATCHERS):
+            watcher(os.fspath(args[0]))
+
+
+def _read_ahead(path: str) -> Tuple[int, float]:
+    """
+    Read a file in a prefetch thread and drop its bytes
+    """
+    _PREFETCH_THREAD.is_prefetch = True
+    data, read_s = read_file_bytes(path)
+    return len(data) if data is not None else 0, read_s
+
+
+@contextmanager
+def prefetch_files(paths: Iterable[str],
+                   depth: int = PREFETCH_DEPTH,
+                   stats: Optional[PrefetchStats] = None) -> Iterator[PrefetchStats]:
+    """
+    Read files into the operating system cache ahead of a reader in this process that opens them itself, such as
+    the RedVox DataWindow. The reader is followed through the 'open' audit events: when it opens the files of paths
+    in sequence, up to depth files after the one it opened are read in background threads and their bytes dropped.
+    As with the readahead of the kernel, scattered opens read nothing ahead, e.g. the version check of every file
+    when RedVox indexes the tree. When the reader opens a file whose read is still in flight, it waits for that
+    read instead of reading the file a second time; stats.wait_s is that wait, so stats.hidden_s is the reading time
+    the reader did not wait for. Files opened in other processes, e.g. by a RedVox multiprocessing pool, are not seen
+
+    :param paths: full path of each file, in the order the reader opens them
+    :param depth: number of files read ahead of the file the reader opened; 0 reads nothing.
+        Default PREFETCH_DEPTH
+    :param stats: optional PrefetchStats to update. Default None
+    :return: stats, updated when the context exits
+    """
+    global _IS_AUDIT_HOOK
+
+    stats = PrefetchStats() if stats is None else stats
+    if depth < 1:
+        yield stats
+        return
+    if not _IS_AUDIT_HOOK:
+        # Audit hooks cannot be removed; this one does nothing when no reader is followed
+        sys.addaudithook(_audit_open)
+        _IS_AUDIT_HOOK = True
+
+    paths = [os.path.abspath(path) for path in paths]
+    path_positions: Dict[str, int] = {}
+    for position, path in enumerate(paths):
+        path_positions.setdefault(path, position)
+    reads: Dict[int, Future] = {}
+    last_position: Optional[int] = None
+    lock = threading.Lock()
+    executor = ThreadPoolExecutor(max_workers=depth, thread_name_prefix="prefetch")
+
+    def read_after(position: int) -> None:
+        with lock:
+            for ahead in range(position + 1, min(position + 1 + depth, len(paths))):
+                if ahead not in reads:
+                    reads[ahead] = executor.submit(_read_ahead, paths[ahead])
+
+    def follow_open(path: str) -> None:
+        nonlocal last_position
+        if getattr(_PREFETCH_THREAD, "is_prefetch", False):
+            return
+        position = path_positions.get(os.path.abspath(path))
+        if position is None:
+            return
+        read = reads.get(position)
+        if read is not None and not read.done():
+            wait_start_s = time.perf_counter()
+            wait([read])
+            stats.wait_s += time.perf_counter() - wait_start_s
+        # The same file again or the next one
+        is_sequential = last_position is not None and 0 <= position - last_position <= 1
+        last_position = position
+        if is_sequential:
+            if read is None:
+                stats.missed_files += 1
+            read_after(position)
+
+    _OPEN_WATCHERS.append(follow_open)
+    try:
+        yield stats
+    finally:
+        _OPEN_WATCHERS.remove(follow_open)
+        executor.shutdown(wait=True, cancel_futures=True)
+        for read in reads.values():
+            if read.cancelled():
+                continue
+            read_bytes, read_s = read.result()
+            stats.files += 1
+            stats.read_bytes += read_bytes
+            stats.read_s += read_s
@@ -0,0 +1,256 @@
+"""
+Multi-resolution waveform pyramid of one sensor for fast zooming
+Level k summarizes the samples of each channel in bins of 2**k samples with their min, max and mean, and the time of
+the first and last sample of the bin. Each station and level is split in time-contiguous parquet row groups of a
+fixed number of bins, so a query picks the coarsest level that still has the requested number of points in the time
+span and reads only the row groups of that level that overlap the span. The finest levels are not stored: they
+would be larger than the samples and barely faster to read, so short spans read the samples instead
+"""
+
+# Python libraries
+import os
+import json
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Skyfall examples
+import lib.skyfall_time_index as sf_time
+
+# Schema metadata key with the waveform columns and their number of channels
+PYRAMID_COLUMNS_KEY = b"skyfall_pyramid_columns"
+# Summaries of each channel at every level
+PYRAMID_STATS = ("min", "max", "mean")
+# Default number of bins of a row group
+PYRAMID_ROW_GROUP_BINS = 4096
+
+
+def pyramid_channel_labels(column: str, number_channels: int) -> List[str]:
+    """
+    Parquet columns of the summaries of a DataFrame column
+
+    :param column: DataFrame column name
+    :param number_channels: number of channels, 0 for 1D arrays
+    :return: list of <channel>_min, <channel>_max and <channel>_mean parquet column names
+    """
+    return [f"{channel_label}_{stat}" for channel_label in sf_time.time_channel_labels(column, number_channels)
+            for stat in PYRAMID_STATS]
+
+
+def _pairs(values: np.ndarray, reduce) -> np.ndarray:
+    """
+    Reduce neighboring bins in pairs along the last axis; an odd last bin is kept as it is
+    """
+    number_pairs = np.shape(values)[-1] // 2
+    reduced = reduce(values[..., 0:2*number_pairs:2], values[..., 1:2*number_pairs:2])
+    return reduced if np.shape(values)[-1] % 2 == 0 else np.concatenate([reduced, values[..., -1:]], axis=-1)
+
+
+def pyramid_levels(sig_wf: np.ndarray, epoch_s: np.ndarray, min_bins: int = 2) -> List[Dict[str, np.ndarray]]:
+    """
+    Min/max/mean summaries of a waveform at power-of-two decimation levels. Each level is made from the one below,
+    so the whole pyramid costs about two passes over the samples; NaN samples are ignored by min and max
+
+    :param sig_wf: 1D waveform or (channels, samples) array
+    :param epoch_s: timestamps of the samples
+    :param min_bins: stop when a level has fewer bins. Default 2
+    :return: list of levels 1, 2, ...; each a dictionary with min, max and mean of shape (channels, bins) and the
+        start_epoch_s and end_epoch_s of each bin
+    """
+    sig_2d = np.atleast_2d(np.asarray(sig_wf, dtype=np.float64))
+    epoch_s = np.asarray(epoch_s, dtype=np.float64)
+    level = {"min": sig_2d, "max": sig_2d, "mean": sig_2d, "count": np.ones(len(epoch_s)),
+             "start_epoch_s": epoch_s, "end_epoch_s": epoch_s}
+    levels = []
+    while len(level["count"]) >= 2 * min_bins:
+        count = _pairs(level["count"], np.add)
+        level = {"min": _pairs(level["min"], np.fmin),
+                 "max": _pairs(level["max"], np.fmax),
+                 # Mean weighted by the number of samples, since an odd last bin has fewer
+                 "mean": _pairs(level["mean"] * level["count"], np.add) / count,
+                 "count": count,
+                 "start_epoch_s": level["start_epoch_s"][0::2],
+                 "end_epoch_s": _pairs(level["end_epoch_s"], np.maximum)}
+        levels.append(level)
+    return levels
+
+
+def export_pyramid(df: pd.DataFrame,
+                   sensor_label: str,
+                   output_file: str,
+                   fingerprint: Optional[str] = None,
+                   min_level: int = 4,
+                   min_bins: int = 2,
+                   row_group_bins: int = PYRAMID_ROW_GROUP_BINS) -> str:
+    """
+    Write the waveform pyramid of a sensor, each level of each station in row groups of row_group_bins bins
+
+    :param df: RedPandas DataFrame
+    :param sensor_label: sensor name, e.g. 'audio'
+    :param output_file: full path of the parquet file
+    :param fingerprint: optional fingerprint of the data in df, read back by sf_time.time_index_fingerprint.
+        Default None
+    :param min_level: finest level stored, in bins of 2**min_level samples. Default 4
+    :param min_bins: number of bins of the coarsest level. Default 2
+    :param row_group_bins: bins per row group; the last row group of a level may have fewer.
+        Default PYRAMID_ROW_GROUP_BINS
+    :return: output_file
+    """
+    epoch_label, sample_columns = sf_time.sensor_time_columns(df, sensor_label)
+    fields = [pa.field("station_id", pa.string()), pa.field("level", pa.int8()),
+              pa.field("start_epoch_s", pa.float64()), pa.field("end_epoch_s", pa.float64())]
+    for column, number_channels in sample_columns.items():
+        fields.extend(pa.field(stat_label, pa.float64())
+                      for stat_label in pyramid_channel_labels(column, number_channels))
+    metadata = {PYRAMID_COLUMNS_KEY: json.dumps(sample_columns).encode()}
+    if fingerprint is not None:
+        metadata[sf_time.TIME_INDEX_FINGERPRINT_KEY] = fingerprint.encode()
+    schema = pa.schema(fields, metadata=metadata)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    tmp_file = output_file + ".tmp"
+    with pq.ParquetWriter(tmp_file, schema, use_dictionary=["station_id"]) as writer:
+        for n in df.index:
+            if type(df[epoch_label][n]) == float or len(df[epoch_label][n]) == 0:
+                continue
+            column_levels = {column: pyramid_levels(df[column][n], df[epoch_label][n], min_bins)
+                             for column in sample_columns}
+            number_levels = min(len(levels) for levels in column_levels.values()) if column_levels else 0
+            for level_number in range(min_level - 1, number_levels):
+                first_level = next(iter(column_levels.values()))[level_number]
+                number_bins = len(first_level["count"])
+                level_table = {"station_id": pc.take(pa.array([df["station_id"][n]], pa.string()),
+                                                     np.zeros(number_bins, dtype=np.int64)),
+                               "level": np.full(number_bins, level_number + 1, dtype=np.int8),
+                               "start_epoch_s": first_level["start_epoch_s"],
+                               "end_epoch_s": first_level["end_epoch_s"]}
+                for column, number_channels in sample_columns.items():
+                    level = column_levels[column][level_number]
+                    for axis, channel_label in enumerate(sf_time.time_channel_labels(column, number_channels)):
+                        for stat in PYRAMID_STATS:
+                            level_table[f"{channel_label}_{stat}"] = level[stat][axis]
+                level_table = pa.table(level_table, schema=schema)
+                for start in range(0, number_bins, row_group_bins):
+                    stop = min(start + row_group_bins, number_bins)
+                    writer.write_table(level_table.slice(start, stop - start), row_group_size=stop - start)
+    os.replace(tmp_file, output_file)
+    return output_file
+
+
+def pyramid_row_groups(parquet_file: pq.ParquetFile) -> pd.DataFrame:
+    """
+    Station, level, time span and number of bins of every row group, from the parquet footer
+
+    :param parquet_file: pyramid parquet from export_pyramid
+    :return: DataFrame with one row per row group
+    """
+    schema = parquet_file.schema_arrow
+    columns = {name: schema.get_field_index(name) for name in ("station_id", "level", "start_epoch_s", "end_epoch_s")}
+    row_groups = []
+    for row_group in range(parquet_file.num_row_groups):
+        row_group_metadata = parquet_file.metadata.row_group(row_group)
+        row_groups.append({"row_group": row_group,
+                           "station_id": row_group_metadata.column(columns["station_id"]).statistics.min,
+                           "level": row_group_metadata.column(columns["level"]).statistics.min,
+                           "start_epoch_s": row_group_metadata.column(columns["start_epoch_s"]).statistics.min,
+                           "end_epoch_s": row_group_metadata.column(columns["end_epoch_s"]).statistics.max,
+                           "bins": row_group_metadata.num_rows})
+    return pd.DataFrame(row_groups, columns=["row_group", "station_id", "level", "start_epoch_s", "end_epoch_s",
+                                             "bins"])
+
+
+def pyramid_level_for_span(row_groups: pd.DataFrame, start_epoch_s: float, end_epoch_s: float,
+                           number_points: int) -> Dict[str, int]:
+    """
+    Coarsest level of each station with at least number_points bins in the span
+
+    :param row_groups: DataFrame from pyramid_row_groups
+    :param start_epoch_s: span start in epoch s
+    :param end_epoch_s: span end in epoch s
+    :param number_points: requested number of points in the span, e.g. the pixel width of the plot
+    :return: {station_id: level}; level 0 means even the finest level is too coarse and the samples are needed
+    """
+    levels = row_groups.groupby(["station_id", "level"], sort=False).agg(start_epoch_s=("start_epoch_s", "min"),
+                                                                          end_epoch_s=("end_epoch_s", "max"),
+                                                                          bins=("bins", "sum")).reset_index()
+    station_levels = {}
+    for station_id, station_groups in levels.groupby("station_id", sort=False):
+        station_levels[station_id] = 0
+        for _, level in station_groups.sort_values("level").iterrows():
+            bin_s = (level["end_epoch_s"] - level["start_epoch_s"]) / level["bins"]
+            if bin_s > 0 and (end_epoch_s - start_epoch_s) / bin_s < number_points:
+                break
+            station_levels[station_id] = int(level["level"])
+    return station_levels
+
+
+def read_pyramid_window(input_file: str,
+                        start_epoch_s: float,
+                        end_epoch_s: float,
+                        number_points: int,
+                        station_ids: Optional[List[str]] = None) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    Read the coarsest pyramid level that has at least number_points bins in [start_epoch_s, end_epoch_s]. Only the
+    row groups of that level that overlap the span are read for each station, selected by their start_epoch_s and
+    end_epoch_s statistics, so the cost is fewer than 2 * number_points bins plus the parts of the row groups at
+    each end of the span outside it
+
+    :param input_file: full path of the parquet from export_pyramid
+    :param start_epoch_s: span start in epoch s
+    :param end_epoch_s: span end in epoch s
+    :param number_points: requested number of points in the span, e.g. the pixel width of the plot
+    :param station_ids: optional list of stations. Default None reads all stations
+    :return: DataFrame with one row per station read: station_id, level, start_epoch_s and end_epoch_s of the bins,
+        and <column>_min, <column>_max, <column>_mean shaped like the waveform column; and the level of every
+        station, 0 for stations that need the samples (see sf_time.read_time_window)
+    """
+    parquet_file = pq.ParquetFile(input_file)
+    sample_columns = json.loads(parquet_file.schema_arrow.metadata[PYRAMID_COLUMNS_KEY])
+    row_groups = pyramid_row_groups(parquet_file)
+    if station_ids is not None:
+        row_groups = row_groups[row_groups["station_id"].isin(station_ids)]
+    station_levels = pyramid_level_for_span(row_groups, start_epoch_s, end_epoch_s, number_points)
+
+    rows = []
+    for station_id, level in station_levels.items():
+        if level == 0:
+            continue
+        in_span_groups = row_groups["row_group"][(row_groups["station_id"] == station_id) &
+                                                 (row_groups["level"] == level) &
+                                                 (row_groups["end_epoch_s"] >= start_epoch_s) &
+                                                 (row_groups["start_epoch_s"] <= end_epoch_s)]
+        table = parquet_file.read_row_groups([int(row_group) for row_group in in_span_groups])
+        bin_start_s = table.column("start_epoch_s").to_numpy()
+        bin_end_s = table.column("end_epoch_s").to_numpy()
+        in_span = (bin_end_s >= start_epoch_s) & (bin_start_s <= end_epoch_s)
+        row = {"station_id": station_id, "level": level,
+               "start_epoch_s": bin_start_s[in_span], "end_epoch_s": bin_end_s[in_span]}
+        for column, number_channels in sample_columns.items():
+            for stat in PYRAMID_STATS:
+                channels = [table.column(f"{channel_label}_{stat}").to_numpy()[in_span]
+                            for channel_label in sf_time.time_channel_labels(column, number_channels)]
+                row[f"{column}_{stat}"] = channels[0] if number_channels == 0 else np.vstack(channels)
+        rows.append(row)
+    return pd.DataFrame(rows, columns=["station_id", "level", "start_epoch_s", "end_epoch_s"] +
+                        [f"{column}_{stat}" for column in sample_columns for stat in PYRAMID_STATS]), station_levels
+
+
+def envelope_wf(wf_min: np.ndarray,
+                wf_max: np.ndarray,
+                start_epoch_s: np.ndarray,
+                end_epoch_s: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Waveform to plot from a pyramid level: the min at the start and the max at the end of each bin
+
+    :param wf_min: bin minima, 1D or (channels, bins)
+    :param wf_max: bin maxima, same shape as wf_min
+    :param start_epoch_s: start of each bin in epoch s
+    :param end_epoch_s: end of each bin in epoch s
+    :return: waveform and timestamps with two points per bin
+    """
+    sig_wf = np.stack([wf_min, wf_max], axis=-1).reshape(np.shape(wf_min)[:-1] + (-1,))
+    sig_time = np.stack([start_epoch_s, end_epoch_s], axis=-1).ravel()
+    return sig_wf, sig_time
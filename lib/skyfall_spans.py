@@ -0,0 +1,205 @@
+"""
+Timing and memory spans for the Skyfall examples
+Stages and their major steps run inside named spans that record wall time, CPU time, growth of the peak resident
+memory and bytes read and written. The spans are saved as a JSON summary and as a Chrome trace-event file
+(open in chrome://tracing or https://ui.perfetto.dev)
+"""
+
+# Python libraries
+import os
+import sys
+import time
+import json
+import threading
+from concurrent.futures import Executor
+from contextlib import contextmanager
+from itertools import repeat
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import matplotlib.pyplot as plt
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Spans recorded in this process, in the order they finished
+SPANS: List[Dict] = []
+# Names of the open spans, innermost last
+_OPEN_SPANS: List[str] = []
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    :return: peak resident memory of this process in bytes, None if the platform does not report it
+    """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def io_bytes() -> Tuple[Optional[int], Optional[int]]:
+    """
+    :return: bytes read and written by this process so far, including the page cache; None if the platform does
+        not report them
+    """
+    try:
+        with open("/proc/self/io", "r") as f:
+            io_counters = dict(line.split(":") for line in f if ":" in line)
+        return int(io_counters["rchar"]), int(io_counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def _difference(end: Optional[int], start: Optional[int]) -> Optional[int]:
+    return None if end is None or start is None else end - start
+
+
+@contextmanager
+def span(name: str, category: str = "step", **args) -> Iterator[Dict]:
+    """
+    Record one span around the code in the with block. Spans nest; the span is recorded even if the block raises
+
+    :param name: span name, e.g. the stage or function name
+    :param category: "stage" for pipeline stages, "step" for their sub-steps. Default "step"
+    :param args: optional details shown with the span, e.g. the sensor or station
+    :return: the span dictionary, filled in when the block ends
+    """
+    span_record = {"name": name, "category": category, "parent": _OPEN_SPANS[-1] if _OPEN_SPANS else None,
+                   "pid": os.getpid(), "tid": threading.get_ident(), "args": args}
+    start_epoch_s = time.time()
+    start_wall_s = time.perf_counter()
+    start_cpu_s = time.process_time()
+    start_peak_rss = peak_rss_bytes()
+    start_read, start_written = io_bytes()
+    _OPEN_SPANS.append(name)
+    try:
+        yield span_record
+    finally:
+        _OPEN_SPANS.pop()
+        end_read, end_written = io_bytes()
+        span_record.update({"start_epoch_s": start_epoch_s,
+                            "wall_s": time.perf_counter() - start_wall_s,
+                            "cpu_s": time.process_time() - start_cpu_s,
+                            "peak_rss_delta_bytes": _difference(peak_rss_bytes(), start_peak_rss),
+                            "read_bytes": _difference(end_read, start_read),
+                            "written_bytes": _difference(end_written, start_written)})
+        SPANS.append(span_record)
+
+
+def run_with_spans(function: Callable, *args) -> Tuple[object, List[Dict]]:
+    """
+    Call a function and collect the spans it records; used to send the spans of pool workers back to the parent
+
+    :param function: function to call
+    :param args: arguments of function
+    :return: result of function and the spans it recorded
+    """
+    first_span = len(SPANS)
+    result = function(*args)
+    return result, SPANS[first_span:]
+
+
+def add_spans(spans: List[Dict]) -> None:
+    """
+    Add spans recorded in another process
+
+    :param spans: spans from run_with_spans
+    """
+    SPANS.extend(spans)
+
+
+def map_with_spans(executor: Executor, function: Callable, iterable: Iterable) -> Iterator:
+    """
+    executor.map that also adds the spans recorded by the workers to SPANS
+
+    :param executor: process pool
+    :param function: function to call; must be importable to run on the pool
+    :param iterable: arguments, one call per item
+    :return: results in the order of iterable
+    """
+    for result, worker_spans in executor.map(run_with_spans, repeat(function), iterable):
+        add_spans(worker_spans)
+        yield result
+
+
+def draw_figures(name: str = "figures") -> None:
+    """
+    Render every open figure in a span, so the drawing time is measured before plt.show waits for the user
+
+    :param name: span name. Default "figures"
+    """
+    with span(name, figures=len(plt.get_fignums())):
+        for figure_number in plt.get_fignums():
+            plt.figure(figure_number).canvas.draw()
+
+
+def spans_summary(spans: List[Dict]) -> Dict[str, Dict]:
+    """
+    Totals per span name
+
+    :param spans: list of spans
+    :return: dictionary with the count, total wall and CPU time, largest peak memory growth and total bytes read
+        and written of each span name
+    """
+    summary = {}
+    for span_record in spans:
+        totals = summary.setdefault(span_record["name"], {"category": span_record["category"], "count": 0,
+                                                          "wall_s": 0., "cpu_s": 0., "peak_rss_delta_bytes": None,
+                                                          "read_bytes": None, "written_bytes": None})
+        totals["count"] += 1
+        totals["wall_s"] += span_record["wall_s"]
+        totals["cpu_s"] += span_record["cpu_s"]
+        if span_record["peak_rss_delta_bytes"] is not None:
+            totals["peak_rss_delta_bytes"] = max(totals["peak_rss_delta_bytes"] or 0,
+                                                 span_record["peak_rss_delta_bytes"])
+        for io_label in ("read_bytes", "written_bytes"):
+            if span_record[io_label] is not None:
+                totals[io_label] = (totals[io_label] or 0) + span_record[io_label]
+    return summary
+
+
+def chrome_trace(spans: List[Dict]) -> Dict:
+    """
+    Convert spans to the Chrome trace-event format, one complete ("X") event per span
+
+    :param spans: list of spans
+    :return: dictionary with the traceEvents list
+    """
+    trace_events = [{"name": span_record["name"],
+                     "cat": span_record["category"],
+                     "ph": "X",
+                     "ts": span_record["start_epoch_s"] * 1E6,
+                     "dur": span_record["wall_s"] * 1E6,
+                     "pid": span_record["pid"],
+                     "tid": span_record["tid"],
+                     "args": {**span_record["args"],
+                              "cpu_s": span_record["cpu_s"],
+                              "peak_rss_delta_bytes": span_record["peak_rss_delta_bytes"],
+                              "read_bytes": span_record["read_bytes"],
+                              "written_bytes": span_record["written_bytes"]}}
+                    for span_record in spans]
+    return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+
+def export_spans(output_dir: str, spans: Optional[List[Dict]] = None, run_name: str = "run_all") -> Tuple[str, str]:
+    """
+    Save the spans as a JSON summary and a Chrome trace-event file
+
+    :param output_dir: directory for the files
+    :param spans: optional list of spans. Default None saves all the spans recorded in this process
+    :param run_name: prefix of the file names. Default "run_all"
+    :return: full paths of the summary and of the trace
+    """
+    if spans is None:
+        spans = SPANS
+    os.makedirs(output_dir, exist_ok=True)
+    run_time = time.strftime('%Y%m%dT%H%M%S')
+    summary_file = os.path.join(output_dir, f"{run_name}_spans_{run_time}.json")
+    trace_file = os.path.join(output_dir, f"{run_name}_trace_{run_time}.json")
+    with open(summary_file, "w") as f:
+        json.dump({"summary": spans_summary(spans), "spans": spans}, f, indent=2)
+    with open(trace_file, "w") as f:
+        json.dump(chrome_trace(spans), f)
+    return summary_file, trace_file
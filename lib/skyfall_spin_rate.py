@@ -0,0 +1,119 @@
+"""
+Spin rate of the Skyfall payload from the gyroscope
+The three gyroscope axes are cut into overlapping windows with a strided view and every window of every axis is
+transformed by one batched real FFT per block of windows, with no Python loop over windows. The DC bin gives the mean
+angular rate of each window, which is the rotation rate, and the peak of the power summed over the axes gives the
+dominant oscillation frequency of the rates, from tumbling and coning. Only a few values per window are kept, so an
+hour-long record gives a compact time series instead of a full TFR
+"""
+
+# Python libraries
+from typing import NamedTuple, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Duration of each window in s
+SPIN_WINDOW_S = 10.
+# Fraction of each window shared with the next
+SPIN_OVERLAP_FRACTION = 0.5
+# Windows transformed at a time, which bounds the memory of the FFT
+SPIN_BLOCK_WINDOWS = 1024
+
+
+class SpinRate(NamedTuple):
+    """
+    Spin rate time series, one value per window
+
+    epoch_s: time of the center of each window in epoch s
+    rotation_rate_hz: magnitude of the mean angular rate of the window in rotations/s
+    oscillation_hz: dominant frequency of the angular rates in Hz, from the power summed over the three axes
+    oscillation_power_fraction: fraction of the power of the window at the dominant frequency bin
+    """
+    epoch_s: np.ndarray
+    rotation_rate_hz: np.ndarray
+    oscillation_hz: np.ndarray
+    oscillation_power_fraction: np.ndarray
+
+
+def spin_window_points(sample_rate_hz: float,
+                       window_s: float = SPIN_WINDOW_S,
+                       overlap_fraction: float = SPIN_OVERLAP_FRACTION) -> Tuple[int, int]:
+    """
+    :param sample_rate_hz: gyroscope sample rate in Hz
+    :param window_s: duration of each window in s. Default SPIN_WINDOW_S
+    :param overlap_fraction: fraction of each window shared with the next, from 0 to below 1.
+        Default SPIN_OVERLAP_FRACTION
+    :return: points per window and hop in points
+    """
+    if not 0. <= overlap_fraction < 1.:
+        raise ValueError("overlap_fraction must be from 0 to below 1")
+    points_per_window = max(int(round(window_s * sample_rate_hz)), 4)
+    points_hop = max(int(round(points_per_window * (1. - overlap_fraction))), 1)
+    return points_per_window, points_hop
+
+
+def spin_rate(gyroscope_wf_raw: np.ndarray,
+              gyroscope_epoch_s: np.ndarray,
+              sample_rate_hz: float,
+              window_s: float = SPIN_WINDOW_S,
+              overlap_fraction: float = SPIN_OVERLAP_FRACTION,
+              block_windows: int = SPIN_BLOCK_WINDOWS) -> SpinRate:
+    """
+    Rotation rate and dominant oscillation frequency of the gyroscope in sliding windows
+
+    :param gyroscope_wf_raw: raw gyroscope waveforms in rad/s, one row per axis
+    :param gyroscope_epoch_s: time of each sample in epoch s
+    :param sample_rate_hz: gyroscope sample rate in Hz
+    :param window_s: duration of each window in s. Default SPIN_WINDOW_S
+    :param overlap_fraction: fraction of each window shared with the next. Default SPIN_OVERLAP_FRACTION
+    :param block_windows: windows transformed at a time. Default SPIN_BLOCK_WINDOWS
+    :return: SpinRate; empty arrays if the record is shorter than one window
+    """
+    gyroscope_wf_raw = np.atleast_2d(np.asarray(gyroscope_wf_raw, dtype=np.float64))
+    gyroscope_epoch_s = np.asarray(gyroscope_epoch_s, dtype=np.float64)
+    points_per_window, points_hop = spin_window_points(sample_rate_hz, window_s, overlap_fraction)
+    number_points = gyroscope_wf_raw.shape[-1]
+    if number_points < points_per_window:
+        empty = np.empty(0, dtype=np.float64)
+        return SpinRate(empty, empty, empty, empty)
+
+    # Strided view of every window of every axis: axes x windows x points, no copy
+    windows = sliding_window_view(gyroscope_wf_raw, points_per_window, axis=-1)[:, ::points_hop]
+    number_windows = windows.shape[1]
+    taper = np.hanning(points_per_window)
+    frequency_hz = np.fft.rfftfreq(points_per_window, d=1. / sample_rate_hz)
+
+    rotation_rate_hz = np.empty(number_windows, dtype=np.float64)
+    oscillation_hz = np.empty(number_windows, dtype=np.float64)
+    oscillation_power_fraction = np.empty(number_windows, dtype=np.float64)
+    for block_start in range(0, number_windows, block_windows):
+        block = windows[:, block_start:block_start + block_windows]
+        block_end = block_start + block.shape[1]
+
+        # Mean angular rate vector of each window, the DC bin
+        mean_rad_s = np.mean(block, axis=-1, keepdims=True)
+        rotation_rate_hz[block_start:block_end] = np.sqrt(np.sum(mean_rad_s[..., 0]**2, axis=0)) / (2 * np.pi)
+
+        # Power of the demeaned, tapered windows summed over the axes, DC excluded
+        spectrum = np.fft.rfft((block - mean_rad_s) * taper, axis=-1)
+        power = np.sum(spectrum.real**2 + spectrum.imag**2, axis=0)
+        power[:, 0] = 0.
+        peak_bin = np.argmax(power, axis=-1)
+        window_rows = np.arange(power.shape[0])
+        peak_power = power[window_rows, peak_bin]
+
+        # Parabolic interpolation of the peak between its neighbouring bins
+        power_before = power[window_rows, np.maximum(peak_bin - 1, 0)]
+        power_after = power[window_rows, np.minimum(peak_bin + 1, power.shape[1] - 1)]
+        curvature = power_before - 2 * peak_power + power_after
+        with np.errstate(divide='ignore', invalid='ignore'):
+            offset_bins = np.where(curvature < 0, 0.5 * (power_before - power_after) / curvature, 0.)
+            oscillation_power_fraction[block_start:block_end] = peak_power / np.sum(power, axis=-1)
+        oscillation_hz[block_start:block_end] = frequency_hz[peak_bin] + \
+            np.clip(offset_bins, -0.5, 0.5) * sample_rate_hz / points_per_window
+
+    center_index = np.arange(number_windows) * points_hop + points_per_window // 2
+    return SpinRate(epoch_s=gyroscope_epoch_s[center_index],
+                    rotation_rate_hz=rotation_rate_hz,
+                    oscillation_hz=oscillation_hz,
+                    oscillation_power_fraction=np.nan_to_num(oscillation_power_fraction))
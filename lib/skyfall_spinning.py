@@ -1,15 +1,54 @@
 # Python libraries
-import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
 
 # RedVox RedPandas and related RedVox modules
 import lib.skyfall_dw as sf_dw
-import redpandas.redpd_preprocess as rpd_prep
+import lib.skyfall_stations as sf_stations
+import lib.skyfall_figures as sf_figs
+import lib.skyfall_spin_rate as sf_spin
 from libquantum.plot_templates import plot_time_frequency_reps as pnl
 
 # Configuration files
-from redpandas.redpd_config import DataLoadMethod
-from skyfall_config_file import skyfall_config
+from skyfall_config_file import skyfall_config, station_workers, spin_window_s, spin_overlap_fraction
+
+
+def spinning_panda(df: pd.DataFrame,
+                   gyroscope_data_raw_label: str = "gyroscope_wf_raw",
+                   gyroscope_epoch_s_label: str = "gyroscope_epoch_s",
+                   gyroscope_fs_label: str = "gyroscope_sample_rate_hz") -> pd.DataFrame:
+    """
+    Rotation rates of the stations in df. Station analysis for skyfall_stations.run_stations
+
+    :param df: input pandas DataFrame
+    :param gyroscope_data_raw_label: column with the raw gyroscope waveforms in rad/s
+    :param gyroscope_epoch_s_label: column with the gyroscope timestamps in epoch s
+    :param gyroscope_fs_label: column with the gyroscope sample rate in Hz
+    :return: DataFrame with the maximum Z rotation rate in rad/s and Hz, and the spin rate of skyfall_spin_rate in
+        windows of spin_window_s, same index as df. Only these compact results go back through the process pool
+    """
+    max_rotation_rate_rad_s = []
+    spin_rates = []
+    for station in df.index:
+        gyroscope_raw = df[gyroscope_data_raw_label][station]
+        if type(gyroscope_raw) == float:
+            max_rotation_rate_rad_s.append(float("NaN"))
+            spin_rates.append(sf_spin.SpinRate(*[float("NaN")] * len(sf_spin.SpinRate._fields)))
+            continue
+        max_rotation_rate_rad_s.append(np.max(gyroscope_raw[2]))
+        spin_rates.append(sf_spin.spin_rate(gyroscope_wf_raw=gyroscope_raw,
+                                            gyroscope_epoch_s=df[gyroscope_epoch_s_label][station],
+                                            sample_rate_hz=df[gyroscope_fs_label][station],
+                                            window_s=spin_window_s,
+                                            overlap_fraction=spin_overlap_fraction))
+    return pd.DataFrame({"gyroscope_max_rotation_rate_rad_s": max_rotation_rate_rad_s,
+                         "gyroscope_max_rotation_rate_hz": np.array(max_rotation_rate_rad_s) / (2*np.pi),
+                         "gyroscope_spin_epoch_s": [spin.epoch_s for spin in spin_rates],
+                         "gyroscope_spin_rate_hz": [spin.rotation_rate_hz for spin in spin_rates],
+                         "gyroscope_spin_oscillation_hz": [spin.oscillation_hz for spin in spin_rates],
+                         "gyroscope_spin_oscillation_power_fraction":
+                             [spin.oscillation_power_fraction for spin in spin_rates]},
+                        index=df.index)
 
 
 def main():
@@ -34,6 +73,12 @@ def main():
     # Load data options
     df_skyfall_data = sf_dw.dw_main(skyfall_config.tdr_load_method)
 
+    # Get rotation rates of every station, sharded across station_workers processes
+    if gyroscope_data_raw_label in df_skyfall_data.columns:
+        df_spinning = sf_stations.run_stations(df=df_skyfall_data,
+                                               shard_analysis=spinning_panda,
+                                               workers=station_workers)
+
     # Start of building plots
     print("\nInitiating time-domain representation of Skyfall:")
     for station in df_skyfall_data.index:
@@ -50,41 +95,51 @@ def main():
         if gyroscope_data_raw_label and gyroscope_fs_label and gyroscope_data_highpass_label \
                 in df_skyfall_data.columns:
 
-            if skyfall_config.tdr_load_method == DataLoadMethod.PARQUET:
-                # Reshape wf columns
-                rpd_prep.df_column_unflatten(df=df_skyfall_data,
-                                             col_wf_label=gyroscope_data_raw_label,
-                                             col_ndim_label=gyroscope_data_raw_label + "_ndim")
-
-                rpd_prep.df_column_unflatten(df=df_skyfall_data,
-                                             col_wf_label=gyroscope_data_highpass_label,
-                                             col_ndim_label=gyroscope_data_highpass_label + "_ndim")
-
             print('gyroscope_sample_rate_hz:', df_skyfall_data[gyroscope_fs_label][station])
             print('gyroscope_epoch_s_0:', df_skyfall_data[gyroscope_epoch_s_label][station][0],
                   df_skyfall_data[gyroscope_epoch_s_label][station][-1])
-            print('gyroscope max rotation rate, rad/s:',
-                  np.max(df_skyfall_data[gyroscope_data_raw_label][station][2]))
-            print('gyroscope max rotation rate, Hz:',
-                  np.max(df_skyfall_data[gyroscope_data_raw_label][station][2] / (2*np.pi)))
-            # Plot 3c raw gyroscope waveforms
-            pnl.plot_wf_wf_wf_vert(redvox_id=station_id_str,
-                                   wf_panel_2_sig=df_skyfall_data[gyroscope_data_raw_label][station][2] / (2*np.pi),
-                                   wf_panel_2_time=df_skyfall_data[gyroscope_epoch_s_label][station],
-                                   wf_panel_1_sig=df_skyfall_data[gyroscope_data_raw_label][station][1] / (2*np.pi),
-                                   wf_panel_1_time=df_skyfall_data[gyroscope_epoch_s_label][station],
-                                   wf_panel_0_sig=df_skyfall_data[gyroscope_data_raw_label][station][0] / (2*np.pi),
-                                   wf_panel_0_time=df_skyfall_data[gyroscope_epoch_s_label][station],
-                                   start_time_epoch=event_reference_time_epoch_s,
-                                   wf_panel_2_units="Gyr Z, rotation/s",
-                                   wf_panel_1_units="Gyr Y, rotation/s",
-                                   wf_panel_0_units="Gyr X, rotation/s",
-                                   figure_title=skyfall_config.event_name + ": Gyroscope raw",
-                                   figure_title_show=False,
-                                   label_panel_show=True,  # for press
-                                   labels_fontweight='bold')
-
-        plt.show()
+            print('gyroscope max rotation rate, rad/s:', df_spinning["gyroscope_max_rotation_rate_rad_s"][station])
+            print('gyroscope max rotation rate, Hz:', df_spinning["gyroscope_max_rotation_rate_hz"][station])
+            print(f'gyroscope spin rate windows of {spin_window_s} s:',
+                  len(df_spinning["gyroscope_spin_epoch_s"][station]))
+            # Plot 3c raw gyroscope waveforms in rotations/s
+            gyroscope_rotation_rate_hz = df_skyfall_data[gyroscope_data_raw_label][station] / (2*np.pi)
+            sf_figs.plot_figure(f"spinning_{station_id_str}_gyroscope_raw", pnl.plot_wf_wf_wf_vert,
+                                redvox_id=station_id_str,
+                                wf_panel_2_sig=gyroscope_rotation_rate_hz[2],
+                                wf_panel_2_time=df_skyfall_data[gyroscope_epoch_s_label][station],
+                                wf_panel_1_sig=gyroscope_rotation_rate_hz[1],
+                                wf_panel_1_time=df_skyfall_data[gyroscope_epoch_s_label][station],
+                                wf_panel_0_sig=gyroscope_rotation_rate_hz[0],
+                                wf_panel_0_time=df_skyfall_data[gyroscope_epoch_s_label][station],
+                                start_time_epoch=event_reference_time_epoch_s,
+                                wf_panel_2_units="Gyr Z, rotation/s",
+                                wf_panel_1_units="Gyr Y, rotation/s",
+                                wf_panel_0_units="Gyr X, rotation/s",
+                                figure_title=skyfall_config.event_name + ": Gyroscope raw",
+                                figure_title_show=False,
+                                label_panel_show=True,  # for press
+                                labels_fontweight='bold')
+            # Plot the spin rate and the oscillation of the rates in each window
+            if len(df_spinning["gyroscope_spin_epoch_s"][station]) > 0:
+                sf_figs.plot_figure(f"spinning_{station_id_str}_gyroscope_spin_rate", pnl.plot_wf_wf_wf_vert,
+                                    redvox_id=station_id_str,
+                                    wf_panel_2_sig=df_spinning["gyroscope_spin_rate_hz"][station],
+                                    wf_panel_2_time=df_spinning["gyroscope_spin_epoch_s"][station],
+                                    wf_panel_1_sig=df_spinning["gyroscope_spin_oscillation_hz"][station],
+                                    wf_panel_1_time=df_spinning["gyroscope_spin_epoch_s"][station],
+                                    wf_panel_0_sig=df_spinning["gyroscope_spin_oscillation_power_fraction"][station],
+                                    wf_panel_0_time=df_spinning["gyroscope_spin_epoch_s"][station],
+                                    start_time_epoch=event_reference_time_epoch_s,
+                                    wf_panel_2_units="Spin, rotation/s",
+                                    wf_panel_1_units="Oscillation, Hz",
+                                    wf_panel_0_units="Peak power fraction",
+                                    figure_title=skyfall_config.event_name + ": Gyroscope spin rate",
+                                    figure_title_show=False,
+                                    label_panel_show=True,  # for press
+                                    labels_fontweight='bold')
+
+        sf_figs.show_figures("spinning")
 
 
 if __name__ == "__main__":
@@ -4,14 +4,18 @@ import csv
 # RedVox and Red Pandas modules
 from redvox.common.data_window import DataWindow
 
-import redpandas.redpd_datawin as rpd_dw
 import redpandas.redpd_dq as rpd_dq
 from redvox.api1000.wrapped_redvox_packet.station_information import OsType
 import redvox.common.date_time_utils as dt
 from redvox.common.station import Station
 
 # Configuration file
-from skyfall_config_file import skyfall_config
+import lib.skyfall_dw as sf_dw
+import lib.skyfall_catalog as sf_cat
+import lib.skyfall_file_index as sf_fidx
+from redpandas.redpd_config import DataLoadMethod
+from skyfall_config_file import skyfall_config, is_station_catalog, catalog_workers, CATALOG_FILE, \
+    is_file_index, file_index_workers, file_index_prefetch_depth, FILE_INDEX_FILE
 
 
 def station_specs_to_csv(data_window: DataWindow,
@@ -140,20 +144,40 @@ def station_specs_to_csv(data_window: DataWindow,
                                  station.location_sensor().sample_interval_std_s()])
 
 
+def is_catalog_specs() -> bool:
+    """
+    The catalog reads the packet files; a pickled DataWindow may be all there is
+
+    :return: True if the specs are written from the station catalog, False if they need the DataWindow
+    """
+    return is_station_catalog and skyfall_config.tdr_load_method != DataLoadMethod.PICKLE
+
+
 def main():
     """
     Beta workflow for API M pipeline
     """
 
     print("Print and save station information")
+    csv_station_file = skyfall_config.event_name + "_station.csv"
+    csv_station_full_path = os.path.join(skyfall_config.output_dir, csv_station_file)
+
+    if is_catalog_specs():
+        index = sf_fidx.config_file_index(skyfall_config, FILE_INDEX_FILE, file_index_workers,
+                                          file_index_prefetch_depth) if is_file_index else None
+        df_catalog = sf_cat.scan_catalog(skyfall_config, workers=catalog_workers, index=index)
+        print(df_catalog.drop(columns=["sensor_name"]).to_string(index=False))
+        catalog_file = sf_cat.export_catalog(df_catalog, os.path.join(skyfall_config.output_dir, CATALOG_FILE))
+        print("\nSaved station catalog:", catalog_file)
+
+        print("\nSave Station specs to file")
+        sf_cat.catalog_specs_to_csv(df_catalog, csv_station_full_path)
+        return
 
-    rdvx_data = rpd_dw.dw_from_redpd_config(config=skyfall_config)
+    rdvx_data = sf_dw.dw_datawindow(skyfall_config.tdr_load_method)
     rpd_dq.station_metadata(rdvx_data)
 
     print("\nSave Station specs to file")
-    csv_station_file = skyfall_config.event_name + "_station.csv"
-    csv_station_full_path = os.path.join(skyfall_config.output_dir, csv_station_file)
-
     station_specs_to_csv(rdvx_data, csv_station_full_path)
 
 
@@ -0,0 +1,98 @@
+"""
+Station-parallel execution for the Skyfall examples
+Station rows of the RedPandas DataFrame are split into shards, each shard is analyzed on a worker process, and the
+per-station results are merged back into one table in station order
+"""
+
+# Python libraries
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+
+# DataFrame analyzed by the workers, set by the pool initializer
+_STATIONS_DF: Optional[pd.DataFrame] = None
+
+
+def station_row(df: pd.DataFrame, station_id: Optional[str] = None, station_id_label: str = "station_id"):
+    """
+    Index of the row of a station
+
+    :param df: RedPandas DataFrame
+    :param station_id: station to find. Default None returns the first row
+    :param station_id_label: column with the station ids. Default "station_id"
+    :return: index of the station row; raises ValueError if the station is not in df
+    """
+    if station_id is None:
+        return df.index[0]
+    rows = df.index[df[station_id_label] == station_id]
+    if len(rows) == 0:
+        raise ValueError(f"Station {station_id} is not in the DataFrame")
+    return rows[0]
+
+
+def station_rows(df: pd.DataFrame,
+                 station_ids: Optional[Iterable[str]] = None,
+                 station_id_label: str = "station_id") -> pd.Index:
+    """
+    Index of the rows of some stations
+
+    :param df: RedPandas DataFrame
+    :param station_ids: stations to find, e.g. skyfall_config.station_ids. Default None, or empty, returns all rows
+    :param station_id_label: column with the station ids. Default "station_id"
+    :return: index of the station rows, in the order of station_ids; raises ValueError if a station is not in df
+    """
+    if not station_ids:
+        return df.index
+    return pd.Index([station_row(df, station_id, station_id_label) for station_id in station_ids])
+
+
+def station_shards(df: pd.DataFrame, number_shards: int) -> List[pd.Index]:
+    """
+    Split the station rows into contiguous shards of about the same number of rows
+
+    :param df: RedPandas DataFrame
+    :param number_shards: number of shards; fewer are returned if df has fewer rows
+    :return: list of row indexes
+    """
+    number_shards = max(1, min(number_shards, len(df.index)))
+    return [df.index[shard] for shard in np.array_split(np.arange(len(df.index)), number_shards)]
+
+
+def _init_station_worker(df: pd.DataFrame) -> None:
+    """
+    Keep the DataFrame in the worker; with fork it is inherited from the parent instead of copied
+    """
+    global _STATIONS_DF
+    _STATIONS_DF = df
+
+
+def _run_shard(shard_analysis: Callable[[pd.DataFrame], pd.DataFrame], shard: pd.Index) -> pd.DataFrame:
+    """
+    Analyze one shard of the DataFrame kept by _init_station_worker
+    """
+    return shard_analysis(_STATIONS_DF.loc[shard])
+
+
+def run_stations(df: pd.DataFrame,
+                 shard_analysis: Callable[[pd.DataFrame], pd.DataFrame],
+                 workers: int = 1) -> pd.DataFrame:
+    """
+    Run a per-station analysis over all station rows, sharded across worker processes
+
+    :param df: RedPandas DataFrame
+    :param shard_analysis: function of a DataFrame with some of the station rows; returns a DataFrame with the
+        results, one row per station with the same index. Must be importable to run on the process pool
+    :param workers: number of worker processes; 1 analyzes all stations in this process. Default 1
+    :return: results of all stations merged in the row order of df
+    """
+    if workers == 1 or len(df.index) < 2:
+        return shard_analysis(df)
+
+    shards = station_shards(df, workers)
+    context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=context,
+                             initializer=_init_station_worker, initargs=(df,)) as executor:
+        shard_results = list(executor.map(_run_shard, [shard_analysis]*len(shards), shards))
+    return pd.concat(shard_results).reindex(df.index)
@@ -0,0 +1,220 @@
+"""
+Synthetic Skyfall-shaped RedPandas DataFrame
+Same columns, dtypes and array shapes as redpd_df.redpd_dataframe for the audio, barometer, accelerometer, gyroscope,
+magnetometer, location and health sensors, for any number of stations and any duration. Used by
+skyfall_benchmark.py to time the examples without the downloaded data set
+"""
+
+# Python libraries
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+# RedVox RedPandas and related RedVox modules
+import redpandas
+
+# Skyfall phone, first station id of the synthetic data
+SYNTHETIC_STATION_ID_0 = 1637610021
+# Balloon burst altitude and start of the Skyfall event
+SYNTHETIC_ALTITUDE_M = 36000.
+SYNTHETIC_START_EPOCH_S = 1603806314.
+# Scale height of the isothermal atmosphere used for the barometer
+SCALE_HEIGHT_M = 7600.
+
+
+def synthetic_altitude_m(elapsed_s: np.ndarray, duration_s: float) -> np.ndarray:
+    """
+    Fall from SYNTHETIC_ALTITUDE_M, fast at first and slowing down near the ground
+
+    :param elapsed_s: time since the start in s
+    :param duration_s: duration of the fall in s
+    :return: altitude in m
+    """
+    return SYNTHETIC_ALTITUDE_M * (1. - np.clip(elapsed_s / duration_s, 0., 1.))**2
+
+
+def synthetic_spin_hz(elapsed_s: np.ndarray, duration_s: float) -> np.ndarray:
+    """
+    Spin rate of the payload: spins up during the fall and slows down near the ground
+
+    :param elapsed_s: time since the start in s
+    :param duration_s: duration of the fall in s
+    :return: rotation rate in Hz
+    """
+    return 4. * np.sin(np.pi * np.clip(elapsed_s / duration_s, 0., 1.))**2
+
+
+def synthetic_sensor_3c(station_id: str,
+                        sensor_label: str,
+                        sample_rate_hz: float,
+                        samples_3c: np.ndarray,
+                        epoch_s: np.ndarray) -> Dict:
+    """
+    Columns of a barometer or X/Y/Z sensor, as in redpd_build_station.build_station
+
+    :param station_id: station id, only used in the sensor name
+    :param sensor_label: 'barometer', 'accelerometer', 'gyroscope' or 'magnetometer'
+    :param sample_rate_hz: sample rate in Hz
+    :param samples_3c: raw samples, (1, samples) for the barometer and (3, samples) otherwise
+    :param epoch_s: timestamps in epoch s
+    :return: dictionary with the sensor columns
+    """
+    # The mean removal stands in for the highpass filter; shapes and dtypes are what matter here
+    return {f'{sensor_label}_sensor_name': f'synthetic {sensor_label} {station_id}',
+            f'{sensor_label}_sample_rate_hz': sample_rate_hz,
+            f'{sensor_label}_epoch_s': epoch_s,
+            f'{sensor_label}_wf_raw': samples_3c,
+            f'{sensor_label}_wf_highpass': samples_3c - np.mean(samples_3c, axis=1, keepdims=True),
+            f'{sensor_label}_nans': np.argwhere(np.isnan(samples_3c))}
+
+
+def synthetic_station(station_id: str,
+                      duration_s: float,
+                      audio_sample_rate_hz: float,
+                      barometer_sample_rate_hz: float,
+                      imu_sample_rate_hz: float,
+                      location_sample_rate_hz: float,
+                      health_sample_rate_hz: float,
+                      start_epoch_s: float,
+                      rng: np.random.Generator) -> Dict:
+    """
+    Columns of one station, as in redpd_build_station.station_to_dict_from_dw
+
+    :param station_id: station id
+    :param duration_s: duration of the record in s
+    :param audio_sample_rate_hz: audio sample rate in Hz
+    :param barometer_sample_rate_hz: barometer sample rate in Hz
+    :param imu_sample_rate_hz: accelerometer, gyroscope and magnetometer sample rate in Hz
+    :param location_sample_rate_hz: location sample rate in Hz
+    :param health_sample_rate_hz: health sample rate in Hz
+    :param start_epoch_s: first timestamp in epoch s
+    :param rng: random number generator for the noise
+    :return: dictionary with the station columns
+    """
+    def elapsed(sample_rate_hz: float) -> np.ndarray:
+        return np.arange(int(duration_s * sample_rate_hz)) / sample_rate_hz
+
+    station = {"station_id": station_id,
+               'station_start_date_epoch_micros': start_epoch_s * 1E6,
+               'station_make': 'synthetic',
+               'station_model': 'synthetic',
+               'station_app_version': 'synthetic',
+               'redvox_sdk_version': 'synthetic',
+               'redpandas_version': redpandas.VERSION}
+
+    # Audio: noise with a tone that follows the fall
+    audio_s = elapsed(audio_sample_rate_hz)
+    audio_wf_raw = 0.1 * rng.standard_normal(len(audio_s)) + \
+        np.sin(2 * np.pi * (audio_sample_rate_hz / 16.) * audio_s * (1. + audio_s / duration_s))
+    station.update({'audio_sensor_name': f'synthetic audio {station_id}',
+                    'audio_sample_rate_nominal_hz': audio_sample_rate_hz,
+                    'audio_sample_rate_corrected_hz': audio_sample_rate_hz,
+                    'audio_epoch_s': start_epoch_s + audio_s,
+                    'audio_wf_raw': audio_wf_raw,
+                    'audio_wf': audio_wf_raw - np.mean(audio_wf_raw),
+                    'audio_nans': []})
+
+    # Barometer: isothermal atmosphere along the fall, in kPa
+    barometer_s = elapsed(barometer_sample_rate_hz)
+    pressure_kpa = 101.325 * np.exp(-synthetic_altitude_m(barometer_s, duration_s) / SCALE_HEIGHT_M)
+    station.update(synthetic_sensor_3c(station_id, 'barometer', barometer_sample_rate_hz,
+                                       (pressure_kpa + 0.001 * rng.standard_normal(len(barometer_s)))[np.newaxis, :],
+                                       start_epoch_s + barometer_s))
+
+    # IMU: gravity on Z, and a spin about Z seen by the gyroscope and the magnetometer
+    imu_s = elapsed(imu_sample_rate_hz)
+    spin_hz = synthetic_spin_hz(imu_s, duration_s)
+    spin_phase = 2 * np.pi * np.cumsum(spin_hz) / imu_sample_rate_hz
+    accelerometer = 0.1 * rng.standard_normal((3, len(imu_s)))
+    accelerometer[2] += 9.81
+    gyroscope = 0.01 * rng.standard_normal((3, len(imu_s)))
+    gyroscope[2] += 2 * np.pi * spin_hz
+    magnetometer = 0.5 * rng.standard_normal((3, len(imu_s)))
+    magnetometer[0] += 30. * np.cos(spin_phase)
+    magnetometer[1] += 30. * np.sin(spin_phase)
+    magnetometer[2] -= 40.
+    for sensor_label, samples_3c in zip(['accelerometer', 'gyroscope', 'magnetometer'],
+                                        [accelerometer, gyroscope, magnetometer]):
+        station.update(synthetic_sensor_3c(station_id, sensor_label, imu_sample_rate_hz, samples_3c,
+                                           start_epoch_s + imu_s))
+
+    # Location: drift to the east while falling
+    location_s = elapsed(location_sample_rate_hz)
+    altitude_m = synthetic_altitude_m(location_s, duration_s)
+    number_locations = len(location_s)
+    station.update({'location_sensor_name': f'synthetic location {station_id}',
+                    'location_sample_rate_hz': location_sample_rate_hz,
+                    'location_epoch_s': start_epoch_s + location_s,
+                    'location_gps_epoch_s': start_epoch_s + location_s,
+                    'location_latitude': 35.8 + 1E-6 * rng.standard_normal(number_locations),
+                    'location_longitude': -115.4 + 0.1 * location_s / duration_s,
+                    'location_altitude': altitude_m,
+                    'location_bearing': np.full(number_locations, 90.),
+                    'location_speed': np.abs(np.gradient(altitude_m, location_s)) if number_locations > 1
+                    else np.zeros(number_locations),
+                    'location_horizontal_accuracy': np.full(number_locations, 5.),
+                    'location_vertical_accuracy': np.full(number_locations, 10.),
+                    'location_bearing_accuracy': np.full(number_locations, 1.),
+                    'location_speed_accuracy': np.full(number_locations, 1.),
+                    'location_provider': np.ones(number_locations)})
+
+    # Health
+    health_s = elapsed(health_sample_rate_hz)
+    number_health = len(health_s)
+    station.update({'health_sensor_name': f'synthetic health {station_id}',
+                    'health_sample_rate_hz': health_sample_rate_hz,
+                    'health_epoch_s': start_epoch_s + health_s,
+                    'battery_charge_remaining_per': 100. - 10. * health_s / duration_s,
+                    'battery_current_strength_mA': np.full(number_health, -300.),
+                    'internal_temp_deg_C': 20. - 40. * health_s / duration_s,
+                    'network_type': np.zeros(number_health),
+                    'network_strength_dB': np.full(number_health, -90.),
+                    'power_state': np.ones(number_health),
+                    'available_ram_byte': np.full(number_health, 2E9),
+                    'available_disk_byte': np.full(number_health, 2E10),
+                    'cell_service_state': np.zeros(number_health)})
+    return station
+
+
+def synthetic_skyfall_df(number_stations: int = 1,
+                         duration_s: float = 1800.,
+                         audio_sample_rate_hz: float = 800.,
+                         barometer_sample_rate_hz: float = 30.,
+                         imu_sample_rate_hz: float = 400.,
+                         location_sample_rate_hz: float = 1.,
+                         health_sample_rate_hz: float = 0.1,
+                         start_epoch_s: float = SYNTHETIC_START_EPOCH_S,
+                         station_ids: Optional[List[str]] = None,
+                         seed: int = 0) -> pd.DataFrame:
+    """
+    Build a synthetic RedPandas DataFrame shaped like the Skyfall data
+
+    :param number_stations: number of stations (rows). Default 1
+    :param duration_s: duration of every sensor record in s. Default 1800, the Skyfall event
+    :param audio_sample_rate_hz: audio sample rate in Hz, 800 to 48000 for RedVox phones. Default 800
+    :param barometer_sample_rate_hz: barometer sample rate in Hz. Default 30
+    :param imu_sample_rate_hz: accelerometer, gyroscope and magnetometer sample rate in Hz. Default 400
+    :param location_sample_rate_hz: location sample rate in Hz. Default 1
+    :param health_sample_rate_hz: health sample rate in Hz. Default 0.1
+    :param start_epoch_s: first timestamp in epoch s. Default SYNTHETIC_START_EPOCH_S
+    :param station_ids: optional list of number_stations station ids. Default None numbers them from the
+        Skyfall phone id
+    :param seed: seed of the noise; the same arguments always give the same DataFrame. Default 0
+    :return: pandas DataFrame with one row per station
+    """
+    if station_ids is None:
+        station_ids = [str(SYNTHETIC_STATION_ID_0 + n) for n in range(number_stations)]
+    if len(station_ids) != number_stations:
+        raise ValueError(f"Expected {number_stations} station ids, got {len(station_ids)}")
+
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame([synthetic_station(station_id=station_id,
+                                           duration_s=duration_s,
+                                           audio_sample_rate_hz=audio_sample_rate_hz,
+                                           barometer_sample_rate_hz=barometer_sample_rate_hz,
+                                           imu_sample_rate_hz=imu_sample_rate_hz,
+                                           location_sample_rate_hz=location_sample_rate_hz,
+                                           health_sample_rate_hz=health_sample_rate_hz,
+                                           start_epoch_s=start_epoch_s,
+                                           rng=rng)
+                         for station_id in station_ids])
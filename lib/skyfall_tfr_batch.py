@@ -0,0 +1,172 @@
+"""
+Batched Time Frequency Representation of several sensors
+Every channel (audio, barometer, each X/Y/Z axis) is an independent transform, computed on a pool of workers
+"""
+
+# Python libraries
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# RedVox RedPandas and related RedVox modules
+import redpandas.redpd_tfr as rpd_tfr
+import lib.skyfall_tfr_stream as sf_stream
+import lib.skyfall_tfr_cache as sf_cache
+import lib.skyfall_spans as sf_spans
+
+
+class TFRJob(NamedTuple):
+    """
+    Columns in and out of the TFR of one sensor, same as the arguments of redpd_tfr.tfr_bits_panda
+
+    sig_wf_label: waveform column; 1D (audio) or 2D (barometer and X/Y/Z sensors) arrays
+    sig_sample_rate_label: sample rate column, in Hz
+    new_column_tfr_bits: new column with the TFR in bits
+    new_column_tfr_time_s: new column with the TFR timestamps in s
+    new_column_tfr_frequency_hz: new column with the TFR frequencies in Hz
+    """
+    sig_wf_label: str
+    sig_sample_rate_label: str
+    new_column_tfr_bits: str
+    new_column_tfr_time_s: str
+    new_column_tfr_frequency_hz: str
+
+
+def tfr_channel(sig_wf: np.ndarray,
+                sig_sample_rate_hz: float,
+                order_number_input: float,
+                tfr_type: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calculate the TFR of a single channel with redpd_tfr.tfr_bits_panda, so the result is the same as the
+    serial computation
+
+    :param sig_wf: 1D signal waveform
+    :param sig_sample_rate_hz: sample rate in Hz
+    :param order_number_input: band order Nth
+    :param tfr_type: 'cwt' or 'stft'
+    :return: tfr in bits, tfr time in s, tfr frequency in Hz
+    """
+    df_channel = pd.DataFrame({"sig_wf": [sig_wf], "sig_sample_rate_hz": [sig_sample_rate_hz]})
+    with sf_spans.span("tfr_bits_panda", sample_rate_hz=float(sig_sample_rate_hz), samples=len(sig_wf),
+                       tfr_type=tfr_type):
+        rpd_tfr.tfr_bits_panda(df=df_channel,
+                               sig_wf_label="sig_wf",
+                               sig_sample_rate_label="sig_sample_rate_hz",
+                               order_number_input=order_number_input,
+                               tfr_type=tfr_type)
+    return df_channel["tfr_bits"][0], df_channel["tfr_time_s"][0], df_channel["tfr_frequency_hz"][0]
+
+
+def _tfr_channel_args(args: Tuple[np.ndarray, float, float, str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Unpack arguments for tfr_channel when called from a worker pool
+    """
+    return tfr_channel(*args)
+
+
+def tfr_bits_panda_batch(df: pd.DataFrame,
+                         tfr_jobs: List[TFRJob],
+                         order_number_input: float = 3,
+                         tfr_type: str = 'cwt',
+                         workers: Optional[int] = None,
+                         stream_dir: Optional[str] = None,
+                         cache_dir: Optional[str] = None,
+                         max_cache_bytes: float = 2**31) -> pd.DataFrame:
+    """
+    Calculate Time Frequency Representation for several sensors at once. Equivalent to calling
+    redpd_tfr.tfr_bits_panda for each job, with every channel of every station computed in parallel
+
+    :param df: input pandas data frame
+    :param tfr_jobs: list of TFRJob with the input and output columns of each sensor
+    :param order_number_input: band order Nth
+    :param tfr_type: 'cwt' or 'stft'
+    :param workers: number of worker processes; 1 computes the channels one after another in this process.
+        Default None uses all cores
+    :param stream_dir: optional directory. If given, 1D waveforms (audio) with tfr_type 'stft' are transformed in
+        blocks by skyfall_tfr_stream in this process and their bits are memory-mapped .npy files in stream_dir.
+        Default None
+    :param cache_dir: optional directory of the skyfall_tfr_cache store. If given, channels already in the store are
+        loaded instead of computed and new results are added to it; streamed channels are not stored. Default None
+    :param max_cache_bytes: size limit of the store in bytes, least recently used entries are removed first.
+        Default 2 GiB
+    :return: input dataframe with new columns
+    """
+    # One task per channel: (job number, station row, axis or None for 1D waveforms)
+    channels = []
+    channel_args = []
+    channel_keys = []
+    tfr_by_channel = {}
+    stream_channels = []
+    stream_args = []
+    for job_number, job in enumerate(tfr_jobs):
+        for n in df.index:
+            if job.sig_wf_label not in df.columns or type(df[job.sig_wf_label][n]) == float:
+                continue
+            sig_wf = df[job.sig_wf_label][n]
+            if stream_dir is not None and tfr_type == "stft" and sig_wf.ndim == 1:
+                stream_channels.append((job_number, n, None))
+                stream_args.append((sig_wf, df[job.sig_sample_rate_label][n], order_number_input,
+                                    os.path.join(stream_dir, f"{job.new_column_tfr_bits}_{n}.npy")))
+                continue
+            axes = [None] if sig_wf.ndim == 1 else range(len(sig_wf))
+            for axis in axes:
+                args = (sig_wf if axis is None else sig_wf[axis],
+                        df[job.sig_sample_rate_label][n], order_number_input, tfr_type)
+                if cache_dir is not None:
+                    key = sf_cache.tfr_cache_key(args[0], args[1], order_number_input, tfr_type, job.sig_wf_label)
+                    tfr_cached = sf_cache.load_tfr(cache_dir, key)
+                    if tfr_cached is not None:
+                        tfr_by_channel[(job_number, n, axis)] = tfr_cached
+                        continue
+                    channel_keys.append(key)
+                channels.append((job_number, n, axis))
+                channel_args.append(args)
+
+    executor = None
+    try:
+        if workers == 1 or len(channel_args) < 2:
+            channel_tfr = map(_tfr_channel_args, channel_args)
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            # Results come back in submission order, so the output does not depend on scheduling
+            channel_tfr = sf_spans.map_with_spans(executor, _tfr_channel_args, channel_args)
+
+        # Streamed channels run here while the pool works on the others
+        tfr_by_channel.update((channel, sf_stream.stft_bits_stream(*args))
+                              for channel, args in zip(stream_channels, stream_args))
+        for channel_number, tfr in enumerate(channel_tfr):
+            tfr_by_channel[channels[channel_number]] = tfr
+            if cache_dir is not None:
+                sf_cache.save_tfr(cache_dir, channel_keys[channel_number], tfr, max_cache_bytes)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    # Collect in the same layout as tfr_bits_panda: arrays for 1D waveforms, stacked X/Y/Z for 2D
+    for job_number, job in enumerate(tfr_jobs):
+        tfr_bits = []
+        tfr_time_s = []
+        tfr_frequency_hz = []
+        for n in df.index:
+            if (job_number, n, None) in tfr_by_channel:
+                bits, time_s, frequency_hz = tfr_by_channel[(job_number, n, None)]
+                tfr_bits.append(bits)
+                tfr_time_s.append(time_s)
+                tfr_frequency_hz.append(frequency_hz)
+            elif (job_number, n, 0) in tfr_by_channel:
+                tfr_3c = [tfr_by_channel[(job_number, n, axis)] for axis in range(len(df[job.sig_wf_label][n]))]
+                tfr_bits.append(np.array([tfr[0] for tfr in tfr_3c]))
+                tfr_time_s.append(np.array([tfr[1] for tfr in tfr_3c]))
+                tfr_frequency_hz.append(np.array([tfr[2] for tfr in tfr_3c]))
+            else:
+                tfr_bits.append(float("NaN"))
+                tfr_time_s.append(float("NaN"))
+                tfr_frequency_hz.append(float("NaN"))
+
+        df[job.new_column_tfr_bits] = tfr_bits
+        df[job.new_column_tfr_time_s] = tfr_time_s
+        df[job.new_column_tfr_frequency_hz] = tfr_frequency_hz
+
+    return df
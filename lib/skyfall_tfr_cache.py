@@ -0,0 +1,99 @@
+"""
+On-disk store of single channel TFR results
+Entries are keyed by a hash of the waveform and the parameters that change the transform, so plot-only
+settings such as mesh_color_range and mesh_color_scale reuse earlier results. Least recently used entries
+are removed when the store grows past its size limit
+"""
+
+# Python libraries
+import os
+import json
+import hashlib
+from typing import Optional, Tuple
+import numpy as np
+
+
+def tfr_cache_key(sig_wf: np.ndarray,
+                  sig_sample_rate_hz: float,
+                  order_number_input: float,
+                  tfr_type: str,
+                  sig_wf_label: str) -> str:
+    """
+    Hash the waveform and the parameters of its TFR
+
+    :param sig_wf: 1D signal waveform
+    :param sig_sample_rate_hz: sample rate in Hz
+    :param order_number_input: band order Nth
+    :param tfr_type: 'cwt' or 'stft'
+    :param sig_wf_label: waveform column name, distinguishes highpass from raw data
+    :return: hexadecimal key
+    """
+    tfr_parameters = {"sample_rate_hz": float(sig_sample_rate_hz),
+                      "order_number": float(order_number_input),
+                      "tfr_type": tfr_type,
+                      "sig_wf_label": sig_wf_label,
+                      "dtype": str(sig_wf.dtype),
+                      "shape": list(np.shape(sig_wf))}
+    key = hashlib.sha256(json.dumps(tfr_parameters, sort_keys=True).encode())
+    key.update(np.ascontiguousarray(sig_wf).data)
+    return key.hexdigest()
+
+
+def load_tfr(cache_dir: str, key: str) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Load a stored TFR and mark it as recently used
+
+    :param cache_dir: directory of the TFR store
+    :param key: key from tfr_cache_key
+    :return: tfr in bits, tfr time in s, tfr frequency in Hz; None if not stored
+    """
+    cache_file = os.path.join(cache_dir, key + ".npz")
+    if not os.path.exists(cache_file):
+        return None
+    with np.load(cache_file) as tfr:
+        tfr_bits, tfr_time_s, tfr_frequency_hz = tfr["tfr_bits"], tfr["tfr_time_s"], tfr["tfr_frequency_hz"]
+    os.utime(cache_file)  # Modification time orders the entries for eviction
+    return tfr_bits, tfr_time_s, tfr_frequency_hz
+
+
+def save_tfr(cache_dir: str,
+             key: str,
+             tfr: Tuple[np.ndarray, np.ndarray, np.ndarray],
+             max_cache_bytes: float) -> None:
+    """
+    Store a TFR, then evict least recently used entries until the store fits in max_cache_bytes
+
+    :param cache_dir: directory of the TFR store
+    :param key: key from tfr_cache_key
+    :param tfr: tfr in bits, tfr time in s, tfr frequency in Hz
+    :param max_cache_bytes: size limit of the store in bytes
+    :return: save .npz file to cache directory
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_file = os.path.join(cache_dir, key + ".npz")
+    # np.savez adds the extension, so the temporary name must end in .npz too
+    tmp_file = os.path.join(cache_dir, key + ".tmp.npz")
+    np.savez(tmp_file, tfr_bits=tfr[0], tfr_time_s=tfr[1], tfr_frequency_hz=tfr[2])
+    os.replace(tmp_file, cache_file)
+    evict_lru(cache_dir, max_cache_bytes)
+
+
+def evict_lru(cache_dir: str, max_cache_bytes: float) -> None:
+    """
+    Remove the least recently used entries until the store fits in max_cache_bytes
+
+    :param cache_dir: directory of the TFR store
+    :param max_cache_bytes: size limit of the store in bytes
+    """
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith(".npz") and not entry.name.endswith(".tmp.npz"):
+            entry_stat = entry.stat()
+            entries.append((entry_stat.st_mtime_ns, entry_stat.st_size, entry.path))
+
+    cache_bytes = sum(entry_size for _, entry_size, _ in entries)
+    for _, entry_size, entry_path in sorted(entries):
+        if cache_bytes <= max_cache_bytes:
+            break
+        os.remove(entry_path)
+        cache_bytes -= entry_size
@@ -1,16 +1,16 @@
 # Python libraries
-import matplotlib.pyplot as plt
 
 # RedVox RedPandas and related RedVox modules
 import redpandas.redpd_plot.mesh as rpd_plot
-import redpandas.redpd_tfr as rpd_tfr
-import redpandas.redpd_datawin as rpd_dw
-import redpandas.redpd_df as rpd_df
 from libquantum.plot_templates import plot_time_frequency_reps as pnl
 import lib.skyfall_dw as sf_dw
+import lib.skyfall_stations as sf_stations
+import lib.skyfall_tfr_batch as sf_tfr
+import lib.skyfall_figures as sf_figs
 
 # Configuration file
-from skyfall_config_file import skyfall_config, tfr_config
+from skyfall_config_file import skyfall_config, tfr_config, is_tfr_stream_audio, TFR_STREAM_DIR, \
+    is_tfr_cache, tfr_cache_max_bytes, TFR_CACHE_DIR
 
 
 def main():
@@ -69,242 +69,216 @@ def main():
 
     axes = ["X", "Y", "Z"]  # axes sensors
 
-    # 1. Load RedVox DataWindow
-    print("Constructing RedVox DataWindow...", end=" ")
-    rdvx_data = rpd_dw.dw_from_redpd_config(config=skyfall_config)
-    print(f"Done. RedVox SDK version: {rdvx_data.sdk_version()}")
-
-    # 2. Make RedPandas DataFrame
-    df_skyfall_data = rpd_df.redpd_dataframe(rdvx_data, skyfall_config.sensor_labels)
+    # 1-2. Load RedVox DataWindow and make RedPandas DataFrame, shared with the other examples
+    df_skyfall_data = sf_dw.dw_main(skyfall_config.tdr_load_method)
     print(f"RedVox SDK version: {df_skyfall_data['redpandas_version'][0]}")
 
     # 3. Start building TFR plots
     print("\nInitiating time-frequency representation of Skyfall:"
           f"\ntfr_type: {tfr_config.tfr_type}, order: {tfr_config.tfr_order_number_N}")
 
-    # Get the station id
-    station_id_str = df_skyfall_data[station_label][0]
-
-    # Microphone sensor stats
-    print(f'\nmic_sample_rate_hz: {df_skyfall_data[audio_fs_label][0]}'
-          f'\nmic_epoch_s_0: {df_skyfall_data[audio_epoch_s_label][0][0]}')
-
-    # Frame to mic start and end and plots
-    event_reference_time_epoch_s = df_skyfall_data[audio_epoch_s_label][0][0]
-
-    # Calculate Time Frequency Representation for microphone
-    print('Starting tfr_bits_panda for mic:')
-    df_skyfall_data = rpd_tfr.tfr_bits_panda(df=df_skyfall_data,
-                                             sig_wf_label=audio_data_label,
-                                             sig_sample_rate_label=audio_fs_label,
-                                             order_number_input=tfr_config.tfr_order_number_N,
-                                             tfr_type=tfr_config.tfr_type,
-                                             new_column_tfr_bits=audio_tfr_bits_label,
-                                             new_column_tfr_frequency_hz=audio_tfr_frequency_hz_label,
-                                             new_column_tfr_time_s=audio_tfr_time_s_label)
-    # Plot microphone TFR
-    pnl.plot_wf_mesh_vert(redvox_id=station_id_str,
-                          wf_panel_2_sig=df_skyfall_data[audio_data_label][0],
-                          wf_panel_2_time=df_skyfall_data[audio_epoch_s_label][0],
-                          mesh_time=df_skyfall_data[audio_tfr_time_s_label][0],
-                          mesh_frequency=df_skyfall_data[audio_tfr_frequency_hz_label][0],
-                          mesh_panel_0_tfr=df_skyfall_data[audio_tfr_bits_label][0],
-                          figure_title=skyfall_config.event_name +
-                                       f": Audio, {tfr_config.tfr_type.upper()} and waveform",
-                          start_time_epoch=event_reference_time_epoch_s,
-                          mesh_panel_0_color_range=tfr_config.mc_range['Audio'],
-                          mesh_panel_0_colormap_scaling=tfr_config.mc_scale['Audio'],
-                          figure_title_show=tfr_config.show_fig_titles,
-                          wf_panel_2_units="Audio, Norm")
-
-    # Barometer sensor stats
-    print(f'\nbarometer_sample_rate_hz: {df_skyfall_data[barometer_fs_label][0]}'
-          f'\nbarometer_epoch_s_0: {df_skyfall_data[barometer_epoch_s_label][0][0]}')
-
-    barometer_tfr_start_epoch: float = df_skyfall_data[barometer_epoch_s_label][0][0]  # first timestamp
+    # Use highpass or raw waveforms
     if tfr_config.sensor_hp['Bar']:
         bar_sig_label, bar_hp_raw = barometer_data_highpass_label, 'hp'
     else:
         bar_sig_label, bar_hp_raw = barometer_data_raw_label, 'raw'
-
-    # Calculate Time Frequency Representation for barometer
-    print('Starting tfr_bits_panda for barometer:')
-    df_skyfall_data = rpd_tfr.tfr_bits_panda(df=df_skyfall_data,
-                                             sig_wf_label=bar_sig_label,
-                                             sig_sample_rate_label=barometer_fs_label,
-                                             order_number_input=tfr_config.tfr_order_number_N,
-                                             tfr_type=tfr_config.tfr_type,
-                                             new_column_tfr_bits=barometer_tfr_bits_label,
-                                             new_column_tfr_frequency_hz=barometer_tfr_frequency_hz_label,
-                                             new_column_tfr_time_s=barometer_tfr_time_s_label)
-
-    # Plot barometer TFR
-    pnl.plot_wf_mesh_vert(redvox_id=station_id_str,
-                          wf_panel_2_sig=df_skyfall_data[bar_sig_label][0][0],
-                          wf_panel_2_time=df_skyfall_data[barometer_epoch_s_label][0],
-                          mesh_time=df_skyfall_data[barometer_tfr_time_s_label][0][0],
-                          mesh_frequency=df_skyfall_data[barometer_tfr_frequency_hz_label][0][0],
-                          mesh_panel_0_tfr=df_skyfall_data[barometer_tfr_bits_label][0][0],
-                          mesh_panel_0_colormap_scaling=tfr_config.mc_scale["Bar"],
-                          mesh_panel_0_color_range=tfr_config.mc_range["Bar"],
-                          figure_title=skyfall_config.event_name +
-                                       f": Barometer, {tfr_config.tfr_type.upper()} and waveform",
-                          start_time_epoch=barometer_tfr_start_epoch,
-                          figure_title_show=tfr_config.show_fig_titles,
-                          wf_panel_2_units=f"Bar {bar_hp_raw}, kPa")
-
-    # Acceleration sensor stats
-    print(f'\naccelerometer_sample_rate_hz: {df_skyfall_data[accelerometer_fs_label][0]}'
-          f'\naccelerometer_epoch_s_0: {df_skyfall_data[accelerometer_epoch_s_label][0][0]}')
-
-    acceleromter_tfr_start_epoch: float = df_skyfall_data[accelerometer_epoch_s_label][0][0]  # first timestamp
     if tfr_config.sensor_hp['Acc']:
         acc_sig_label, acc_hp_raw = accelerometer_data_highpass_label, 'hp'
     else:
         acc_sig_label, acc_hp_raw = accelerometer_data_raw_label, 'raw'
-
-    # Calculate Time Frequency Representation for accelerometer
-    print('Starting tfr_bits_panda for 3 channel acceleration:')
-    df_skyfall_data = rpd_tfr.tfr_bits_panda(df=df_skyfall_data,
-                                             sig_wf_label=acc_sig_label,
-                                             sig_sample_rate_label=accelerometer_fs_label,
-                                             order_number_input=tfr_config.tfr_order_number_N,
-                                             tfr_type=tfr_config.tfr_type,
-                                             new_column_tfr_bits=accelerometer_tfr_bits_label,
-                                             new_column_tfr_frequency_hz=accelerometer_tfr_frequency_hz_label,
-                                             new_column_tfr_time_s=accelerometer_tfr_time_s_label)
-    # Plot X, Y, Z accelerometer TFR
-    for ax_n in range(3):
-        pnl.plot_wf_mesh_vert(redvox_id=station_id_str,
-                              wf_panel_2_sig=df_skyfall_data[acc_sig_label][0][ax_n],
-                              wf_panel_2_time=df_skyfall_data[accelerometer_epoch_s_label][0],
-                              mesh_time=df_skyfall_data[accelerometer_tfr_time_s_label][0][ax_n],
-                              mesh_frequency=df_skyfall_data[accelerometer_tfr_frequency_hz_label][0][ax_n],
-                              mesh_panel_0_tfr=df_skyfall_data[accelerometer_tfr_bits_label][0][ax_n],
-                              mesh_panel_0_colormap_scaling=tfr_config.mc_scale["Acc"],
-                              mesh_panel_0_color_range=tfr_config.mc_range["Acc"],
-                              figure_title=skyfall_config.event_name +
-                                           f": Accelerometer, {tfr_config.tfr_type.upper()} and waveform",
-                              start_time_epoch=acceleromter_tfr_start_epoch,
-                              figure_title_show=tfr_config.show_fig_titles,
-                              wf_panel_2_units=f"Acc {axes[ax_n]} {acc_hp_raw}, m/$s^2$")
-
-    # Gyroscope sensor stats
-    print(f'\ngyroscope_sample_rate_hz: {df_skyfall_data[gyroscope_fs_label][0]}'
-          f'\ngyroscope_epoch_s_0: {df_skyfall_data[gyroscope_epoch_s_label][0][0]}')
-
-    gyroscope_tfr_start_epoch: float = df_skyfall_data[gyroscope_epoch_s_label][0][0]  # first timestamp
     if tfr_config.sensor_hp['Gyr']:
         gyr_sig_label, gyr_hp_raw = gyroscope_data_highpass_label, 'hp'
     else:
         gyr_sig_label, gyr_hp_raw = gyroscope_data_raw_label, 'raw'
-
-    # Calculate Time Frequency Representation for gyroscope
-    print('Starting tfr_bits_panda for 3 channel gyroscope:')
-    df_skyfall_data = rpd_tfr.tfr_bits_panda(df=df_skyfall_data,
-                                             sig_wf_label=gyr_sig_label,
-                                             sig_sample_rate_label=gyroscope_fs_label,
-                                             order_number_input=tfr_config.tfr_order_number_N,
-                                             tfr_type=tfr_config.tfr_type,
-                                             new_column_tfr_bits=gyroscope_tfr_bits_label,
-                                             new_column_tfr_frequency_hz=gyroscope_tfr_frequency_hz_label,
-                                             new_column_tfr_time_s=gyroscope_tfr_time_s_label)
-    # Plot X, Y, Z gyroscope TFR
-    for ax_n in range(3):
-        pnl.plot_wf_mesh_vert(redvox_id=station_id_str,
-                              wf_panel_2_sig=df_skyfall_data[gyr_sig_label][0][ax_n],
-                              wf_panel_2_time=df_skyfall_data[gyroscope_epoch_s_label][0],
-                              mesh_time=df_skyfall_data[gyroscope_tfr_time_s_label][0][ax_n],
-                              mesh_frequency=df_skyfall_data[gyroscope_tfr_frequency_hz_label][0][ax_n],
-                              mesh_panel_0_tfr=df_skyfall_data[gyroscope_tfr_bits_label][0][ax_n],
-                              mesh_panel_0_colormap_scaling=tfr_config.mc_scale["Gyr"],
-                              mesh_panel_0_color_range=tfr_config.mc_range["Gyr"],
-                              figure_title=skyfall_config.event_name +
-                                           f": Gyroscope, {tfr_config.tfr_type.upper()} and waveform",
-                              start_time_epoch=gyroscope_tfr_start_epoch,
-                              figure_title_show=tfr_config.show_fig_titles,
-                              wf_panel_2_units=f"Gyr {axes[ax_n]} {gyr_hp_raw}, rad/s")
-
-    # Magnetometer sensor stats
-    print(f'\nmagnetometer_sample_rate_hz: {df_skyfall_data[magnetometer_fs_label][0]}'
-          f'\nmagnetometer_epoch_s_0: {df_skyfall_data[magnetometer_epoch_s_label][0][0]}')
-
-    magnetometer_tfr_start_epoch: float = df_skyfall_data[magnetometer_epoch_s_label][0][0]  # first timestamp
     if tfr_config.sensor_hp['Mag']:
         mag_sig_label, mag_hp_raw = magnetometer_data_highpass_label, 'hp'
     else:
         mag_sig_label, mag_hp_raw = magnetometer_data_raw_label, 'raw'
 
-    # Calculate Time Frequency Representation for magnetometer
-    print('Starting tfr_bits_panda for 3 channel magnetometer:')
-    df_skyfall_data = rpd_tfr.tfr_bits_panda(df=df_skyfall_data,
-                                             sig_wf_label=mag_sig_label,
-                                             sig_sample_rate_label=magnetometer_fs_label,
-                                             order_number_input=tfr_config.tfr_order_number_N,
-                                             tfr_type=tfr_config.tfr_type,
-                                             new_column_tfr_bits=magnetometer_tfr_bits_label,
-                                             new_column_tfr_frequency_hz=magnetometer_tfr_frequency_hz_label,
-                                             new_column_tfr_time_s=magnetometer_tfr_time_s_label)
-
-    # Plot X, Y, Z magnetometer TFR
-    for ax_n in range(3):
-        pnl.plot_wf_mesh_vert(redvox_id=station_id_str,
-                              wf_panel_2_sig=df_skyfall_data[mag_sig_label][0][ax_n],
-                              wf_panel_2_time=df_skyfall_data[magnetometer_epoch_s_label][0],
-                              mesh_time=df_skyfall_data[magnetometer_tfr_time_s_label][0][ax_n],
-                              mesh_frequency=df_skyfall_data[magnetometer_tfr_frequency_hz_label][0][ax_n],
-                              mesh_panel_0_tfr=df_skyfall_data[magnetometer_tfr_bits_label][0][ax_n],
-                              mesh_panel_0_colormap_scaling=tfr_config.mc_scale["Mag"],
-                              mesh_panel_0_color_range=tfr_config.mc_range["Mag"],
-                              figure_title=skyfall_config.event_name +
-                                           f": Magnetometer, {tfr_config.tfr_type.upper()} and waveform",
-                              start_time_epoch=magnetometer_tfr_start_epoch,
-                              figure_title_show=tfr_config.show_fig_titles,
-                              wf_panel_2_units=f"Mag {axes[ax_n]} {mag_hp_raw}, $\mu$T")
-
-    # Plot TFR all sensor waveforms
-    rpd_plot.plot_mesh_pandas(df=df_skyfall_data,
-                              mesh_time_label=[audio_tfr_time_s_label,
-                                               barometer_tfr_time_s_label,
-                                               accelerometer_tfr_time_s_label,
-                                               gyroscope_tfr_time_s_label,
-                                               magnetometer_tfr_time_s_label],
-                              mesh_frequency_label=[audio_tfr_frequency_hz_label,
-                                                    barometer_tfr_frequency_hz_label,
-                                                    accelerometer_tfr_frequency_hz_label,
-                                                    gyroscope_tfr_frequency_hz_label,
-                                                    magnetometer_tfr_frequency_hz_label],
-                              mesh_tfr_label=[audio_tfr_bits_label,
-                                              barometer_tfr_bits_label,
-                                              accelerometer_tfr_bits_label,
-                                              gyroscope_tfr_bits_label,
-                                              magnetometer_tfr_bits_label],
-                              t0_sig_epoch_s=df_skyfall_data[audio_epoch_s_label][0][0],
-                              sig_id_label=["Audio", "Bar",
-                                            "Acc X", "Acc Y", "Acc Z",
-                                            'Gyr X', 'Gyr Y', 'Gyr Z',
-                                            'Mag X', 'Mag Y', 'Mag Z'],
-                              fig_title_show=tfr_config.show_fig_titles,
-                              fig_title="",
-                              frequency_scaling='log',
-                              common_colorbar=False,
-                              mesh_color_scaling=[tfr_config.mc_scale["Audio"], tfr_config.mc_scale["Bar"],
-                                                  tfr_config.mc_scale["Acc"], tfr_config.mc_scale["Acc"],
-                                                  tfr_config.mc_scale["Acc"],
-                                                  tfr_config.mc_scale["Gyr"], tfr_config.mc_scale["Gyr"],
-                                                  tfr_config.mc_scale["Gyr"],
-                                                  tfr_config.mc_scale["Mag"], tfr_config.mc_scale["Mag"],
-                                                  tfr_config.mc_scale["Mag"]],
-                              mesh_color_range=[tfr_config.mc_range["Audio"], tfr_config.mc_range["Bar"],
-                                                tfr_config.mc_range["Acc"], tfr_config.mc_range["Acc"],
-                                                tfr_config.mc_range["Acc"],
-                                                tfr_config.mc_range["Gyr"], tfr_config.mc_range["Gyr"],
-                                                tfr_config.mc_range["Gyr"],
-                                                tfr_config.mc_range["Mag"], tfr_config.mc_range["Mag"],
-                                                tfr_config.mc_range["Mag"]],
-                              ytick_values_show=True)
-
-    plt.show()
+    # Calculate Time Frequency Representation for all sensors, one channel per worker
+    print('Starting tfr_bits_panda for mic, barometer, and 3 channel acceleration, gyroscope and magnetometer:')
+    tfr_jobs = [sf_tfr.TFRJob(audio_data_label, audio_fs_label, audio_tfr_bits_label,
+                              audio_tfr_time_s_label, audio_tfr_frequency_hz_label),
+                sf_tfr.TFRJob(bar_sig_label, barometer_fs_label, barometer_tfr_bits_label,
+                              barometer_tfr_time_s_label, barometer_tfr_frequency_hz_label),
+                sf_tfr.TFRJob(acc_sig_label, accelerometer_fs_label, accelerometer_tfr_bits_label,
+                              accelerometer_tfr_time_s_label, accelerometer_tfr_frequency_hz_label),
+                sf_tfr.TFRJob(gyr_sig_label, gyroscope_fs_label, gyroscope_tfr_bits_label,
+                              gyroscope_tfr_time_s_label, gyroscope_tfr_frequency_hz_label),
+                sf_tfr.TFRJob(mag_sig_label, magnetometer_fs_label, magnetometer_tfr_bits_label,
+                              magnetometer_tfr_time_s_label, magnetometer_tfr_frequency_hz_label)]
+    df_skyfall_data = sf_tfr.tfr_bits_panda_batch(df=df_skyfall_data,
+                                                  tfr_jobs=tfr_jobs,
+                                                  order_number_input=tfr_config.tfr_order_number_N,
+                                                  tfr_type=tfr_config.tfr_type,
+                                                  workers=tfr_config.tfr_workers,
+                                                  stream_dir=TFR_STREAM_DIR if is_tfr_stream_audio else None,
+                                                  cache_dir=TFR_CACHE_DIR if is_tfr_cache else None,
+                                                  max_cache_bytes=tfr_cache_max_bytes)
+
+    # Stations in skyfall_config.station_ids, every station if there are none
+    for station in sf_stations.station_rows(df_skyfall_data, skyfall_config.station_ids):
+        station_id_str = df_skyfall_data[station_label][station]
+
+        # Microphone sensor stats
+        print(f'\nmic_sample_rate_hz: {df_skyfall_data[audio_fs_label][station]}'
+              f'\nmic_epoch_s_0: {df_skyfall_data[audio_epoch_s_label][station][0]}')
+
+        # Frame to mic start and end and plots
+        event_reference_time_epoch_s = df_skyfall_data[audio_epoch_s_label][station][0]
+
+        # Plot microphone TFR
+        sf_figs.plot_figure(f"tfr_{station_id_str}_audio", pnl.plot_wf_mesh_vert,
+                            redvox_id=station_id_str,
+                            wf_panel_2_sig=df_skyfall_data[audio_data_label][station],
+                            wf_panel_2_time=df_skyfall_data[audio_epoch_s_label][station],
+                            mesh_time=df_skyfall_data[audio_tfr_time_s_label][station],
+                            mesh_frequency=df_skyfall_data[audio_tfr_frequency_hz_label][station],
+                            mesh_panel_0_tfr=df_skyfall_data[audio_tfr_bits_label][station],
+                            figure_title=skyfall_config.event_name +
+                                         f": Audio, {tfr_config.tfr_type.upper()} and waveform",
+                            start_time_epoch=event_reference_time_epoch_s,
+                            mesh_panel_0_color_range=tfr_config.mc_range['Audio'],
+                            mesh_panel_0_colormap_scaling=tfr_config.mc_scale['Audio'],
+                            figure_title_show=tfr_config.show_fig_titles,
+                            wf_panel_2_units="Audio, Norm")
+
+        # Barometer sensor stats
+        print(f'\nbarometer_sample_rate_hz: {df_skyfall_data[barometer_fs_label][station]}'
+              f'\nbarometer_epoch_s_0: {df_skyfall_data[barometer_epoch_s_label][station][0]}')
+
+        barometer_tfr_start_epoch: float = df_skyfall_data[barometer_epoch_s_label][station][0]  # first timestamp
+
+        # Plot barometer TFR
+        sf_figs.plot_figure(f"tfr_{station_id_str}_barometer", pnl.plot_wf_mesh_vert,
+                            redvox_id=station_id_str,
+                            wf_panel_2_sig=df_skyfall_data[bar_sig_label][station][0],
+                            wf_panel_2_time=df_skyfall_data[barometer_epoch_s_label][station],
+                            mesh_time=df_skyfall_data[barometer_tfr_time_s_label][station][0],
+                            mesh_frequency=df_skyfall_data[barometer_tfr_frequency_hz_label][station][0],
+                            mesh_panel_0_tfr=df_skyfall_data[barometer_tfr_bits_label][station][0],
+                            mesh_panel_0_colormap_scaling=tfr_config.mc_scale["Bar"],
+                            mesh_panel_0_color_range=tfr_config.mc_range["Bar"],
+                            figure_title=skyfall_config.event_name +
+                                         f": Barometer, {tfr_config.tfr_type.upper()} and waveform",
+                            start_time_epoch=barometer_tfr_start_epoch,
+                            figure_title_show=tfr_config.show_fig_titles,
+                            wf_panel_2_units=f"Bar {bar_hp_raw}, kPa")
+
+        # Acceleration sensor stats
+        print(f'\naccelerometer_sample_rate_hz: {df_skyfall_data[accelerometer_fs_label][station]}'
+              f'\naccelerometer_epoch_s_0: {df_skyfall_data[accelerometer_epoch_s_label][station][0]}')
+
+        # First timestamp
+        acceleromter_tfr_start_epoch: float = df_skyfall_data[accelerometer_epoch_s_label][station][0]
+
+        # Plot X, Y, Z accelerometer TFR
+        for ax_n in range(3):
+            sf_figs.plot_figure(f"tfr_{station_id_str}_accelerometer_{axes[ax_n]}", pnl.plot_wf_mesh_vert,
+                                redvox_id=station_id_str,
+                                wf_panel_2_sig=df_skyfall_data[acc_sig_label][station][ax_n],
+                                wf_panel_2_time=df_skyfall_data[accelerometer_epoch_s_label][station],
+                                mesh_time=df_skyfall_data[accelerometer_tfr_time_s_label][station][ax_n],
+                                mesh_frequency=df_skyfall_data[accelerometer_tfr_frequency_hz_label][station][ax_n],
+                                mesh_panel_0_tfr=df_skyfall_data[accelerometer_tfr_bits_label][station][ax_n],
+                                mesh_panel_0_colormap_scaling=tfr_config.mc_scale["Acc"],
+                                mesh_panel_0_color_range=tfr_config.mc_range["Acc"],
+                                figure_title=skyfall_config.event_name +
+                                             f": Accelerometer, {tfr_config.tfr_type.upper()} and waveform",
+                                start_time_epoch=acceleromter_tfr_start_epoch,
+                                figure_title_show=tfr_config.show_fig_titles,
+                                wf_panel_2_units=f"Acc {axes[ax_n]} {acc_hp_raw}, m/$s^2$")
+
+        # Gyroscope sensor stats
+        print(f'\ngyroscope_sample_rate_hz: {df_skyfall_data[gyroscope_fs_label][station]}'
+              f'\ngyroscope_epoch_s_0: {df_skyfall_data[gyroscope_epoch_s_label][station][0]}')
+
+        gyroscope_tfr_start_epoch: float = df_skyfall_data[gyroscope_epoch_s_label][station][0]  # first timestamp
+
+        # Plot X, Y, Z gyroscope TFR
+        for ax_n in range(3):
+            sf_figs.plot_figure(f"tfr_{station_id_str}_gyroscope_{axes[ax_n]}", pnl.plot_wf_mesh_vert,
+                                redvox_id=station_id_str,
+                                wf_panel_2_sig=df_skyfall_data[gyr_sig_label][station][ax_n],
+                                wf_panel_2_time=df_skyfall_data[gyroscope_epoch_s_label][station],
+                                mesh_time=df_skyfall_data[gyroscope_tfr_time_s_label][station][ax_n],
+                                mesh_frequency=df_skyfall_data[gyroscope_tfr_frequency_hz_label][station][ax_n],
+                                mesh_panel_0_tfr=df_skyfall_data[gyroscope_tfr_bits_label][station][ax_n],
+                                mesh_panel_0_colormap_scaling=tfr_config.mc_scale["Gyr"],
+                                mesh_panel_0_color_range=tfr_config.mc_range["Gyr"],
+                                figure_title=skyfall_config.event_name +
+                                             f": Gyroscope, {tfr_config.tfr_type.upper()} and waveform",
+                                start_time_epoch=gyroscope_tfr_start_epoch,
+                                figure_title_show=tfr_config.show_fig_titles,
+                                wf_panel_2_units=f"Gyr {axes[ax_n]} {gyr_hp_raw}, rad/s")
+
+        # Magnetometer sensor stats
+        print(f'\nmagnetometer_sample_rate_hz: {df_skyfall_data[magnetometer_fs_label][station]}'
+              f'\nmagnetometer_epoch_s_0: {df_skyfall_data[magnetometer_epoch_s_label][station][0]}')
+
+        magnetometer_tfr_start_epoch: float = df_skyfall_data[magnetometer_epoch_s_label][station][0]  # first timestamp
+
+        # Plot X, Y, Z magnetometer TFR
+        for ax_n in range(3):
+            sf_figs.plot_figure(f"tfr_{station_id_str}_magnetometer_{axes[ax_n]}", pnl.plot_wf_mesh_vert,
+                                redvox_id=station_id_str,
+                                wf_panel_2_sig=df_skyfall_data[mag_sig_label][station][ax_n],
+                                wf_panel_2_time=df_skyfall_data[magnetometer_epoch_s_label][station],
+                                mesh_time=df_skyfall_data[magnetometer_tfr_time_s_label][station][ax_n],
+                                mesh_frequency=df_skyfall_data[magnetometer_tfr_frequency_hz_label][station][ax_n],
+                                mesh_panel_0_tfr=df_skyfall_data[magnetometer_tfr_bits_label][station][ax_n],
+                                mesh_panel_0_colormap_scaling=tfr_config.mc_scale["Mag"],
+                                mesh_panel_0_color_range=tfr_config.mc_range["Mag"],
+                                figure_title=skyfall_config.event_name +
+                                             f": Magnetometer, {tfr_config.tfr_type.upper()} and waveform",
+                                start_time_epoch=magnetometer_tfr_start_epoch,
+                                figure_title_show=tfr_config.show_fig_titles,
+                                wf_panel_2_units=f"Mag {axes[ax_n]} {mag_hp_raw}, $\mu$T")
+
+        # Plot TFR all sensor waveforms
+        sf_figs.plot_figure(f"tfr_{station_id_str}_mesh", rpd_plot.plot_mesh_pandas,
+                            df=df_skyfall_data.loc[[station]],
+                            mesh_time_label=[audio_tfr_time_s_label,
+                                             barometer_tfr_time_s_label,
+                                             accelerometer_tfr_time_s_label,
+                                             gyroscope_tfr_time_s_label,
+                                             magnetometer_tfr_time_s_label],
+                            mesh_frequency_label=[audio_tfr_frequency_hz_label,
+                                                  barometer_tfr_frequency_hz_label,
+                                                  accelerometer_tfr_frequency_hz_label,
+                                                  gyroscope_tfr_frequency_hz_label,
+                                                  magnetometer_tfr_frequency_hz_label],
+                            mesh_tfr_label=[audio_tfr_bits_label,
+                                            barometer_tfr_bits_label,
+                                            accelerometer_tfr_bits_label,
+                                            gyroscope_tfr_bits_label,
+                                            magnetometer_tfr_bits_label],
+                            t0_sig_epoch_s=df_skyfall_data[audio_epoch_s_label][station][0],
+                            sig_id_label=["Audio", "Bar",
+                                          "Acc X", "Acc Y", "Acc Z",
+                                          'Gyr X', 'Gyr Y', 'Gyr Z',
+                                          'Mag X', 'Mag Y', 'Mag Z'],
+                            fig_title_show=tfr_config.show_fig_titles,
+                            fig_title="",
+                            frequency_scaling='log',
+                            common_colorbar=False,
+                            mesh_color_scaling=[tfr_config.mc_scale["Audio"], tfr_config.mc_scale["Bar"],
+                                                tfr_config.mc_scale["Acc"], tfr_config.mc_scale["Acc"],
+                                                tfr_config.mc_scale["Acc"],
+                                                tfr_config.mc_scale["Gyr"], tfr_config.mc_scale["Gyr"],
+                                                tfr_config.mc_scale["Gyr"],
+                                                tfr_config.mc_scale["Mag"], tfr_config.mc_scale["Mag"],
+                                                tfr_config.mc_scale["Mag"]],
+                            mesh_color_range=[tfr_config.mc_range["Audio"], tfr_config.mc_range["Bar"],
+                                              tfr_config.mc_range["Acc"], tfr_config.mc_range["Acc"],
+                                              tfr_config.mc_range["Acc"],
+                                              tfr_config.mc_range["Gyr"], tfr_config.mc_range["Gyr"],
+                                              tfr_config.mc_range["Gyr"],
+                                              tfr_config.mc_range["Mag"], tfr_config.mc_range["Mag"],
+                                              tfr_config.mc_range["Mag"]],
+                            ytick_values_show=True)
+
+    sf_figs.show_figures("tfr")
 
 
 if __name__ == "__main__":
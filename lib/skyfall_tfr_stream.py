@@ -0,0 +1,146 @@
+"""
+Block-streaming Short Time Fourier Transform for long records
+Reproduces the tapered libquantum STFT used by redpd_tfr.tfr_bits_panda, one block of windows at a time,
+writing the bits matrix to a memory-mapped .npy file so memory use does not grow with record length
+"""
+
+# Python libraries
+import os
+from typing import Tuple
+import numpy as np
+import librosa
+
+# RedVox RedPandas and related RedVox modules
+from libquantum import scales, utils
+
+# Fraction of the record in the Tukey taper applied by redpd_tfr.tfr_bits_panda
+TFR_TAPER_FRACTION_COSINE = 0.1
+
+
+def stft_points_per_seg_and_hop(number_points: int,
+                                frequency_sample_rate_hz: float,
+                                band_order_Nth: float) -> Tuple[int, int]:
+    """
+    STFT window and hop length chosen by libquantum spectra.stft_from_sig for a record of this length
+
+    :param number_points: number of points in the full record
+    :param frequency_sample_rate_hz: sample rate in Hz
+    :param band_order_Nth: Nth order of constant Q bands
+    :return: points per segment (NFFT) and hop length in points
+    """
+    sig_duration_s = number_points/frequency_sample_rate_hz
+    _, min_frequency_hz = scales.from_duration(band_order_Nth, sig_duration_s)
+
+    order_Nth, cycles_M, quality_Q, \
+        frequency_center, frequency_start, frequency_end = \
+        scales.frequency_bands_g2f1(scale_order_input=band_order_Nth,
+                                    frequency_low_input=min_frequency_hz,
+                                    frequency_sample_rate_input=frequency_sample_rate_hz)
+
+    # Choose the spectral resolution as the key parameter
+    frequency_resolution_min_hz = np.min(frequency_end - frequency_start)
+    frequency_resolution_max_hz = np.max(frequency_end - frequency_start)
+    frequency_resolution_hz_geo = np.sqrt(frequency_resolution_min_hz*frequency_resolution_max_hz)
+    stft_time_duration_s = 1/frequency_resolution_hz_geo
+    stft_points_per_seg = int(frequency_sample_rate_hz*stft_time_duration_s)
+
+    # From CQT
+    stft_points_hop, _, _, _, _ = \
+        scales.cqt_frequency_bands_g2f1(band_order_Nth,
+                                        min_frequency_hz,
+                                        frequency_sample_rate_hz,
+                                        is_power_2=False)
+    return stft_points_per_seg, stft_points_hop
+
+
+def taper_tukey_points(index_points: np.ndarray,
+                       number_points: int,
+                       fraction_cosine: float) -> np.ndarray:
+    """
+    Values of the symmetric Tukey window of length number_points at the requested indexes, computed with the
+    same expressions as scipy.signal.windows.tukey so the taper matches the full-length window exactly
+
+    :param index_points: integer indexes into the window
+    :param number_points: full window length
+    :param fraction_cosine: fraction of the window inside the cosine tapered window, shared between the head and tail
+    :return: taper amplitude at each index
+    """
+    taper = np.ones(np.shape(index_points), dtype=np.float64)
+    if number_points <= 1 or fraction_cosine <= 0:
+        return taper
+    if fraction_cosine >= 1:
+        raise ValueError("Streaming taper supports fraction_cosine < 1 only")
+
+    n = index_points.astype(np.float64)
+    width = int(np.floor(fraction_cosine*(number_points-1)/2.0))
+    head = index_points <= width
+    tail = index_points >= number_points - width - 1
+    taper[head] = 0.5 * (1 + np.cos(np.pi * (-1 + 2.0*n[head]/fraction_cosine/(number_points-1))))
+    taper[tail] = 0.5 * (1 + np.cos(np.pi * (-2.0/fraction_cosine + 1 +
+                                             2.0*n[tail]/fraction_cosine/(number_points-1))))
+    return taper
+
+
+def stft_bits_stream(sig_wf: np.ndarray,
+                     frequency_sample_rate_hz: float,
+                     band_order_Nth: float,
+                     output_file: str,
+                     block_windows: int = 64) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calculate the STFT in bits of a tapered 1D signal in blocks of STFT windows. Gives the same output as
+    the 'stft' type of redpd_tfr.tfr_bits_panda, but holds only one block of the signal and transform in memory
+
+    :param sig_wf: 1D signal waveform; may be a memory-mapped array
+    :param frequency_sample_rate_hz: sample rate in Hz
+    :param band_order_Nth: Nth order of constant Q bands
+    :param output_file: full path of the .npy file for the bits matrix
+    :param block_windows: number of STFT windows (NFFT points) of signal per block. Default 64
+    :return: memory-mapped STFT in bits, STFT time in s, STFT frequency in Hz
+    """
+    number_points = len(sig_wf)
+    stft_points_per_seg, stft_points_hop = \
+        stft_points_per_seg_and_hop(number_points, frequency_sample_rate_hz, band_order_Nth)
+    print('Streaming STFT Duration, NFFT, HOP:', number_points, stft_points_per_seg, stft_points_hop)
+
+    # Frames of librosa.core.stft with center=True, reflect padding of half a window on each side
+    pad_points = stft_points_per_seg // 2
+    if pad_points >= number_points:
+        raise ValueError(f"Signal with {number_points} points is too short for a {stft_points_per_seg} point STFT")
+    number_frames = 1 + (number_points + 2*pad_points - stft_points_per_seg) // stft_points_hop
+    number_frequencies = 1 + stft_points_per_seg // 2
+    frames_per_block = max(1, block_windows*stft_points_per_seg // stft_points_hop)
+    stft_scaling = 2*np.sqrt(np.pi)/stft_points_per_seg
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    stft_bits = np.lib.format.open_memmap(output_file, mode='w+', dtype=np.float64,
+                                          shape=(number_frequencies, number_frames))
+
+    for frame_start in range(0, number_frames, frames_per_block):
+        frame_stop = min(number_frames, frame_start + frames_per_block)
+        # Indexes of the padded signal covered by this block, mapped back into the record by reflection
+        index_points = np.arange(frame_start*stft_points_hop,
+                                 (frame_stop - 1)*stft_points_hop + stft_points_per_seg) - pad_points
+        index_points = np.abs(index_points)
+        index_points = np.where(index_points > number_points - 1, 2*(number_points - 1) - index_points, index_points)
+
+        # In the dtype of the record, as the tapered copy of tfr_bits_panda, so a float32 record also transforms in
+        # single precision
+        sig_block = np.array(sig_wf[index_points])
+        sig_block *= taper_tukey_points(index_points, number_points, TFR_TAPER_FRACTION_COSINE)
+
+        stft_block = librosa.core.stft(sig_block, n_fft=stft_points_per_seg,
+                                       hop_length=stft_points_hop, win_length=None,
+                                       window='hann', center=False)
+        # Must be scaled to match scipy psd
+        stft_block *= stft_scaling
+        stft_bits[:, frame_start:frame_stop] = utils.log2epsilon(stft_block)
+
+    stft_bits.flush()
+
+    time_stft_s = librosa.frames_to_time(np.arange(number_frames), sr=frequency_sample_rate_hz,
+                                         hop_length=stft_points_hop)
+    frequency_stft_hz = librosa.core.fft_frequencies(sr=frequency_sample_rate_hz, n_fft=stft_points_per_seg)
+
+    # Reopen read-only so the caller does not keep dirty pages of the whole matrix
+    del stft_bits
+    return np.load(output_file, mmap_mode='r'), time_stft_s, frequency_stft_hz
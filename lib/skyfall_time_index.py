@@ -0,0 +1,182 @@
+"""
+Time-indexed parquet of one sensor for sub-window reads
+Samples are stored one per row, station by station, in row groups of a fixed duration. The epoch_s statistics of
+each row group in the parquet footer are the time index: a window read loads only the row groups that overlap it
+"""
+
+# Python libraries
+import os
+import json
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Default duration of a row group in s
+TIME_INDEX_CHUNK_S = 10.
+# Schema metadata keys: waveform columns with their number of channels, and fingerprint of the source data
+TIME_INDEX_COLUMNS_KEY = b"skyfall_time_columns"
+TIME_INDEX_FINGERPRINT_KEY = b"skyfall_fingerprint"
+
+
+def sensor_time_columns(df: pd.DataFrame, sensor_label: str) -> Tuple[str, Dict[str, int]]:
+    """
+    Numeric columns of a sensor with one value per timestamp
+
+    :param df: RedPandas DataFrame
+    :param sensor_label: sensor name, e.g. 'barometer'
+    :return: timestamp column name, and {column: number of channels, 0 for 1D arrays} of the sample columns
+    """
+    epoch_label = f"{sensor_label}_epoch_s"
+    if epoch_label not in df.columns:
+        raise ValueError(f"DataFrame has no {epoch_label} column")
+
+    sample_columns = {}
+    for column in df.columns:
+        if not column.startswith(sensor_label + "_") or column == epoch_label:
+            continue
+        number_channels = None
+        for n in df.index:
+            if type(df[epoch_label][n]) == float or type(df[column][n]) == float:
+                continue
+            sig_wf = np.asarray(df[column][n])
+            channels = 0 if sig_wf.ndim == 1 else sig_wf.shape[0] if sig_wf.ndim == 2 else -1
+            if channels < 0 or not np.issubdtype(sig_wf.dtype, np.number) or \
+                    np.shape(sig_wf)[-1] != len(df[epoch_label][n]) or \
+                    (number_channels is not None and channels != number_channels):
+                number_channels = None
+                break
+            number_channels = channels
+        if number_channels is not None:
+            sample_columns[column] = number_channels
+    return epoch_label, sample_columns
+
+
+def time_channel_labels(column: str, number_channels: int) -> List[str]:
+    """
+    Parquet columns of a DataFrame column: the column itself for 1D arrays, column_0, column_1, ... for 2D
+
+    :param column: DataFrame column name
+    :param number_channels: number of channels, 0 for 1D arrays
+    :return: list of parquet column names
+    """
+    return [column] if number_channels == 0 else [f"{column}_{axis}" for axis in range(number_channels)]
+
+
+def export_time_index(df: pd.DataFrame,
+                      sensor_label: str,
+                      output_file: str,
+                      fingerprint: Optional[str] = None,
+                      chunk_s: float = TIME_INDEX_CHUNK_S) -> str:
+    """
+    Write the time-indexed parquet of a sensor
+
+    :param df: RedPandas DataFrame
+    :param sensor_label: sensor name, e.g. 'audio'
+    :param output_file: full path of the parquet file
+    :param fingerprint: optional fingerprint of the data in df, checked by time_index_fingerprint. Default None
+    :param chunk_s: duration of a row group in s. Default TIME_INDEX_CHUNK_S
+    :return: output_file
+    """
+    epoch_label, sample_columns = sensor_time_columns(df, sensor_label)
+    # 2D waveforms are stored as one column per channel
+    fields = [pa.field("station_id", pa.string()), pa.field(epoch_label, pa.float64())]
+    for column, number_channels in sample_columns.items():
+        sig_dtype = [np.asarray(sig_wf).dtype for sig_wf in df[column] if type(sig_wf) != float][0]
+        fields.extend(pa.field(channel_label, pa.from_numpy_dtype(sig_dtype))
+                      for channel_label in time_channel_labels(column, number_channels))
+    metadata = {TIME_INDEX_COLUMNS_KEY: json.dumps(sample_columns).encode()}
+    if fingerprint is not None:
+        metadata[TIME_INDEX_FINGERPRINT_KEY] = fingerprint.encode()
+    schema = pa.schema(fields, metadata=metadata)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    tmp_file = output_file + ".tmp"
+    # Dictionary encoding only pays off for the repeated station id
+    with pq.ParquetWriter(tmp_file, schema, use_dictionary=["station_id"]) as writer:
+        for n in df.index:
+            if type(df[epoch_label][n]) == float or len(df[epoch_label][n]) == 0:
+                continue
+            epoch_s = np.asarray(df[epoch_label][n], dtype=np.float64)
+            # Chunk edges at multiples of chunk_s from the first sample
+            chunk_edges = np.searchsorted(epoch_s, np.arange(epoch_s[0], epoch_s[-1] + chunk_s, chunk_s))
+            chunk_edges = np.unique(np.append(chunk_edges, len(epoch_s)))
+            station_id = pc.take(pa.array([df["station_id"][n]], pa.string()), np.zeros(len(epoch_s), dtype=np.int64))
+            for start, stop in zip(chunk_edges[:-1], chunk_edges[1:]):
+                chunk = {"station_id": station_id.slice(start, stop - start),
+                         epoch_label: epoch_s[start:stop]}
+                for column, number_channels in sample_columns.items():
+                    sig_wf = np.asarray(df[column][n])
+                    for axis, channel_label in enumerate(time_channel_labels(column, number_channels)):
+                        chunk[channel_label] = sig_wf[start:stop] if number_channels == 0 \
+                            else sig_wf[axis, start:stop]
+                writer.write_table(pa.table(chunk, schema=schema), row_group_size=stop - start)
+    os.replace(tmp_file, output_file)
+    return output_file
+
+
+def time_index_fingerprint(input_file: str) -> Optional[str]:
+    """
+    Fingerprint stored by export_time_index
+
+    :param input_file: full path of the time-indexed parquet
+    :return: fingerprint, None if the file does not exist or has none
+    """
+    if not os.path.exists(input_file):
+        return None
+    fingerprint = (pq.read_schema(input_file).metadata or {}).get(TIME_INDEX_FINGERPRINT_KEY)
+    return fingerprint.decode() if fingerprint is not None else None
+
+
+def read_time_window(input_file: str,
+                     start_epoch_s: float,
+                     end_epoch_s: float,
+                     station_ids: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read the samples of a sensor in [start_epoch_s, end_epoch_s] from a time-indexed parquet. Only row groups that
+    overlap the window are read
+
+    :param input_file: full path of the parquet from export_time_index
+    :param start_epoch_s: window start in epoch s
+    :param end_epoch_s: window end in epoch s
+    :param station_ids: optional list of stations. Default None reads all stations
+    :return: DataFrame with one row per station with data in the window, columns as in the RedPandas DataFrame
+    """
+    parquet_file = pq.ParquetFile(input_file)
+    schema = parquet_file.schema_arrow
+    sample_columns = json.loads(schema.metadata[TIME_INDEX_COLUMNS_KEY])
+    epoch_label = schema.names[1]
+    station_column = schema.get_field_index("station_id")
+    epoch_column = schema.get_field_index(epoch_label)
+
+    row_groups = []
+    for row_group in range(parquet_file.num_row_groups):
+        row_group_metadata = parquet_file.metadata.row_group(row_group)
+        epoch_stats = row_group_metadata.column(epoch_column).statistics
+        station_stats = row_group_metadata.column(station_column).statistics
+        if epoch_stats.max < start_epoch_s or epoch_stats.min > end_epoch_s:
+            continue
+        if station_ids is not None and station_stats.min not in station_ids:
+            continue
+        row_groups.append(row_group)
+
+    table = parquet_file.read_row_groups(row_groups)
+    station_id = table.column("station_id").to_numpy()
+    epoch_s = table.column(epoch_label).to_numpy()
+    in_window = (epoch_s >= start_epoch_s) & (epoch_s <= end_epoch_s)
+    channel_samples = {channel_label: table.column(channel_label).to_numpy()
+                       for column, number_channels in sample_columns.items()
+                       for channel_label in time_channel_labels(column, number_channels)}
+
+    rows = []
+    for station in pd.unique(station_id[in_window]):
+        is_station = in_window & (station_id == station)
+        row = {"station_id": station, epoch_label: epoch_s[is_station]}
+        for column, number_channels in sample_columns.items():
+            channels = [channel_samples[channel_label][is_station]
+                        for channel_label in time_channel_labels(column, number_channels)]
+            row[column] = channels[0] if number_channels == 0 else np.vstack(channels)
+        rows.append(row)
+    return pd.DataFrame(rows, columns=["station_id", epoch_label] + list(sample_columns))
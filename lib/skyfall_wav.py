@@ -0,0 +1,250 @@
+"""
+Streaming sonification of the Skyfall sensors
+Writes the same files as redpd_ensonify.ensonify_sensors_pandas and save_to_elastic_wav, byte for byte, without
+making a normalized copy of each channel: one pass over the channel finds its peak, a second normalizes it block by
+block and appends the blocks to the wav file. Channels are written concurrently on a pool of worker processes
+"""
+
+# Python libraries
+import os
+import struct
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Iterable, List, NamedTuple, Optional
+import numpy as np
+import pandas as pd
+
+# RedVox RedPandas and related RedVox modules
+import redpandas.redpd_ensonify as rpd_sound
+
+# Skyfall examples
+import lib.skyfall_spans as sf_spans
+
+# Samples normalized and written at a time
+WAV_BLOCK_SAMPLES = 1 << 16
+# IEEE float format tag of the wav fmt chunk
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+# DataFrame of the pool workers, set by the pool initializer
+_POOL_DF: Optional[pd.DataFrame] = None
+
+
+class WavJob(NamedTuple):
+    """
+    One channel to sonify
+
+    station: DataFrame index of the station
+    sensor_label: column with the sensor waveform
+    sample_rate_label: column with the sensor sample rate in Hz
+    channel: row of a 2D waveform, None for 1D waveforms
+    wav_filename: wav file name with directory path, before the stretch and sample rate suffixes
+    """
+    station: int
+    sensor_label: str
+    sample_rate_label: str
+    channel: Optional[int]
+    wav_filename: str
+
+
+def wav_header(number_samples: int, wav_sample_rate_hz: int, dtype: np.dtype) -> bytes:
+    """
+    Header of a mono IEEE float wav file, laid out as scipy.io.wavfile.write does, up to the data chunk size
+
+    :param number_samples: number of samples in the file
+    :param wav_sample_rate_hz: wav sample rate in Hz
+    :param dtype: float dtype of the samples
+    :return: header bytes
+    """
+    bytes_per_sample = np.dtype(dtype).itemsize
+    data_bytes = number_samples * bytes_per_sample
+    # cbSize field of non-PCM files
+    fmt_chunk_data = struct.pack('<HHIIHH', WAVE_FORMAT_IEEE_FLOAT, 1, wav_sample_rate_hz,
+                                 wav_sample_rate_hz * bytes_per_sample, bytes_per_sample, 8 * bytes_per_sample) + \
+        b'\x00\x00'
+    fmt_chunk = b'fmt ' + struct.pack('<I', len(fmt_chunk_data)) + fmt_chunk_data
+    fact_chunk = b'fact' + struct.pack('<II', 4, number_samples)
+    data_chunk = b'data' + struct.pack('<I', min(data_bytes, 0xFFFFFFFF))
+
+    # scipy switches to RF64 when the file without the fact chunk would be too large for RIFF
+    if 4 + len(fmt_chunk) + 8 + data_bytes <= 0xFFFFFFFF:
+        header = b'RIFF' + b'\x00\x00\x00\x00' + b'WAVE' + fmt_chunk + fact_chunk + data_chunk
+        return header[:4] + struct.pack('<I', len(header) + data_bytes - 8) + header[8:]
+    # RF64 with the sizes in a ds64 chunk
+    ds64_chunk = b'ds64' + struct.pack('<IQQQI', 28, 0, data_bytes, number_samples, 0)
+    header = b'RF64' + b'\xFF\xFF\xFF\xFF' + b'WAVE' + ds64_chunk + fmt_chunk + fact_chunk + data_chunk
+    return header[:20] + struct.pack('<Q', len(header) + data_bytes - 8) + header[28:]
+
+
+def write_wav_blocks(wav_file: str,
+                     wav_sample_rate_hz: int,
+                     blocks: Iterable[np.ndarray],
+                     number_samples: int,
+                     dtype: np.dtype) -> None:
+    """
+    Write a mono wav file from blocks of samples
+
+    :param wav_file: full path of the wav file
+    :param wav_sample_rate_hz: wav sample rate in Hz
+    :param blocks: sample blocks, number_samples in total
+    :param number_samples: number of samples in the file
+    :param dtype: float dtype of the samples
+    """
+    little_endian_dtype = np.dtype(dtype).newbyteorder('<')
+    with open(wav_file, 'wb') as f:
+        f.write(wav_header(number_samples, wav_sample_rate_hz, dtype))
+        for block in blocks:
+            f.write(np.asarray(block, dtype=little_endian_dtype).tobytes())
+
+
+def save_to_elastic_wav(sig_wf: np.ndarray,
+                        sig_sample_rate_hz: float,
+                        wav_filename: str,
+                        wav_sample_rate_hz: float = 8000.,
+                        block_samples: int = WAV_BLOCK_SAMPLES) -> Optional[str]:
+    """
+    Save input signal to wav file, as redpd_ensonify.save_to_elastic_wav, in blocks
+
+    :param sig_wf: input signal waveform, reasonably well preprocessed
+    :param sig_sample_rate_hz: input signal sample rate
+    :param wav_filename: wav file name, with directory path
+    :param wav_sample_rate_hz: wav sample rate; supports rpd_sound.permitted_wav_fs_values
+    :param block_samples: samples normalized and written at a time. Default WAV_BLOCK_SAMPLES
+    :return: full path of the wav file, None if the wav sample rate is not supported
+    """
+    if int(wav_sample_rate_hz) not in rpd_sound.permitted_wav_fs_values:
+        print(rpd_sound.exception_str)
+        return None
+    stretch_str = rpd_sound.stretch_factor_str(sig_sample_rate_hz=sig_sample_rate_hz,
+                                               wav_sample_rate_hz=wav_sample_rate_hz)
+    khz_str = rpd_sound.sample_rate_str(wav_sample_rate_hz=wav_sample_rate_hz)
+    export_filename = wav_filename + stretch_str + khz_str
+
+    block_starts = range(0, len(sig_wf), block_samples)
+    peak = np.max([np.max(np.abs(np.real(sig_wf[start:start + block_samples]))) for start in block_starts])
+    # Same expression as redpd_ensonify, so the samples are identical
+    blocks = (0.9 * np.real(sig_wf[start:start + block_samples]) / peak for start in block_starts)
+    dtype = (0.9 * np.real(sig_wf[:1]) / peak).dtype
+    write_wav_blocks(export_filename, int(wav_sample_rate_hz), blocks, len(sig_wf), dtype)
+    return export_filename
+
+
+def ensonify_jobs(df: pd.DataFrame,
+                  sig_id_label: str,
+                  sensor_column_label_list: List[str],
+                  sig_sample_rate_label_list: List[str],
+                  output_wav_directory: str,
+                  output_wav_filename: str = 'redvox',
+                  sensor_name_list: Optional[List[str]] = None) -> List[WavJob]:
+    """
+    Channels of every station and sensor, named as in redpd_ensonify.ensonify_sensors_pandas
+
+    :param df: input pandas data frame
+    :param sig_id_label: string for column name with station ids in df
+    :param sensor_column_label_list: list of strings with column name with sensor waveform data in df
+    :param sig_sample_rate_label_list: list of strings with the sensor sample rate in Hz column name in df
+    :param output_wav_directory: output directory where .wav files are stored
+    :param output_wav_filename: output name for .wav files. Default 'redvox'
+    :param sensor_name_list: optional list of strings with channel names per sensor. Default None
+    :return: list of WavJob
+    """
+    names_index_channel = ['_X', '_Y', '_Z']
+    jobs = []
+    for station in df.index:
+        sensor_channel_index = 0
+        for sensor_label, sample_rate_label in zip(sensor_column_label_list, sig_sample_rate_label_list):
+            sig_j = df[sensor_label][station]
+            channels = [None] if sig_j.ndim == 1 else range(len(sig_j))
+            for channel in channels:
+                if sensor_name_list is not None:
+                    channel_name = sensor_name_list[sensor_channel_index]
+                elif channel is None:
+                    channel_name = sensor_label
+                else:
+                    channel_name = sensor_label + names_index_channel[channel]
+                wav_filename = os.path.join(output_wav_directory,
+                                            f"{output_wav_filename}_{df[sig_id_label][station]}_{channel_name}")
+                jobs.append(WavJob(station=station, sensor_label=sensor_label, sample_rate_label=sample_rate_label,
+                                   channel=channel, wav_filename=wav_filename))
+                sensor_channel_index += 1
+    return jobs
+
+
+def write_wav_job(job: WavJob, df: pd.DataFrame, wav_sample_rate_hz: float, block_samples: int) -> Optional[str]:
+    """
+    Write the wav file of one channel
+
+    :param job: channel to write
+    :param df: input pandas data frame
+    :param wav_sample_rate_hz: wav sample rate in Hz
+    :param block_samples: samples normalized and written at a time
+    :return: full path of the wav file
+    """
+    with sf_spans.span("wav", wav=os.path.basename(job.wav_filename)):
+        sig_wf = df[job.sensor_label][job.station]
+        if job.channel is not None:
+            sig_wf = sig_wf[job.channel]
+        return save_to_elastic_wav(sig_wf=sig_wf,
+                                   sig_sample_rate_hz=df[job.sample_rate_label][job.station],
+                                   wav_filename=job.wav_filename,
+                                   wav_sample_rate_hz=wav_sample_rate_hz,
+                                   block_samples=block_samples)
+
+
+def _init_wav_worker(df: pd.DataFrame) -> None:
+    """
+    Keep the DataFrame in the worker
+    """
+    global _POOL_DF
+    _POOL_DF = df
+
+
+def _write_pool_job(job: WavJob, wav_sample_rate_hz: float, block_samples: int) -> Optional[str]:
+    """
+    Write one channel of the DataFrame kept by _init_wav_worker
+    """
+    return write_wav_job(job, _POOL_DF, wav_sample_rate_hz, block_samples)
+
+
+def ensonify_sensors_pandas(df: pd.DataFrame,
+                            sig_id_label: str,
+                            sensor_column_label_list: List[str],
+                            sig_sample_rate_label_list: List[str],
+                            wav_sample_rate_hz: float,
+                            output_wav_directory: str,
+                            output_wav_filename: str = 'redvox',
+                            sensor_name_list: Optional[List[str]] = None,
+                            workers: int = 1,
+                            block_samples: int = WAV_BLOCK_SAMPLES) -> List[str]:
+    """
+    Channel sensor data sonification, as redpd_ensonify.ensonify_sensors_pandas, streamed and in parallel. All
+    channels use wav_sample_rate_hz; redpd_ensonify writes the channels of 2D sensors at 192 kHz whatever it is
+
+    :param df: input pandas data frame
+    :param sig_id_label: string for column name with station ids in df
+    :param sensor_column_label_list: list of strings with column name with sensor waveform data in df
+    :param sig_sample_rate_label_list: list of strings with the sensor sample rate in Hz column name in df
+    :param wav_sample_rate_hz: sample rate in Hz which to resample to. One of: 8000., 16000., 48000., 96000., 192000.
+    :param output_wav_directory: output directory where .wav files are stored
+    :param output_wav_filename: output name for .wav files. Default 'redvox'
+    :param sensor_name_list: optional list of strings with channel names per sensor. Default None
+    :param workers: number of worker processes; 1 writes the channels in this process. Default 1
+    :param block_samples: samples normalized and written at a time. Default WAV_BLOCK_SAMPLES
+    :return: full paths of the wav files
+    """
+    # redpd_ensonify makes this directory, although the files go to output_wav_directory
+    os.makedirs(os.path.join(output_wav_directory, "wav"), exist_ok=True)
+    print("Exporting wav files to " + output_wav_directory)
+    jobs = ensonify_jobs(df, sig_id_label, sensor_column_label_list, sig_sample_rate_label_list,
+                         output_wav_directory, output_wav_filename, sensor_name_list)
+
+    if workers == 1 or len(jobs) < 2:
+        wav_files = [write_wav_job(job, df, wav_sample_rate_hz, block_samples) for job in jobs]
+    else:
+        write_job = partial(_write_pool_job, wav_sample_rate_hz=wav_sample_rate_hz, block_samples=block_samples)
+        context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=context,
+                                 initializer=_init_wav_worker, initargs=(df,)) as executor:
+            wav_files = list(sf_spans.map_with_spans(executor, write_job, jobs))
+    for wav_file in wav_files:
+        print(wav_file)
+    return wav_files
@@ -7,10 +7,11 @@ SKYFALL_DIR = "path/to/download/data/folder"
 # SKYFALL_DIR = "/Users/mgarces/UsersDocuments/DATA/SDK_DATA/api900_Skyfall_20201027"
 
 # Build Bounder Data Products: Settings for skyfall_loc_rpd.py
-is_rerun_bounder: bool = True  # If true, rerun and save as parquet
+is_rerun_bounder: bool = False  # If true, rebuild the parquet even if the csv has not changed
 BOUNDER_PATH = "../bounder"
 BOUNDER_FILE = "skyfall_bounder.csv"
 BOUNDER_PQT_FILE = "Skyfall_df_bounder.parquet"
+PRESSURE_HEIGHT_MODEL_FILE = "Skyfall_pressure_height_model.json"  # Polynomial fitted to the bounder data
 
 # It is not recommended to change the lines below as they contain Skyfall example set parameters.
 
@@ -32,6 +33,51 @@ skyfall_config = RedpdConfig(input_directory=SKYFALL_DIR,
                              start_buffer_minutes=3,
                              end_buffer_minutes=3)
 
+# DataWindow and DataFrame disk cache: Settings for skyfall_dw.py
+is_cache_dataframe: bool = True  # If true, reuse the RedPandas DataFrame from a previous run when the inputs match
+datawindow_workers: int = 1  # Processes building the DataWindow, one group of stations each; 1 builds it in order
+datawindow_prefetch_depth: int = 8  # Packet files each DataWindow process reads ahead into the OS cache; 0 reads none
+CACHE_DIR = os.path.join(skyfall_config.output_dir, "cache")
+
+# Pipeline: Settings for run_all.py
+run_all_workers: int = 1  # Processes for independent stages; 1 runs every stage in order with interactive figures
+station_workers: int = 1  # Processes for the per-station analyses (skyfall_stations.py); 1 analyzes stations in order
+is_export_spans: bool = True  # If true, save time, memory and I/O of each stage as JSON and a Chrome trace
+SPANS_DIR = os.path.join(skyfall_config.output_dir, "spans")
+
+# Figures: Settings for skyfall_figures.py
+is_headless_figures: bool = False  # If true, save figures to FIGURES_DIR with a non-interactive backend, do not show
+figure_workers: int = os.cpu_count()  # Processes rendering figures in headless mode; 1 renders them in order
+figure_formats: tuple = ("png",)  # Image formats in headless mode, e.g. ("png", "pdf")
+figure_dpi: float = 150.
+is_decimate_waveforms: bool = True  # If true, plot the min/max envelope of waveforms, one bin per pixel column
+FIGURES_DIR = os.path.join(skyfall_config.output_dir, "figures")
+
+# Sonification: Settings for skyfall_ensonify.py
+wav_workers: int = os.cpu_count()  # Processes writing wav files, one channel each; 1 writes them in order
+wav_block_samples: int = 65536  # Samples normalized and written at a time
+
+# Station catalog: Settings for skyfall_station_specs.py
+is_station_catalog: bool = True  # If true, write the specs from packet metadata; if false, build the DataWindow
+catalog_workers: int = os.cpu_count()  # Processes reading station metadata; 1 reads the stations in order
+CATALOG_FILE = skyfall_config.event_name + "_station_catalog.parquet"
+
+# Spin rate: Settings for skyfall_spinning.py
+spin_window_s: float = 10.  # Gyroscope window of each spin rate value
+spin_overlap_fraction: float = 0.5  # Fraction of each window shared with the next
+
+# Packet file index: Settings for skyfall_file_index.py
+is_file_index: bool = False  # If true, plan the packet files from an index of the event window, updated before use
+file_index_workers: int = os.cpu_count()  # Processes decoding new packet files; 1 decodes them in order
+file_index_prefetch_depth: int = 8  # Packet files read ahead in background threads while others decode; 0 reads in turn
+FILE_INDEX_FILE = os.path.join(skyfall_config.output_dir, "Skyfall_file_index.sqlite")
+
+# Benchmark: Settings for skyfall_benchmark.py, which runs on synthetic data
+benchmark_stations: int = 1
+benchmark_duration_s: float = 30 * 60
+benchmark_audio_sample_rate_hz: float = 800.  # RedVox phones record from 800 Hz to 48 kHz
+BENCHMARK_DIR = os.path.join(skyfall_config.output_dir, "benchmark")
+
 # TFR configuration
 tfr_config = TFRConfig(tfr_type='stft',
                        tfr_order_number_N=12,
@@ -43,3 +89,13 @@ tfr_config = TFRConfig(tfr_type='stft',
                                          'Gyr': 18.,
                                          'Mag': 18.},
                        sensor_highpass=True)
+
+# Worker processes for the sensor TFRs in skyfall_tfr_rpd.py; 1 computes them one after another
+tfr_config.tfr_workers = os.cpu_count()
+
+# TFR streaming and disk cache: Settings for skyfall_tfr_rpd.py
+is_tfr_stream_audio: bool = False  # If true, stream the audio STFT in blocks to memory-mapped files for long records
+TFR_STREAM_DIR = os.path.join(skyfall_config.output_dir, "tfr_stream")
+is_tfr_cache: bool = True  # If true, reuse each channel's TFR until the waveform or tfr_type/tfr_order_number_N change
+tfr_cache_max_bytes: int = 2 * 1024**3  # Least recently used TFRs are removed above this size
+TFR_CACHE_DIR = os.path.join(skyfall_config.output_dir, "tfr_cache")